@@ -0,0 +1,178 @@
+"""Compares the API throughput in sync and async database modes.
+
+Each mode runs in its own process (the mode is read from the environment at import
+time), ``--clients`` concurrent clients hammer the API through an in-process ASGI
+transport:
+
+    PYTHONPATH=. SQLALCHEMY_DATABASE_URI="postgresql://..." \\
+        python benchmarks/async_throughput.py --clients 200 --requests 25
+
+The ``reads`` workload only reads single books and short pages. ``mixed`` adds large
+pages (CPU bound serialization) and logins (bcrypt, see ``PASSWORD_HASHING_WORKERS``)
+to show what the endpoints run on the event loop cost the other requests in async
+mode: latencies are reported for each kind of request.
+"""
+
+import argparse
+import asyncio
+import os
+import random
+import statistics
+import subprocess
+import sys
+import time
+
+
+def init_cmd_line() -> argparse.ArgumentParser:
+    parser = argparse.ArgumentParser(
+        prog="Async throughput benchmark",
+        description="Compares sync and async database modes under concurrent load",
+    )
+
+    parser.add_argument("--clients", type=int, default=200)
+    parser.add_argument("--requests", type=int, default=25, help="Requests per client")
+    parser.add_argument("--books", type=int, default=500, help="Books to seed")
+    parser.add_argument(
+        "--pool-size",
+        type=int,
+        default=None,
+        help="Connections of both pools, defaults to one per client",
+    )
+    parser.add_argument("--mode", choices=["sync", "async"], default=None)
+    parser.add_argument("--workload", choices=["reads", "mixed"], default="reads")
+
+    return parser
+
+
+def seed_database(books_count: int) -> list[int]:
+    from sqlalchemy import select
+
+    from src.api.main import engine, session_factory
+    from src.database.common import BaseModel
+    from src.database.models import Author, Book, User
+
+    BaseModel.metadata.create_all(bind=engine, checkfirst=True)
+
+    with session_factory() as session:
+        if User.get("benchmark", session) is None:
+            session.add(
+                User(username="benchmark", email="bench@mark.tld", password="pwd")
+            )
+            session.commit()
+
+        book_ids = list(session.execute(select(Book.id)).scalars())
+
+        if len(book_ids) < books_count:
+            author = Author(first_name="Benchmark", last_name="Author")
+            session.add(author)
+            session.add_all(
+                Book(title=f"Benchmark book {index}", author=author)
+                for index in range(books_count - len(book_ids))
+            )
+            session.commit()
+
+            book_ids = list(session.execute(select(Book.id)).scalars())
+
+    return book_ids
+
+
+def pick_request(workload: str, book_ids: list[int]) -> tuple[str, str]:
+    """Kind & URL of the next request of a client, logins are ``POST`` requests."""
+    draw = random.random()
+
+    if workload == "mixed":
+        if draw < 0.05:
+            return "login", "/user/token"
+        if draw < 0.15:
+            return "large page", "/books/?limit=500"
+
+    if draw < 0.8:
+        return "book", f"/books/{random.choice(book_ids)}"
+
+    return "page", "/books/?limit=20"
+
+
+async def run_clients(
+    clients: int, requests: int, book_ids: list[int], workload: str
+) -> None:
+    import httpx
+
+    from src.api import config, main
+
+    app = main.init_api()
+    latencies: dict[str, list[float]] = {}
+
+    async def client(http_client: httpx.AsyncClient) -> None:
+        for _ in range(requests):
+            kind, url = pick_request(workload, book_ids)
+
+            started_at = time.perf_counter()
+
+            if kind == "login":
+                response = await http_client.post(
+                    url, data={"username": "benchmark", "password": "pwd"}
+                )
+            else:
+                response = await http_client.get(url)
+
+            latencies.setdefault(kind, []).append(time.perf_counter() - started_at)
+
+            response.raise_for_status()
+
+    transport = httpx.ASGITransport(app=app)  # type: ignore[arg-type]
+
+    async with httpx.AsyncClient(transport=transport, base_url="http://bench") as http:
+        started_at = time.perf_counter()
+        await asyncio.gather(*(client(http) for _ in range(clients)))
+        elapsed = time.perf_counter() - started_at
+
+    # Pooled aiosqlite connections run in threads that would keep the process alive
+    if main.async_engine is not None:
+        await main.async_engine.dispose()
+
+    mode = "async" if config.SQLALCHEMY_ASYNC else "sync"
+    total = sum(len(kind_latencies) for kind_latencies in latencies.values())
+
+    print(
+        f"{mode:>5}: {total / elapsed:8.1f} req/s"
+        f" | {clients} clients x {requests} requests, {workload}"
+    )
+
+    for kind, kind_latencies in sorted(latencies.items()):
+        kind_latencies.sort()
+
+        print(
+            f"{kind:>17}: p50 {statistics.median(kind_latencies) * 1000:7.1f} ms"
+            f" | p99 {kind_latencies[int(len(kind_latencies) * 0.99) - 1] * 1000:7.1f}"
+            f" ms | {len(kind_latencies)} requests"
+        )
+
+
+if __name__ == "__main__":
+    args = init_cmd_line().parse_args()
+
+    if args.mode is None:
+        # Run each mode in a fresh interpreter, engines are built at import time
+        for mode in ("sync", "async"):
+            subprocess.run(
+                [sys.executable, *sys.argv, "--mode", mode],
+                env={
+                    **os.environ,
+                    "TESTING": "true",
+                    "SQLALCHEMY_ASYNC": "true" if mode == "async" else "false",
+                    # Same pool size for both modes, large enough not to be the
+                    # bottleneck: a sync session only gives its connection back when
+                    # its dependency exits, which needs a thread of the threadpool.
+                    # An undersized pool deadlocks the sync mode as soon as every
+                    # thread waits for a connection.
+                    "SQLALCHEMY_POOL_SIZE": str(args.pool_size or args.clients),
+                    "SQLALCHEMY_MAX_OVERFLOW": "0",
+                },
+                check=True,
+            )
+    else:
+        asyncio.run(
+            run_clients(
+                args.clients, args.requests, seed_database(args.books), args.workload
+            )
+        )
@@ -0,0 +1,72 @@
+"""Compares the creation of books one ``POST /books/`` at a time with
+``POST /books/bulk``.
+
+    PYTHONPATH=. SQLALCHEMY_DATABASE_URI="postgresql://..." \\
+        python benchmarks/bulk_books.py --books 10000
+
+The per-row path is measured on ``--sample`` books and extrapolated to ``--books``.
+"""
+
+import argparse
+import time
+
+
+def init_cmd_line() -> argparse.ArgumentParser:
+    parser = argparse.ArgumentParser(
+        prog="Bulk books benchmark",
+        description="Per-row vs bulk creation of books",
+    )
+
+    parser.add_argument("--books", type=int, default=10_000, help="Books to create")
+    parser.add_argument("--sample", type=int, default=1_000, help="Per-row books")
+
+    return parser
+
+
+def main() -> None:
+    args = init_cmd_line().parse_args()
+
+    from fastapi.testclient import TestClient
+
+    from src.api import config
+    from src.api.main import engine, init_api, session_factory
+    from src.database.common import BaseModel
+    from src.database.models import Author
+
+    BaseModel.metadata.create_all(bind=engine, checkfirst=True)
+
+    with session_factory() as session:
+        author = Author(first_name="Benchmark", last_name="Author")
+        session.add(author)
+        session.commit()
+        author_id = author.id
+
+    client = TestClient(init_api())
+
+    started_at = time.perf_counter()
+    for index in range(args.sample):
+        response = client.post(
+            "/books/", json={"title": f"Per-row {index}", "author_id": author_id}
+        )
+        response.raise_for_status()
+    per_row = (time.perf_counter() - started_at) / args.sample * args.books
+
+    config.BOOKS_BULK_MAX_SIZE = max(config.BOOKS_BULK_MAX_SIZE, args.books)
+
+    started_at = time.perf_counter()
+    response = client.post(
+        "/books/bulk",
+        json=[
+            {"title": f"Bulk {index}", "author_id": author_id}
+            for index in range(args.books)
+        ],
+    )
+    response.raise_for_status()
+    bulk = time.perf_counter() - started_at
+
+    print(f"{args.books} books, per-row (extrapolated): {per_row:.2f}s")
+    print(f"{args.books} books, bulk: {bulk:.2f}s ({per_row / bulk:.0f}x)")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,108 @@
+"""Compares the serialization of the books list through ORM instances & the response
+model (``BookDumpSchema.model_validate``) with the plain rows & ``TypeAdapter`` path
+of the read only endpoints.
+
+    PYTHONPATH=. SQLALCHEMY_DATABASE_URI="postgresql://..." \\
+        python benchmarks/catalog_reads.py --books 10000
+
+Both paths read every book, along with its author & availability, then serialize them
+into a JSON page. The bodies are checked to be identical.
+"""
+
+import argparse
+import time
+from datetime import datetime
+from typing import Callable
+
+
+def init_cmd_line() -> argparse.ArgumentParser:
+    parser = argparse.ArgumentParser(
+        prog="Catalog reads benchmark",
+        description="ORM & response model vs plain rows & TypeAdapter",
+    )
+
+    parser.add_argument("--books", type=int, default=10_000, help="Books to list")
+    parser.add_argument("--rounds", type=int, default=5, help="Best of rounds")
+
+    return parser
+
+
+def main() -> None:
+    args = init_cmd_line().parse_args()
+
+    from sqlalchemy import func, select
+
+    from src.api.fields import FieldSelection
+    from src.api.main import engine, session_factory
+    from src.database.common import BaseModel
+    from src.database.models import Author, Book
+    from src.schemas.books import (
+        BOOK_PAGE_ADAPTER,
+        BookDumpSchema,
+        BookSchema,
+    )
+    from src.schemas.pagination import PageSchema
+
+    BaseModel.metadata.create_all(bind=engine, checkfirst=True)
+
+    with session_factory() as session:
+        existing_books = session.execute(select(func.count(Book.id))).scalar_one()
+
+        if existing_books < args.books:
+            author = Author(first_name="Benchmark", last_name="Author")
+            session.add(author)
+            session.flush()
+
+            Book.bulk_create(
+                [
+                    BookSchema(title=f"Book {index}", author_id=author.id)
+                    for index in range(args.books - existing_books)
+                ],
+                session,
+                batch_size=1_000,
+            )
+            session.commit()
+
+    now = datetime.now()
+    book_fields = FieldSelection.everything(BookDumpSchema)
+
+    def orm_page() -> bytes:
+        with session_factory() as session:
+            books = Book.get_all(session, limit=args.books, now=now)
+
+            page = PageSchema[BookDumpSchema](
+                items=[BookDumpSchema.model_validate(book) for book in books]
+            )
+
+            return page.model_dump_json().encode()
+
+    def rows_page() -> bytes:
+        with session_factory() as session:
+            rows = Book.get_all_rows(session, now=now, limit=args.books)
+
+            return BOOK_PAGE_ADAPTER.dump_json(
+                {"items": book_fields.dump_all(rows), "next": None}
+            )
+
+    def best_time(read: Callable[[], bytes]) -> float:
+        timings = []
+
+        for _ in range(args.rounds):
+            started_at = time.perf_counter()
+            read()
+            timings.append(time.perf_counter() - started_at)
+
+        return min(timings)
+
+    assert orm_page() == rows_page(), "Both paths must send the same body"
+
+    orm = best_time(orm_page)
+    rows = best_time(rows_page)
+
+    print(f"{args.books} books, ORM & schema: {args.books / orm:,.0f} rows/s")
+    print(f"{args.books} books, rows & adapter: {args.books / rows:,.0f} rows/s")
+    print(f"Speedup: {orm / rows:.1f}x")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,149 @@
+"""Measures the catalog read latency while a burst of logins hits ``/user/token``.
+
+Each hashing setup runs in its own process (the configuration is read at import
+time): bcrypt on the request threads (``PASSWORD_HASHING_WORKERS=0``) then in the
+dedicated process pool.
+
+    PYTHONPATH=. SQLALCHEMY_DATABASE_URI="postgresql://..." \\
+        python benchmarks/login_burst.py --logins 200 --readers 20
+"""
+
+import argparse
+import asyncio
+import os
+import subprocess
+import sys
+import time
+
+
+def init_cmd_line() -> argparse.ArgumentParser:
+    parser = argparse.ArgumentParser(
+        prog="Login burst benchmark",
+        description="Catalog p99 latency during a concurrent login burst",
+    )
+
+    parser.add_argument("--logins", type=int, default=200, help="Concurrent logins")
+    parser.add_argument("--readers", type=int, default=20, help="Catalog clients")
+    parser.add_argument("--workers", type=int, default=None, help="Hashing processes")
+    parser.add_argument("--run", action="store_true", help=argparse.SUPPRESS)
+
+    return parser
+
+
+def seed_database() -> None:
+    from src.api.main import engine, session_factory
+    from src.database.common import BaseModel
+    from src.database.models import Author, Book, User
+
+    BaseModel.metadata.create_all(bind=engine, checkfirst=True)
+
+    with session_factory() as session:
+        if User.get("benchmark", session) is None:
+            author = Author(first_name="Benchmark", last_name="Author")
+            session.add_all(
+                [
+                    User(username="benchmark", email="bench@mark.tld", password="pwd"),
+                    author,
+                    *(
+                        Book(title=f"Book {index}", author=author)
+                        for index in range(50)
+                    ),
+                ]
+            )
+            session.commit()
+
+
+def percentile(latencies: list[float], ratio: float) -> float:
+    latencies = sorted(latencies)
+
+    return latencies[max(int(len(latencies) * ratio) - 1, 0)] * 1000
+
+
+async def run_burst(logins: int, readers: int) -> None:
+    import httpx
+
+    from src.api import config, main
+
+    app = main.init_api()
+    transport = httpx.ASGITransport(app=app)  # type: ignore[arg-type]
+
+    async def read_catalog(
+        http: httpx.AsyncClient, latencies: list[float], stop: asyncio.Event
+    ) -> None:
+        while not stop.is_set():
+            started_at = time.perf_counter()
+            response = await http.get("/books/?limit=20")
+            latencies.append(time.perf_counter() - started_at)
+            response.raise_for_status()
+
+    async def measure_reads(
+        http: httpx.AsyncClient, duration: float | None, burst: list[asyncio.Task[None]]
+    ) -> list[float]:
+        latencies: list[float] = []
+        stop = asyncio.Event()
+        reader_tasks = [
+            asyncio.create_task(read_catalog(http, latencies, stop))
+            for _ in range(readers)
+        ]
+
+        if burst:
+            await asyncio.gather(*burst)
+        else:
+            await asyncio.sleep(duration or 0)
+
+        stop.set()
+        await asyncio.gather(*reader_tasks)
+
+        return latencies
+
+    async def login(http: httpx.AsyncClient) -> None:
+        response = await http.post(
+            "/user/token", data={"username": "benchmark", "password": "pwd"}
+        )
+        # 503 are expected once the hashing queue is full
+        assert response.status_code in (202, 503), response.text
+
+    async with httpx.AsyncClient(transport=transport, base_url="http://bench") as http:
+        # Warm up, spawns the hashing processes
+        await login(http)
+
+        idle_latencies = await measure_reads(http, duration=3, burst=[])
+
+        started_at = time.perf_counter()
+        burst = [asyncio.create_task(login(http)) for _ in range(logins)]
+        burst_latencies = await measure_reads(http, duration=None, burst=burst)
+        burst_duration = time.perf_counter() - started_at
+
+    setup = (
+        f"process pool ({config.PASSWORD_HASHING_WORKERS} workers)"
+        if config.PASSWORD_HASHING_WORKERS > 0
+        else "request threads"
+    )
+
+    print(
+        f"bcrypt on {setup}: catalog p99 idle {percentile(idle_latencies, 0.99):.1f} ms"
+        f" | during {logins} logins {percentile(burst_latencies, 0.99):.1f} ms"
+        f" | burst took {burst_duration:.1f} s"
+    )
+
+
+if __name__ == "__main__":
+    args = init_cmd_line().parse_args()
+
+    if not args.run:
+        workers = args.workers or os.cpu_count() or 1
+
+        for hashing_workers in (0, workers):
+            subprocess.run(
+                [sys.executable, *sys.argv, "--run"],
+                env={
+                    **os.environ,
+                    "TESTING": "true",
+                    "PASSWORD_HASHING_WORKERS": str(hashing_workers),
+                    "SQLALCHEMY_POOL_SIZE": str(args.logins + args.readers),
+                },
+                check=True,
+            )
+    else:
+        seed_database()
+        asyncio.run(run_burst(args.logins, args.readers))
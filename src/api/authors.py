@@ -1,12 +1,33 @@
+from datetime import datetime
 from http import HTTPStatus
 from typing import Annotated
 
-from fastapi import APIRouter, Depends, HTTPException
+from fastapi import APIRouter, Depends, HTTPException, Query, Response
+from fastapi.responses import StreamingResponse
+from sqlalchemy.exc import IntegrityError
 from sqlalchemy.orm import Session
+from sqlalchemy.orm.exc import StaleDataError
 
-from src.api import main
-from src.database.models import Author
-from src.schemas.books import AuthorDumpSchema, AuthorSchema
+from src.api import config, main
+from src.api.books import load_books_page
+from src.api.cache import CachedRead, catalog_cache
+from src.api.conditional import ConditionalRequest, make_etag
+from src.api.export import ExportFormat, export_response
+from src.api.fields import FieldSelection, SparseFields
+from src.api.pagination import Pagination
+from src.database.models import Author, Book
+from src.schemas.books import (
+    AUTHOR_COUNTS_PAGE_ADAPTER,
+    AUTHOR_PAGE_ADAPTER,
+    AUTHOR_ROW_ADAPTER,
+    AuthorCountsDumpSchema,
+    AuthorDumpSchema,
+    AuthorPatchSchema,
+    AuthorSchema,
+    BookDumpSchema,
+    BulkDeletedSchema,
+)
+from src.schemas.pagination import PageSchema
 
 router = APIRouter(
     prefix="/author",
@@ -17,16 +38,82 @@ router = APIRouter(
     dependencies=[
         Depends(main.database_connection),
     ],
+    route_class=main.DatabaseRoute,
 )
 
+AUTHOR_FIELDS = FieldSelection.everything(AuthorDumpSchema)
+AUTHOR_COUNTS_FIELDS = FieldSelection.everything(AuthorCountsDumpSchema)
+
 
-@router.get("/", status_code=int(HTTPStatus.OK))
+@router.get(
+    "/",
+    status_code=int(HTTPStatus.OK),
+    response_model=PageSchema[AuthorDumpSchema] | PageSchema[AuthorCountsDumpSchema],
+)
 def get_authors(
     session: Annotated[Session, Depends(main.database_connection)],
-) -> list[AuthorDumpSchema]:
-    authors = Author.get_authors_list(session)
+    pagination: Annotated[Pagination, Depends()],
+    conditional: Annotated[ConditionalRequest, Depends()],
+    now: Annotated[datetime, Depends(main.current_time)],
+    with_counts: bool = False,
+) -> Response:
+    """Authors are read as plain rows (``Author.rows_query``) and serialized straight
+    to JSON, no ORM instance nor response model is built.
+
+    ``?with_counts=true`` adds the number of books of each author and how many are
+    currently lent, aggregated by the database (``Author.get_authors_counts_rows``).
+    """
+
+    def load() -> CachedRead:
+        # Fetch one extra row to know if there's a next page
+        if with_counts:
+            rows = Author.get_authors_counts_rows(
+                session,
+                now=now,
+                after_id=pagination.after,
+                limit=pagination.limit + 1,
+            )
+        else:
+            rows = Author.get_authors_rows(
+                session, after_id=pagination.after, limit=pagination.limit + 1
+            )
+
+        page, next_cursor = pagination.paginate(rows, lambda row: row.id)
+
+        if with_counts:
+            return CachedRead(
+                make_etag(next_cursor, *(tuple(row) for row in page)),
+                lambda: AUTHOR_COUNTS_PAGE_ADAPTER.dump_json(
+                    {
+                        "items": AUTHOR_COUNTS_FIELDS.dump_all(page),
+                        "next": next_cursor,
+                    }
+                ),
+                # Counts change with any book or lending of the authors
+                tags=[
+                    "authors",
+                    "authors:counts",
+                    *(f"author:{row.id}" for row in page),
+                ],
+            )
 
-    return [AuthorDumpSchema.model_validate(author) for author in authors]
+        return CachedRead(
+            make_etag(next_cursor, *((row.id, row.version) for row in page)),
+            lambda: AUTHOR_PAGE_ADAPTER.dump_json(
+                {
+                    "items": AUTHOR_FIELDS.dump_all(page),
+                    "next": next_cursor,
+                }
+            ),
+            tags=["authors", *(f"author:{row.id}" for row in page)],
+        )
+
+    read = catalog_cache.read_through(
+        f"authors:{with_counts}:{pagination.after}:{pagination.limit}", load
+    )
+    conditional.check_etag(read.etag)
+
+    return conditional.json_response(read.body)
 
 
 @router.post("/", status_code=int(HTTPStatus.CREATED))
@@ -41,17 +128,132 @@ def create_author(
     return AuthorDumpSchema.model_validate(author)
 
 
-@router.get("/{author_id}", status_code=int(HTTPStatus.OK))
+@router.post("/bulk-delete", status_code=int(HTTPStatus.OK))
+def delete_authors(
+    author_ids: list[int],
+    session: Annotated[Session, Depends(main.database_connection)],
+) -> BulkDeletedSchema:
+    """Deletes up to ``config.BULK_DELETE_MAX_SIZE`` authors in a single transaction,
+    like ``POST /books/bulk-delete``. Authors with books can't be deleted."""
+    if len(author_ids) > config.BULK_DELETE_MAX_SIZE:
+        raise HTTPException(
+            status_code=HTTPStatus.REQUEST_ENTITY_TOO_LARGE,
+            detail=f"At most {config.BULK_DELETE_MAX_SIZE} authors per request",
+        )
+
+    try:
+        deleted_ids = Author.bulk_delete(
+            author_ids, session, batch_size=config.BULK_DELETE_BATCH_SIZE
+        )
+        session.commit()
+    except IntegrityError:
+        # Referenced by books
+        session.rollback()
+        raise HTTPException(
+            status_code=HTTPStatus.CONFLICT,
+            detail="Authors with books can't be deleted",
+        )
+
+    # Deleted with bulk statements, the ORM doesn't see them
+    catalog_cache.invalidate(*(f"author:{author_id}" for author_id in deleted_ids))
+
+    deleted = set(deleted_ids)
+
+    return BulkDeletedSchema(
+        deleted=deleted_ids,
+        not_found=[
+            author_id
+            for author_id in dict.fromkeys(author_ids)
+            if author_id not in deleted
+        ],
+    )
+
+
+@router.get("/export", status_code=int(HTTPStatus.OK))
+def export_authors(
+    export_format: Annotated[ExportFormat, Query(alias="format")] = (
+        ExportFormat.NDJSON
+    ),
+) -> StreamingResponse:
+    """Every author, streamed as they're read from the database."""
+    return export_response(
+        lambda session: Author.stream_rows(
+            session, batch_size=config.EXPORT_BATCH_SIZE
+        ),
+        AUTHOR_FIELDS.dump_all,
+        AUTHOR_ROW_ADAPTER,
+        export_format,
+    )
+
+
+@router.get(
+    "/{author_id}",
+    status_code=int(HTTPStatus.OK),
+    response_model=AuthorDumpSchema,
+)
 def get_author(
     author_id: int,
     session: Annotated[Session, Depends(main.database_connection)],
-) -> AuthorDumpSchema:
-    author = Author.get(author_id, session)
+    conditional: Annotated[ConditionalRequest, Depends()],
+) -> Response:
+    def load() -> CachedRead:
+        author = Author.get(author_id, session)
 
-    if not author:
-        raise HTTPException(status_code=HTTPStatus.NOT_FOUND)
+        if not author:
+            raise HTTPException(status_code=HTTPStatus.NOT_FOUND)
 
-    return AuthorDumpSchema.model_validate(author)
+        return CachedRead(
+            make_etag(author.id, author.version),
+            lambda: AuthorDumpSchema.model_validate(author).model_dump_json().encode(),
+            tags=[f"author:{author.id}"],
+        )
+
+    read = catalog_cache.read_through(f"author:{author_id}", load)
+
+    conditional.check_etag(read.etag)
+
+    return conditional.json_response(read.body)
+
+
+@router.get(
+    "/{author_id}/books",
+    status_code=int(HTTPStatus.OK),
+    response_model=PageSchema[BookDumpSchema],
+)
+def get_author_books(
+    author_id: int,
+    session: Annotated[Session, Depends(main.database_connection)],
+    pagination: Annotated[Pagination, Depends()],
+    now: Annotated[datetime, Depends(main.current_time)],
+    conditional: Annotated[ConditionalRequest, Depends()],
+    selection: Annotated[FieldSelection, Depends(SparseFields(BookDumpSchema))],
+) -> Response:
+    """Books of an author, paginated like ``GET /books/`` through
+    ``ix_book_author_id_id``: the page, along with the availability of its books, is
+    read in a single query. ``Author.books`` is never loaded."""
+
+    def load() -> CachedRead:
+        if not Author.exists(author_id, session):
+            raise HTTPException(status_code=HTTPStatus.NOT_FOUND)
+
+        return load_books_page(
+            session,
+            pagination,
+            now,
+            selection,
+            [Book.author_id == author_id],
+            # Books moved to or from the author are only seen as book writes
+            tags=["books:filtered", f"author:{author_id}"],
+        )
+
+    read = catalog_cache.read_through(
+        f"author:{author_id}:books:{pagination.after}:{pagination.limit}:"
+        f"{selection.key}",
+        load,
+    )
+    conditional.check_etag(read.etag)
+
+    return conditional.json_response(read.body)
 
 
 @router.put("/{author_id}", status_code=int(HTTPStatus.OK))
@@ -69,21 +271,65 @@ def update_author(
         setattr(author, attr, getattr(author_payload, attr))
 
     session.add(author)
-    session.commit()
+
+    try:
+        session.commit()
+    except StaleDataError:
+        # Updated concurrently, the version is checked by the ORM
+        session.rollback()
+        raise HTTPException(status_code=HTTPStatus.CONFLICT)
 
     return AuthorDumpSchema.model_validate(author)
 
 
+@router.patch("/{author_id}", status_code=int(HTTPStatus.OK))
+def patch_author(
+    author_id: int,
+    author_payload: AuthorPatchSchema,
+    session: Annotated[Session, Depends(main.database_connection)],
+) -> AuthorDumpSchema:
+    """Updates the fields sent, and only them, with a single ``UPDATE ...
+    RETURNING`` (``Author.patch``)."""
+    changes = author_payload.model_dump(exclude_unset=True)
+
+    row = Author.patch(author_id, changes, session)
+
+    if row is None:
+        session.rollback()
+        raise HTTPException(status_code=HTTPStatus.NOT_FOUND)
+
+    session.commit()
+
+    if changes:
+        # Updated with a bulk statement, the ORM doesn't see it
+        catalog_cache.invalidate(f"author:{author_id}")
+
+    return AuthorDumpSchema.model_validate(row)
+
+
 @router.delete("/{author_id}", status_code=int(HTTPStatus.NO_CONTENT))
 def delete_author(
     author_id: int,
     session: Annotated[Session, Depends(main.database_connection)],
 ) -> None:
-    author_deleted = Author.delete(author_id, session)
+    try:
+        author_deleted = Author.delete(author_id, session)
+
+        if author_deleted:
+            session.commit()
+    except IntegrityError:
+        # Referenced by books
+        session.rollback()
+        raise HTTPException(
+            status_code=HTTPStatus.CONFLICT,
+            detail="Authors with books can't be deleted",
+        )
 
     if not author_deleted:
+        session.rollback()
         raise HTTPException(status_code=HTTPStatus.BAD_REQUEST)
 
-    session.commit()
+    # Deleted with a bulk statement, the ORM doesn't see it
+    catalog_cache.invalidate(f"author:{author_id}")
 
     return
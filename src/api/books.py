@@ -1,12 +1,42 @@
+import io
+import logging
+from datetime import datetime
 from http import HTTPStatus
-from typing import Annotated
+from typing import Annotated, Any, Iterable, Sequence
 
-from fastapi import APIRouter, Depends, HTTPException
+from fastapi import APIRouter, Depends, HTTPException, Query, Response, UploadFile
+from fastapi.responses import StreamingResponse
+from sqlalchemy import ColumnExpressionArgument, Row
+from sqlalchemy.exc import IntegrityError
 from sqlalchemy.orm import Session
+from sqlalchemy.orm.exc import StaleDataError
 
-from src.api import main
-from src.database.models import Book
-from src.schemas.books import BookDumpSchema, BookSchema
+from src.api import config, main
+from src.api.cache import CachedRead, book_tags, catalog_cache
+from src.api.conditional import ConditionalRequest, make_etag
+from src.api.export import ExportFormat, export_response
+from src.api.fields import FieldSelection, SparseFields
+from src.api.pagination import Pagination
+from src.database import search
+from src.database.catalog import READERS, CatalogImport, import_catalog
+from src.database.models import Author, Book, Lending
+from src.schemas.books import (
+    BOOK_PAGE_ADAPTER,
+    BOOK_ROW_ADAPTER,
+    AuthorDumpSchema,
+    BookAvailabilitySchema,
+    BookBulkCreatedSchema,
+    BookBulkErrorSchema,
+    BookDumpSchema,
+    BookPatchSchema,
+    BookSchema,
+    BulkDeletedSchema,
+    FreePeriodSchema,
+)
+from src.schemas.catalog import CatalogImportSchema
+from src.schemas.pagination import PageSchema
+
+logger = logging.getLogger(__name__)
 
 router = APIRouter(
     prefix="/books",
@@ -17,9 +47,64 @@ router = APIRouter(
     dependencies=[
         Depends(main.database_connection),
     ],
+    route_class=main.DatabaseRoute,
 )
 
 
+BOOK_FIELDS = FieldSelection.everything(BookDumpSchema)
+
+
+def book_version(book: Book | Row[Any], selection: FieldSelection) -> tuple[Any, ...]:
+    """What the representation of a book (``selection`` of ``BookDumpSchema``)
+    depends on, for its ETag: availability changes with the lendings, not with the
+    book version."""
+    version: tuple[Any, ...] = (book.id, book.version)
+
+    if "author" in selection:
+        version += (book.author.id, book.author.version)
+
+    if "available" in selection:
+        version += (book.available,)
+
+    return version
+
+
+def load_books_page(
+    session: Session,
+    pagination: Pagination,
+    now: datetime,
+    selection: FieldSelection,
+    filters: Sequence[ColumnExpressionArgument[bool]] = (),
+    tags: Iterable[str] = (),
+) -> CachedRead:
+    """Page of the books falling under ``filters``, read as plain rows in a single
+    query (author & availability included when selected), tagged with ``tags`` along
+    with the tags of its books."""
+    # Fetch one extra row to know if there's a next page
+    rows = Book.get_all_rows(
+        session,
+        after_id=pagination.after,
+        limit=pagination.limit + 1,
+        now=now if "available" in selection else None,
+        with_author="author" in selection,
+        filters=filters,
+    )
+
+    page, next_cursor = pagination.paginate(rows, lambda row: row.id)
+
+    return CachedRead(
+        make_etag(
+            selection.key,
+            next_cursor,
+            *(book_version(row, selection) for row in page),
+        ),
+        lambda: BOOK_PAGE_ADAPTER.dump_json(
+            {"items": selection.dump_all(page), "next": next_cursor}
+        ),
+        tags=[*tags, *(tag for row in page for tag in book_tags(row))],
+    )
+
+
 @router.post("/", status_code=int(HTTPStatus.CREATED))
 def create_book(
     book: BookSchema,
@@ -27,31 +112,368 @@ def create_book(
 ) -> BookDumpSchema:
     db_object: Book = Book.create(book, session)
 
-    session.commit()
+    try:
+        session.commit()
+    except IntegrityError:
+        session.rollback()
+        raise HTTPException(
+            status_code=HTTPStatus.CONFLICT, detail=f"ISBN {book.isbn} already exists"
+        )
 
     return BookDumpSchema.model_validate(db_object, from_attributes=True)
 
 
-@router.get("/", status_code=int(HTTPStatus.OK))
+@router.post("/bulk", status_code=int(HTTPStatus.CREATED))
+def create_books(
+    books: list[BookSchema],
+    session: Annotated[Session, Depends(main.database_connection)],
+) -> BookBulkCreatedSchema:
+    """Creates up to ``config.BOOKS_BULK_MAX_SIZE`` books in a single transaction.
+
+    Either every book is created or none: books referencing unknown authors or
+    taking an ISBN that already exists (or appears earlier in the payload) are
+    reported with their position in the payload.
+    """
+    if len(books) > config.BOOKS_BULK_MAX_SIZE:
+        raise HTTPException(
+            status_code=HTTPStatus.REQUEST_ENTITY_TOO_LARGE,
+            detail=f"At most {config.BOOKS_BULK_MAX_SIZE} books per request",
+        )
+
+    author_ids = Author.existing_ids((book.author_id for book in books), session)
+    taken_isbns = Book.existing_isbns(
+        (book.isbn for book in books if book.isbn is not None), session
+    )
+
+    errors: list[BookBulkErrorSchema] = []
+    first_indexes: dict[str, int] = {}
+
+    for index, book in enumerate(books):
+        if book.author_id not in author_ids:
+            errors.append(
+                BookBulkErrorSchema(
+                    index=index, detail=f"Unknown author {book.author_id}"
+                )
+            )
+
+        if book.isbn is None:
+            continue
+
+        if book.isbn in taken_isbns:
+            errors.append(
+                BookBulkErrorSchema(
+                    index=index, detail=f"ISBN {book.isbn} already exists"
+                )
+            )
+        elif book.isbn in first_indexes:
+            first_index = first_indexes[book.isbn]
+            errors.append(
+                BookBulkErrorSchema(
+                    index=index,
+                    detail=f"ISBN {book.isbn} already used by book {first_index}",
+                )
+            )
+        else:
+            first_indexes[book.isbn] = index
+
+    if errors:
+        raise HTTPException(
+            status_code=HTTPStatus.UNPROCESSABLE_ENTITY,
+            detail={"errors": [error.model_dump() for error in errors]},
+        )
+
+    try:
+        ids = Book.bulk_create(books, session, batch_size=config.BOOKS_BULK_BATCH_SIZE)
+        session.commit()
+    except IntegrityError:
+        # ISBN taken by a book created meanwhile
+        session.rollback()
+        raise HTTPException(
+            status_code=HTTPStatus.CONFLICT, detail="ISBN already exists"
+        )
+
+    # Inserted with bulk statements, the ORM doesn't see them
+    catalog_cache.invalidate("books", "books:filtered", "authors:counts")
+
+    return BookBulkCreatedSchema(ids=ids)
+
+
+@router.post("/bulk-delete", status_code=int(HTTPStatus.OK))
+def delete_books(
+    book_ids: list[int],
+    session: Annotated[Session, Depends(main.database_connection)],
+) -> BulkDeletedSchema:
+    """Deletes up to ``config.BULK_DELETE_MAX_SIZE`` books in a single transaction,
+    with ``DELETE ... RETURNING`` statements of ``config.BULK_DELETE_BATCH_SIZE`` ids.
+
+    Unknown ids are reported, they don't fail the request. Either every book is
+    deleted or none: books with lendings can't be deleted.
+    """
+    if len(book_ids) > config.BULK_DELETE_MAX_SIZE:
+        raise HTTPException(
+            status_code=HTTPStatus.REQUEST_ENTITY_TOO_LARGE,
+            detail=f"At most {config.BULK_DELETE_MAX_SIZE} books per request",
+        )
+
+    try:
+        deleted_ids = Book.bulk_delete(
+            book_ids, session, batch_size=config.BULK_DELETE_BATCH_SIZE
+        )
+        session.commit()
+    except IntegrityError:
+        # Referenced by lendings
+        session.rollback()
+        raise HTTPException(
+            status_code=HTTPStatus.CONFLICT,
+            detail="Books with lendings can't be deleted",
+        )
+
+    # Deleted with bulk statements, the ORM doesn't see them
+    catalog_cache.invalidate(
+        *(f"book:{book_id}" for book_id in deleted_ids), "authors:counts"
+    )
+
+    deleted = set(deleted_ids)
+
+    return BulkDeletedSchema(
+        deleted=deleted_ids,
+        not_found=[
+            book_id for book_id in dict.fromkeys(book_ids) if book_id not in deleted
+        ],
+    )
+
+
+@router.post("/import", status_code=int(HTTPStatus.OK))
+async def import_books(
+    file: UploadFile,
+    session: Annotated[Session, Depends(main.database_connection)],
+    file_format: Annotated[str | None, Query(alias="format")] = None,
+) -> CatalogImportSchema:
+    """Imports (creates or updates) the authors & books of a CSV or NDJSON catalog, see
+    ``CatalogImport``. The format defaults to the extension of the file.
+
+    The upload is spooled to disk by Starlette and parsed line by line on the
+    threadpool (``main.run_with_session``), records are written in batches of
+    ``config.CATALOG_IMPORT_BATCH_SIZE``.
+    """
+    if file_format is None and file.filename:
+        file_format = file.filename.rsplit(".", 1)[-1].lower()
+
+    if file_format not in READERS:
+        raise HTTPException(
+            status_code=HTTPStatus.UNSUPPORTED_MEDIA_TYPE,
+            detail=f"Supported formats: {', '.join(READERS)}",
+        )
+
+    def log_progress(catalog_import: CatalogImport) -> None:
+        logger.info(
+            "Catalog import of %s: %d records", file.filename, catalog_import.records
+        )
+
+    lines = io.TextIOWrapper(file.file, encoding="utf-8", newline="")
+
+    try:
+        catalog_import = await main.run_with_session(
+            session, import_catalog, lines, file_format, on_progress=log_progress
+        )
+    except UnicodeDecodeError:
+        # Batches written before the error are kept, importing again is idempotent
+        raise HTTPException(
+            status_code=HTTPStatus.BAD_REQUEST,
+            detail="Catalogs must be encoded in UTF-8",
+        )
+    finally:
+        # The upload is closed by Starlette
+        lines.detach()
+
+        # Written with bulk statements, the ORM doesn't see them
+        catalog_cache.clear()
+
+    return CatalogImportSchema(**catalog_import.statistics())
+
+
+@router.get(
+    "/",
+    status_code=int(HTTPStatus.OK),
+    response_model=PageSchema[BookDumpSchema],
+)
 def get_books(
     session: Annotated[Session, Depends(main.database_connection)],
-) -> list[BookDumpSchema]:
-    books: list[Book] = Book.get_all(session)
+    pagination: Annotated[Pagination, Depends()],
+    now: Annotated[datetime, Depends(main.current_time)],
+    conditional: Annotated[ConditionalRequest, Depends()],
+    selection: Annotated[FieldSelection, Depends(SparseFields(BookDumpSchema))],
+    isbn: Annotated[str | None, Query(max_length=13)] = None,
+    author_id: int | None = None,
+) -> Response:
+    """Books are read as plain rows (``Book.rows_query``) and serialized straight to
+    JSON, no ORM instance nor response model is built. The author is only joined and
+    the availability only computed when they're selected (``?fields=``,
+    ``?expand=``).
+
+    ``?isbn=`` & ``?author_id=`` filter the books, through the indexes on these
+    columns.
+    """
+    filters: list[ColumnExpressionArgument[bool]] = []
+
+    if isbn is not None:
+        filters.append(Book.isbn == isbn)
+
+    if author_id is not None:
+        filters.append(Book.author_id == author_id)
+
+    read = catalog_cache.read_through(
+        f"books:{isbn}:{author_id}:{pagination.after}:{pagination.limit}:"
+        f"{selection.key}",
+        lambda: load_books_page(
+            session,
+            pagination,
+            now,
+            selection,
+            filters,
+            tags=["books:filtered" if filters else "books"],
+        ),
+    )
+    conditional.check_etag(read.etag)
+
+    return conditional.json_response(read.body)
+
+
+@router.get(
+    "/search",
+    status_code=int(HTTPStatus.OK),
+    response_model=PageSchema[BookDumpSchema],
+)
+def search_books(
+    q: Annotated[str, Query(min_length=1)],
+    session: Annotated[Session, Depends(main.database_connection)],
+    pagination: Annotated[Pagination, Depends()],
+    now: Annotated[datetime, Depends(main.current_time)],
+    selection: Annotated[FieldSelection, Depends(SparseFields(BookDumpSchema))],
+) -> Response:
+    """Books whose title or author name match every word of ``q`` (as prefixes), best
+    matches first, through the full-text search index (``src.database.search``).
+
+    Results are ranked instead of ordered by id: the cursor holds the number of
+    results already sent.
+    """
+    if not search.is_supported(session.get_bind()):
+        raise HTTPException(
+            status_code=HTTPStatus.NOT_IMPLEMENTED,
+            detail="Search isn't supported by this database",
+        )
+
+    terms = search.search_terms(q)
+
+    if not terms:
+        raise HTTPException(
+            status_code=HTTPStatus.BAD_REQUEST,
+            detail="Search for at least one word",
+        )
+
+    offset = pagination.after or 0
+
+    if offset < 0:
+        raise HTTPException(status_code=HTTPStatus.BAD_REQUEST, detail="Invalid cursor")
 
-    return [BookDumpSchema.model_validate(book) for book in books]
+    # Fetch one extra row to know if there's a next page
+    rows = Book.search_rows(
+        terms,
+        session,
+        offset=offset,
+        limit=pagination.limit + 1,
+        now=now if "available" in selection else None,
+        with_author="author" in selection,
+    )
 
+    page, next_cursor = pagination.paginate(rows, lambda _: offset + pagination.limit)
 
-@router.get("/{book_id}", status_code=int(HTTPStatus.OK))
+    return Response(
+        BOOK_PAGE_ADAPTER.dump_json(
+            {"items": selection.dump_all(page), "next": next_cursor}
+        ),
+        media_type="application/json",
+    )
+
+
+@router.get("/export", status_code=int(HTTPStatus.OK))
+def export_books(
+    now: Annotated[datetime, Depends(main.current_time)],
+    export_format: Annotated[ExportFormat, Query(alias="format")] = (
+        ExportFormat.NDJSON
+    ),
+) -> StreamingResponse:
+    """The whole catalog, streamed as it's read from the database."""
+    return export_response(
+        lambda session: Book.stream_rows(
+            session, batch_size=config.EXPORT_BATCH_SIZE, now=now
+        ),
+        BOOK_FIELDS.dump_all,
+        BOOK_ROW_ADAPTER,
+        export_format,
+    )
+
+
+@router.get(
+    "/{book_id}",
+    status_code=int(HTTPStatus.OK),
+    response_model=BookDumpSchema,
+)
 def get_book(
     book_id: int,
     session: Annotated[Session, Depends(main.database_connection)],
-) -> BookDumpSchema:
-    book: Book | None = Book.get(book_id, session)
+    now: Annotated[datetime, Depends(main.current_time)],
+    conditional: Annotated[ConditionalRequest, Depends()],
+    selection: Annotated[FieldSelection, Depends(SparseFields(BookDumpSchema))],
+) -> Response:
+    def load() -> CachedRead:
+        book: Book | None = Book.get(
+            book_id,
+            session,
+            now=now if "available" in selection else None,
+            with_author="author" in selection,
+        )
 
-    if not book:
+        if not book:
+            raise HTTPException(status_code=HTTPStatus.NOT_FOUND)
+
+        return CachedRead(
+            make_etag(selection.key, book_version(book, selection)),
+            lambda: BOOK_ROW_ADAPTER.dump_json(selection.dump(book)),
+            tags=book_tags(book),
+        )
+
+    read = catalog_cache.read_through(f"book:{book_id}:{selection.key}", load)
+
+    conditional.check_etag(read.etag)
+
+    return conditional.json_response(read.body)
+
+
+@router.get("/{book_id}/availability", status_code=int(HTTPStatus.OK))
+def get_book_availability(
+    book_id: int,
+    window_start: Annotated[datetime, Query(alias="from")],
+    window_end: Annotated[datetime, Query(alias="to")],
+    session: Annotated[Session, Depends(main.database_connection)],
+) -> BookAvailabilitySchema:
+    """Free periods of the book between ``from`` and ``to``, a lending can be
+    reserved within any of them."""
+    if window_end <= window_start:
+        raise HTTPException(status_code=HTTPStatus.BAD_REQUEST)
+
+    if not Book.exists(book_id, session):
         raise HTTPException(status_code=HTTPStatus.NOT_FOUND)
 
-    return BookDumpSchema.model_validate(book)
+    return BookAvailabilitySchema(
+        book_id=book_id,
+        free_periods=[
+            FreePeriodSchema(start_time=start_time, end_time=end_time)
+            for start_time, end_time in Lending.free_periods(
+                book_id, window_start, window_end, session
+            )
+        ],
+    )
 
 
 @router.put("/{book_id}", status_code=int(HTTPStatus.OK))
@@ -69,19 +491,98 @@ def update_book(
         setattr(book, attr, getattr(payload, attr))
 
     session.add(book)
-    session.commit()
+
+    try:
+        session.commit()
+    except StaleDataError:
+        # Updated concurrently, the version is checked by the ORM
+        session.rollback()
+        raise HTTPException(status_code=HTTPStatus.CONFLICT)
+    except IntegrityError:
+        session.rollback()
+        raise HTTPException(
+            status_code=HTTPStatus.CONFLICT,
+            detail=f"ISBN {payload.isbn} already exists",
+        )
 
     return BookDumpSchema.model_validate(book)
 
 
+@router.patch("/{book_id}", status_code=int(HTTPStatus.OK))
+def patch_book(
+    book_id: int,
+    payload: BookPatchSchema,
+    session: Annotated[Session, Depends(main.database_connection)],
+    now: Annotated[datetime, Depends(main.current_time)],
+) -> BookDumpSchema:
+    """Updates the fields sent, and only them, with a single ``UPDATE ... RETURNING``
+    that also reads the author & availability of the response (``Book.patch``)."""
+    changes = payload.model_dump(exclude_unset=True)
+
+    try:
+        row = Book.patch(book_id, changes, session, now)
+    except IntegrityError:
+        session.rollback()
+        raise HTTPException(
+            status_code=HTTPStatus.CONFLICT,
+            detail=f"ISBN {payload.isbn} already exists",
+        )
+
+    if row is None:
+        # Nothing was written, tells why
+        session.rollback()
+
+        if Book.exists(book_id, session):
+            raise HTTPException(
+                status_code=HTTPStatus.UNPROCESSABLE_ENTITY,
+                detail=f"Unknown author {payload.author_id}",
+            )
+
+        raise HTTPException(status_code=HTTPStatus.NOT_FOUND)
+
+    session.commit()
+
+    if changes:
+        # Updated with a bulk statement, the ORM doesn't see it
+        catalog_cache.invalidate(f"book:{book_id}", "books:filtered", "authors:counts")
+
+    return BookDumpSchema(
+        title=row.title,
+        author_id=row.author_id,
+        isbn=row.isbn,
+        id=row.id,
+        author=AuthorDumpSchema(
+            first_name=row.author_first_name,
+            last_name=row.author_last_name,
+            id=row.author_id,
+        ),
+        available=row.available,
+    )
+
+
 @router.delete("/{book_id}", status_code=int(HTTPStatus.NO_CONTENT))
 def delete_book(
     book_id: int,
     session: Annotated[Session, Depends(main.database_connection)],
 ) -> None:
-    book_deleted: bool = Book.delete(book_id, session)
+    try:
+        book_deleted: bool = Book.delete(book_id, session)
+
+        if book_deleted:
+            session.commit()
+    except IntegrityError:
+        # Referenced by lendings
+        session.rollback()
+        raise HTTPException(
+            status_code=HTTPStatus.CONFLICT,
+            detail="Books with lendings can't be deleted",
+        )
 
     if not book_deleted:
+        session.rollback()
         raise HTTPException(status_code=HTTPStatus.NOT_FOUND)
 
+    # Deleted with a bulk statement, the ORM doesn't see it
+    catalog_cache.invalidate(f"book:{book_id}", "authors:counts")
+
     return
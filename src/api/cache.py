@@ -0,0 +1,351 @@
+import functools
+import time
+from abc import ABC, abstractmethod
+from collections import OrderedDict
+from threading import Lock
+from typing import Any, Callable, Iterable
+
+from sqlalchemy import Row, event, inspect
+from sqlalchemy.orm import Session
+
+from src.api import config
+from src.database.models import Author, Book, Lending
+
+# Key of the cache tags of the rows flushed by a session, invalidated once committed
+PENDING_TAGS = "response_cache_tags"
+
+
+class CacheBackend(ABC):
+    """Storage of the response cache: serialized responses, by key, associated with
+    tags used to invalidate them."""
+
+    @abstractmethod
+    def get(self, key: str) -> bytes | None: ...
+
+    @abstractmethod
+    def set(self, key: str, value: bytes, tags: Iterable[str], ttl: float) -> None: ...
+
+    @abstractmethod
+    def invalidate(self, tags: Iterable[str]) -> None: ...
+
+    @abstractmethod
+    def clear(self) -> None:
+        """Drops every entry, the statistics are kept."""
+
+    @abstractmethod
+    def statistics(self) -> dict[str, Any]: ...
+
+
+class MemoryCacheBackend(CacheBackend):
+    """In-process backend, bounded by the total size of the stored responses: least
+    recently used entries are evicted once ``max_size`` bytes are reached."""
+
+    def __init__(self, max_size: int) -> None:
+        self.max_size = max_size
+
+        self._lock = Lock()
+        self._entries: OrderedDict[str, tuple[float, bytes, frozenset[str]]] = (
+            OrderedDict()
+        )
+        self._tags: dict[str, set[str]] = {}
+        self.size = 0
+        self.evictions = 0
+
+    def _delete(self, key: str) -> None:
+        _, value, tags = self._entries.pop(key)
+        self.size -= len(value)
+
+        for tag in tags:
+            keys = self._tags.get(tag)
+
+            if keys is not None:
+                keys.discard(key)
+                if not keys:
+                    del self._tags[tag]
+
+    def get(self, key: str) -> bytes | None:
+        with self._lock:
+            entry = self._entries.get(key)
+
+            if entry is None:
+                return None
+
+            if entry[0] < time.monotonic():
+                self._delete(key)
+                return None
+
+            self._entries.move_to_end(key)
+
+            return entry[1]
+
+    def set(self, key: str, value: bytes, tags: Iterable[str], ttl: float) -> None:
+        if len(value) > self.max_size:
+            return
+
+        with self._lock:
+            if key in self._entries:
+                self._delete(key)
+
+            entry_tags = frozenset(tags)
+            self._entries[key] = (time.monotonic() + ttl, value, entry_tags)
+            self.size += len(value)
+
+            for tag in entry_tags:
+                self._tags.setdefault(tag, set()).add(key)
+
+            while self.size > self.max_size:
+                self._delete(next(iter(self._entries)))
+                self.evictions += 1
+
+    def invalidate(self, tags: Iterable[str]) -> None:
+        with self._lock:
+            for tag in tags:
+                for key in list(self._tags.get(tag, ())):
+                    self._delete(key)
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
+            self._tags.clear()
+            self.size = 0
+
+    def statistics(self) -> dict[str, Any]:
+        with self._lock:
+            return {
+                "entries": len(self._entries),
+                "size": self.size,
+                "max_size": self.max_size,
+                "evictions": self.evictions,
+            }
+
+
+class RedisCacheBackend(CacheBackend):
+    """Backend shared by every API process, requires the ``redis`` package (``redis``
+    extra).
+
+    Each tag is a set of the keys it's attached to. Eviction is left to Redis
+    (``maxmemory`` & ``maxmemory-policy``), it isn't reported in the statistics.
+    """
+
+    def __init__(self, url: str, prefix: str = "catalog:") -> None:
+        # Optional dependency
+        import redis
+
+        self.client = redis.Redis.from_url(url)
+        self.prefix = prefix
+
+    def get(self, key: str) -> bytes | None:
+        value: bytes | None = self.client.get(self.prefix + key)
+
+        return value
+
+    def set(self, key: str, value: bytes, tags: Iterable[str], ttl: float) -> None:
+        pipeline = self.client.pipeline()
+        pipeline.set(self.prefix + key, value, px=int(ttl * 1000))
+
+        for tag in tags:
+            tag_key = f"{self.prefix}tag:{tag}"
+            pipeline.sadd(tag_key, key)
+            pipeline.pexpire(tag_key, int(ttl * 1000))
+
+        pipeline.execute()
+
+    def invalidate(self, tags: Iterable[str]) -> None:
+        for tag in tags:
+            tag_key = f"{self.prefix}tag:{tag}"
+            keys = [self.prefix + key.decode() for key in self.client.smembers(tag_key)]
+            self.client.delete(tag_key, *keys)
+
+    def clear(self) -> None:
+        keys = list(self.client.scan_iter(match=f"{self.prefix}*"))
+
+        if keys:
+            self.client.delete(*keys)
+
+    def statistics(self) -> dict[str, Any]:
+        return {"entries": None, "size": None, "max_size": None, "evictions": None}
+
+
+class CachedRead:
+    """JSON body of a catalog read along with its ETag, the body is only rendered when
+    ``body`` is accessed (never for a 304)."""
+
+    def __init__(
+        self,
+        etag: str,
+        render: Callable[[], bytes],
+        tags: Iterable[str] = (),
+    ) -> None:
+        self.etag = etag
+        self.tags = tags
+        self._render = render
+
+    @functools.cached_property
+    def body(self) -> bytes:
+        return self._render()
+
+
+class ResponseCache:
+    """Read-through cache of the catalog reads.
+
+    Entries are tagged with the rows they're built from (``book:<id>``,
+    ``author:<id>``) and, for the lists, with the list itself (``books``, ``authors``)
+    which is invalidated when rows are added. Filtered lists (``books:filtered``) are
+    invalidated by any book write, the book may have entered or left them, authors
+    with their counts (``authors:counts``) by any book or lending write. Tags of the
+    rows changed through the ORM are invalidated on commit (see the session listeners
+    below), code issuing bulk statements must call ``invalidate`` (or ``clear``).
+
+    Availability changes with time too: a lending starting or ending without any write
+    is only seen once the entries expire, after ``ttl`` seconds.
+    """
+
+    def __init__(self, backend: CacheBackend | None, ttl: float) -> None:
+        self.backend = backend
+        self.ttl = ttl
+
+        self._lock = Lock()
+        # Bumped by every invalidation: a response loaded while rows were being
+        # invalidated may already be stale, it isn't stored.
+        self._generation = 0
+        self.hits = 0
+        self.misses = 0
+
+    @property
+    def enabled(self) -> bool:
+        return self.backend is not None and self.ttl > 0
+
+    def read_through(self, key: str, load: Callable[[], CachedRead]) -> CachedRead:
+        """Cached read of ``key``, loaded with ``load`` then stored on misses. Errors
+        raised by ``load`` (404...) aren't cached."""
+        if self.backend is None or not self.enabled:
+            return load()
+
+        cached = self.backend.get(key)
+
+        with self._lock:
+            if cached is None:
+                self.misses += 1
+            else:
+                self.hits += 1
+
+            generation = self._generation
+
+        if cached is not None:
+            etag, body = cached.split(b"\n", 1)
+
+            return CachedRead(etag.decode(), lambda: body)
+
+        read = load()
+
+        if generation == self._generation:
+            self.backend.set(
+                key, read.etag.encode() + b"\n" + read.body, read.tags, self.ttl
+            )
+
+        return read
+
+    def invalidate(self, *tags: str) -> None:
+        if self.backend is None or not tags:
+            return
+
+        with self._lock:
+            self._generation += 1
+
+        self.backend.invalidate(tags)
+
+    def clear(self) -> None:
+        """Drops every entry, the hit & miss counters are kept."""
+        if self.backend is not None:
+            self.backend.clear()
+
+        with self._lock:
+            self._generation += 1
+
+    def reset_statistics(self) -> None:
+        with self._lock:
+            self.hits = 0
+            self.misses = 0
+
+    def statistics(self) -> dict[str, Any]:
+        with self._lock:
+            lookups = self.hits + self.misses
+
+            statistics = {
+                "enabled": self.enabled,
+                "backend": type(self.backend).__name__ if self.backend else None,
+                "ttl": self.ttl,
+                "hits": self.hits,
+                "misses": self.misses,
+                "hit_ratio": self.hits / lookups if lookups else 0.0,
+            }
+
+        backend_statistics = (
+            self.backend.statistics()
+            if self.backend is not None
+            else {"entries": None, "size": None, "max_size": None, "evictions": None}
+        )
+
+        return statistics | backend_statistics
+
+
+def create_backend() -> CacheBackend | None:
+    if config.RESPONSE_CACHE_BACKEND == "memory":
+        return MemoryCacheBackend(max_size=config.RESPONSE_CACHE_MAX_SIZE)
+
+    if config.RESPONSE_CACHE_BACKEND == "redis":
+        return RedisCacheBackend(config.RESPONSE_CACHE_URL)
+
+    return None
+
+
+catalog_cache = ResponseCache(
+    backend=create_backend(),
+    ttl=config.RESPONSE_CACHE_TTL,
+)
+
+
+def book_tags(book: Book | Row[Any]) -> list[str]:
+    """Tags of the entries including ``book`` (or a row of ``Book.rows_query``), along
+    with its author."""
+    return [f"book:{book.id}", f"author:{book.author_id}"]
+
+
+@event.listens_for(Session, "after_flush")
+def record_invalidated_tags(session: Session, flush_context: Any) -> None:
+    if not catalog_cache.enabled:
+        return
+
+    tags: set[str] = session.info.setdefault(PENDING_TAGS, set())
+
+    for instance in session.new:
+        # Not cached yet, but the lists it belongs to are
+        if isinstance(instance, Book):
+            tags.add("books")
+        elif isinstance(instance, Author):
+            tags.add("authors")
+
+    for instance in (*session.new, *session.dirty, *session.deleted):
+        if isinstance(instance, Book):
+            # Filtered lists may gain or lose the book, counts of its author(s) change
+            tags.update((f"book:{instance.id}", "books:filtered", "authors:counts"))
+        elif isinstance(instance, Author):
+            tags.add(f"author:{instance.id}")
+        elif isinstance(instance, Lending):
+            # Availability of the lent book(s)
+            book_ids = {
+                instance.book_id,
+                *inspect(instance).attrs.book_id.history.deleted,
+            }
+            tags.update(f"book:{book_id}" for book_id in book_ids)
+            tags.add("authors:counts")
+
+
+@event.listens_for(Session, "after_commit")
+def invalidate_committed_tags(session: Session) -> None:
+    catalog_cache.invalidate(*session.info.pop(PENDING_TAGS, ()))
+
+
+@event.listens_for(Session, "after_rollback")
+def discard_pending_tags(session: Session) -> None:
+    session.info.pop(PENDING_TAGS, None)
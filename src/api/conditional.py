@@ -0,0 +1,75 @@
+import hashlib
+from http import HTTPStatus
+from typing import Annotated, Any
+
+from fastapi import Header, HTTPException, Response
+
+from src.api import config
+
+
+def make_etag(*version_parts: Any) -> str:
+    """Strong ETag of a representation identified by ``version_parts`` (ids & versions
+    of the rows it's built from, computed fields...)."""
+    digest = hashlib.sha1(repr(version_parts).encode(), usedforsecurity=False)
+
+    return f'"{digest.hexdigest()}"'
+
+
+def etag_matches(if_none_match: str, etag: str) -> bool:
+    """``If-None-Match`` uses the weak comparison: ``W/`` prefixes are ignored."""
+    candidates = {candidate.strip() for candidate in if_none_match.split(",")}
+
+    return "*" in candidates or etag in {
+        candidate.removeprefix("W/") for candidate in candidates
+    }
+
+
+class ConditionalRequest:
+    """Conditional GET support of the catalog endpoints.
+
+    ``check`` is called with the version of the resource once it's been read (or
+    ``check_etag`` with the ETag computed from it), before its response is built: when
+    the client already holds that version (``If-None-Match``) a 304 is sent instead of
+    the body, otherwise the ``ETag`` & ``Cache-Control`` headers are added to the
+    response.
+    """
+
+    def __init__(
+        self,
+        response: Response,
+        if_none_match: Annotated[str | None, Header()] = None,
+    ) -> None:
+        self.response = response
+        self.if_none_match = if_none_match
+
+    @staticmethod
+    def cache_control() -> str:
+        if config.CATALOG_CACHE_MAX_AGE <= 0:
+            # Cached, but revalidated before every use
+            return "public, no-cache"
+
+        return f"public, max-age={config.CATALOG_CACHE_MAX_AGE}, must-revalidate"
+
+    def check(self, *version_parts: Any) -> None:
+        self.check_etag(make_etag(*version_parts))
+
+    def check_etag(self, etag: str) -> None:
+        headers = {
+            "ETag": etag,
+            "Cache-Control": self.cache_control(),
+        }
+
+        if self.if_none_match is not None and etag_matches(
+            self.if_none_match, headers["ETag"]
+        ):
+            raise HTTPException(status_code=HTTPStatus.NOT_MODIFIED, headers=headers)
+
+        self.response.headers.update(headers)
+
+    def json_response(self, body: bytes) -> Response:
+        """Response sending ``body``, already serialized to JSON, as is: returning a
+        ``Response`` skips the validation & serialization by the response model, the
+        headers added by ``check`` are copied."""
+        return Response(
+            body, media_type="application/json", headers=dict(self.response.headers)
+        )
@@ -2,6 +2,23 @@ import os
 
 TESTING = os.environ.get("TESTING", "false") == "true"
 SQLALCHEMY_DATABASE_URI = os.environ.get("SQLALCHEMY_DATABASE_URI", "")
+# Run the database sessions through SQLAlchemy's asyncio extension (asyncpg, aiosqlite)
+SQLALCHEMY_ASYNC = os.environ.get("SQLALCHEMY_ASYNC", "false") == "true"
+
+# Connection pool, defaults are SQLAlchemy's own defaults
+SQLALCHEMY_POOL_SIZE = int(os.environ.get("SQLALCHEMY_POOL_SIZE", 5))
+SQLALCHEMY_MAX_OVERFLOW = int(os.environ.get("SQLALCHEMY_MAX_OVERFLOW", 10))
+# Seconds to wait for a connection before giving up
+SQLALCHEMY_POOL_TIMEOUT = float(os.environ.get("SQLALCHEMY_POOL_TIMEOUT", 30))
+# Connections older than this many seconds are replaced, -1 disables recycling
+SQLALCHEMY_POOL_RECYCLE = int(os.environ.get("SQLALCHEMY_POOL_RECYCLE", -1))
+# Test connections with a round trip when they're checked out of the pool
+SQLALCHEMY_POOL_PRE_PING = os.environ.get("SQLALCHEMY_POOL_PRE_PING", "false") == "true"
+# Connections opened when the API starts, capped by the pool size
+SQLALCHEMY_POOL_PREWARM = int(os.environ.get("SQLALCHEMY_POOL_PREWARM", 0))
+
+# Exposes the ``/internal`` routes (pool statistics, ...)
+INTERNAL_ENDPOINTS = os.environ.get("INTERNAL_ENDPOINTS", "false") == "true"
 APP_TZ = os.environ.get("APP_TZ", "Europe/Paris")
 
 JWT_TOKEN_EXPIRE_TIME = int(os.environ.get("JWT_TOKEN_EXPIRATION_TIME", 60))
@@ -9,3 +26,82 @@ JWT_SECRET_KEY = os.environ.get("JWT_SECRET_KEY", "")
 
 # Default to HMAC & SHA 256
 JWT_HASH_ALGORITHM = os.environ.get("JWT_HASH_ALGORITHM", "HS256")
+
+# Passwords hashing: bcrypt cost, existing hashes are upgraded on login when it changes
+BCRYPT_ROUNDS = int(os.environ.get("BCRYPT_ROUNDS", 12))
+# Processes dedicated to bcrypt, 0 hashes on the thread of the request
+PASSWORD_HASHING_WORKERS = int(os.environ.get("PASSWORD_HASHING_WORKERS", 2))
+# Max hashes & verifications pending, requests wait up to the timeout (seconds) for a
+# slot before being rejected with a 503
+PASSWORD_HASHING_QUEUE_SIZE = int(os.environ.get("PASSWORD_HASHING_QUEUE_SIZE", 64))
+PASSWORD_HASHING_QUEUE_TIMEOUT = float(
+    os.environ.get("PASSWORD_HASHING_QUEUE_TIMEOUT", 5)
+)
+
+# Cache of the users resolved from JWTs, a size or TTL (seconds) of 0 disables it
+USER_CACHE_SIZE = int(os.environ.get("USER_CACHE_SIZE", 1024))
+USER_CACHE_TTL = float(os.environ.get("USER_CACHE_TTL", 60))
+
+# In-process index of the active lendings of each book, rejects conflicting
+# reservations without querying the database. The check mode compares every lookup
+# with the database (tests). Books are reloaded once indexed for the TTL (seconds):
+# lendings changed by other processes are only seen then.
+LENDING_INTERVAL_INDEX = os.environ.get("LENDING_INTERVAL_INDEX", "false") == "true"
+LENDING_INTERVAL_INDEX_CHECK = (
+    os.environ.get("LENDING_INTERVAL_INDEX_CHECK", "false") == "true"
+)
+LENDING_INTERVAL_INDEX_TTL = float(os.environ.get("LENDING_INTERVAL_INDEX_TTL", 5))
+
+# ``POST /books/bulk``: max books per request, rows per INSERT statement
+BOOKS_BULK_MAX_SIZE = int(os.environ.get("BOOKS_BULK_MAX_SIZE", 10_000))
+BOOKS_BULK_BATCH_SIZE = int(os.environ.get("BOOKS_BULK_BATCH_SIZE", 1_000))
+
+# ``POST /books/bulk-delete`` & ``POST /author/bulk-delete``: max ids per request, ids
+# per DELETE statement
+BULK_DELETE_MAX_SIZE = int(os.environ.get("BULK_DELETE_MAX_SIZE", 50_000))
+BULK_DELETE_BATCH_SIZE = int(os.environ.get("BULK_DELETE_BATCH_SIZE", 1_000))
+
+# Catalog imports (``POST /books/import``, ``src/import_catalog.py``): records written
+# per transaction, invalid records detailed in the report
+CATALOG_IMPORT_BATCH_SIZE = int(os.environ.get("CATALOG_IMPORT_BATCH_SIZE", 5_000))
+CATALOG_IMPORT_MAX_ERRORS = int(os.environ.get("CATALOG_IMPORT_MAX_ERRORS", 100))
+
+# Rows read from the database at once by the ``/export`` endpoints
+EXPORT_BATCH_SIZE = int(os.environ.get("EXPORT_BATCH_SIZE", 1_000))
+
+# ``max-age`` of the ``Cache-Control`` header of the catalog endpoints, in seconds. 0
+# lets clients & CDNs cache responses but revalidate them (ETags) before every use.
+CATALOG_CACHE_MAX_AGE = int(os.environ.get("CATALOG_CACHE_MAX_AGE", 0))
+
+# Read-through cache of the catalog reads: "memory" (in-process LRU bounded to
+# RESPONSE_CACHE_MAX_SIZE bytes), "redis" (RESPONSE_CACHE_URL) or "none", the default
+# when testing
+RESPONSE_CACHE_BACKEND = os.environ.get(
+    "RESPONSE_CACHE_BACKEND", "none" if TESTING else "memory"
+)
+RESPONSE_CACHE_MAX_SIZE = int(os.environ.get("RESPONSE_CACHE_MAX_SIZE", 64 * 2**20))
+RESPONSE_CACHE_URL = os.environ.get("RESPONSE_CACHE_URL", "redis://localhost:6379/0")
+# Seconds, also bounds how long a lending starting or ending goes unnoticed
+RESPONSE_CACHE_TTL = float(os.environ.get("RESPONSE_CACHE_TTL", 30))
+
+# Keyset pagination of the list endpoints
+DEFAULT_PAGE_SIZE = int(os.environ.get("DEFAULT_PAGE_SIZE", 50))
+MAX_PAGE_SIZE = int(os.environ.get("MAX_PAGE_SIZE", 500))
+
+# Archival of the finished lendings (``src/maintenance.py archive-lendings``): age in
+# days, lendings moved per transaction, interval of the runs scheduled by the API in
+# seconds (0 disables them, e.g. when the job is run by cron)
+LENDING_ARCHIVE_AFTER_DAYS = float(os.environ.get("LENDING_ARCHIVE_AFTER_DAYS", 30))
+LENDING_ARCHIVE_BATCH_SIZE = int(os.environ.get("LENDING_ARCHIVE_BATCH_SIZE", 1_000))
+LENDING_ARCHIVE_INTERVAL = float(os.environ.get("LENDING_ARCHIVE_INTERVAL", 0))
+
+# Overdue sweeper (``src/maintenance.py close-overdue``), deactivating the lendings
+# past their end: lendings closed per transaction, interval of the runs scheduled by
+# the API in seconds (0 disables them: every API process would run its own sweeper,
+# run it from a single process or from cron instead)
+LENDING_SWEEP_BATCH_SIZE = int(os.environ.get("LENDING_SWEEP_BATCH_SIZE", 1_000))
+LENDING_SWEEP_INTERVAL = float(os.environ.get("LENDING_SWEEP_INTERVAL", 0))
+
+# Waitlist of the books (``POST /lending/{book_id}?wait=true``): entries checked, in
+# FIFO order, each time a lending of a book is returned or shortened
+WAITLIST_PROMOTION_LIMIT = int(os.environ.get("WAITLIST_PROMOTION_LIMIT", 100))
@@ -0,0 +1,61 @@
+from enum import StrEnum
+from typing import Any, Callable, Iterator, Sequence
+
+from fastapi.responses import StreamingResponse
+from pydantic import TypeAdapter
+from sqlalchemy.orm import Session
+
+from src.api import main
+
+
+class ExportFormat(StrEnum):
+    # One JSON document per line
+    NDJSON = "ndjson"
+    # A single JSON array, sent in chunks
+    JSON = "json"
+
+
+MEDIA_TYPES = {
+    ExportFormat.NDJSON: "application/x-ndjson",
+    ExportFormat.JSON: "application/json",
+}
+
+
+def export_response(
+    partitions: Callable[[Session], Iterator[Sequence[Any]]],
+    convert: Callable[[Sequence[Any]], Sequence[Any]],
+    adapter: TypeAdapter[Any],
+    export_format: ExportFormat,
+) -> StreamingResponse:
+    """Streams the rows yielded, by partitions, by ``partitions`` as they're read from
+    the database: only one partition at a time is held in memory. Partitions are
+    converted by ``convert`` then each item is serialized by ``adapter``.
+
+    The body is generated after the dependencies of the request have exited, the rows
+    are read through a session of their own that lives as long as the response.
+    """
+
+    def encode() -> Iterator[bytes]:
+        separator = b"\n" if export_format == ExportFormat.NDJSON else b","
+        first_partition = True
+
+        if export_format == ExportFormat.JSON:
+            yield b"["
+
+        with main.session_factory() as session:
+            for partition in partitions(session):
+                chunk = separator.join(
+                    adapter.dump_json(item) for item in convert(partition)
+                )
+
+                if export_format == ExportFormat.NDJSON:
+                    yield chunk + separator
+                else:
+                    yield chunk if first_partition else separator + chunk
+
+                first_partition = False
+
+        if export_format == ExportFormat.JSON:
+            yield b"]"
+
+    return StreamingResponse(encode(), media_type=MEDIA_TYPES[export_format])
@@ -0,0 +1,165 @@
+import operator
+from http import HTTPStatus
+from typing import Annotated, Any, Callable, Collection, Self, Sequence
+
+from fastapi import HTTPException, Query
+from pydantic import BaseModel
+from sqlalchemy import Row
+
+
+def schema_relations(schema: type[BaseModel]) -> dict[str, type[BaseModel]]:
+    """Fields of ``schema`` embedding another schema (``author``, ``book``...)."""
+    return {
+        name: field.annotation
+        for name, field in schema.model_fields.items()
+        if isinstance(field.annotation, type)
+        and issubclass(field.annotation, BaseModel)
+    }
+
+
+def relation_paths(schema: type[BaseModel]) -> set[str]:
+    """Every relation of ``schema``, nested ones as dotted paths (``book.author``)."""
+    paths = set()
+
+    for name, nested_schema in schema_relations(schema).items():
+        paths.add(name)
+        paths.update(f"{name}.{path}" for path in relation_paths(nested_schema))
+
+    return paths
+
+
+def split_parameter(value: str | None) -> set[str]:
+    return {item.strip() for item in (value or "").split(",") if item.strip()}
+
+
+class FieldSelection:
+    """Fields of a dump schema sent in a response, relations being embedded only when
+    they're expanded.
+
+    Endpoints check which fields are selected to load only what's needed: relations
+    that aren't expanded aren't joined, computed fields that aren't selected aren't
+    computed.
+    """
+
+    def __init__(
+        self,
+        schema: type[BaseModel],
+        fields: Collection[str],
+        expand: Collection[str],
+    ) -> None:
+        self.schema = schema
+        self.expand = frozenset(expand)
+        self.relations = schema_relations(schema)
+
+        # Expanded relations are always sent
+        expanded = {path.split(".", 1)[0] for path in self.expand}
+        # In the order of the schema, for the output to match it
+        self.fields = [
+            name
+            for name in schema.model_fields
+            if name in expanded or (name in fields and name not in self.relations)
+        ]
+
+        self._nested = {
+            relation: self.nested(relation)
+            for relation in self.relations
+            if relation in expanded
+        }
+
+    @classmethod
+    def everything(cls, schema: type[BaseModel]) -> Self:
+        """Every field, relations expanded at every level: the full schema."""
+        return cls(schema, schema.model_fields, relation_paths(schema))
+
+    def __contains__(self, field: str) -> bool:
+        return field in self.fields
+
+    def nested(self, relation: str) -> "FieldSelection":
+        """Selection of the expanded ``relation``: all its fields, its own relations
+        are expanded when listed as ``<relation>.<nested relation>``."""
+        prefix = f"{relation}."
+
+        return FieldSelection(
+            self.relations[relation],
+            self.relations[relation].model_fields,
+            {
+                path.removeprefix(prefix)
+                for path in self.expand
+                if path.startswith(prefix)
+            },
+        )
+
+    @property
+    def key(self) -> str:
+        """Identifies the selection in cache keys & ETags."""
+        return f"{','.join(self.fields)};{','.join(sorted(self.expand))}"
+
+    def dump(self, instance: Any) -> dict[str, Any]:
+        """Selected fields of ``instance``, an ORM instance or a row with the same
+        attributes, in the order of the schema."""
+        return self.dump_all([instance])[0]
+
+    def dump_all(self, instances: Sequence[Any]) -> list[dict[str, Any]]:
+        """``dump`` of several instances, or rows of the same statement."""
+        if not instances:
+            return []
+
+        getter: Callable[[Any], Any] = operator.attrgetter(*self.fields)
+
+        if isinstance(instances[0], Row):
+            # Attribute access on rows is much slower than indexing
+            columns = instances[0]._fields
+            getter = operator.itemgetter(*(columns.index(name) for name in self.fields))
+
+        if len(self.fields) == 1:
+            items = [{self.fields[0]: getter(instance)} for instance in instances]
+        else:
+            items = [dict(zip(self.fields, getter(instance))) for instance in instances]
+
+        for relation, selection in self._nested.items():
+            related_items = [item for item in items if item[relation] is not None]
+            dumped = selection.dump_all([item[relation] for item in related_items])
+
+            for item, related in zip(related_items, dumped):
+                item[relation] = related
+
+        return items
+
+
+class SparseFields:
+    """``?fields=`` & ``?expand=`` parameters of the endpoints sending ``schema``.
+
+    ``fields`` lists the fields to send (comma separated), ``expand`` the relations to
+    embed, nested ones as dotted paths (``expand=book.author``). Without any of them
+    the whole schema is sent, every relation expanded.
+    """
+
+    def __init__(self, schema: type[BaseModel]) -> None:
+        self.schema = schema
+        self.relation_paths = relation_paths(schema)
+
+    def __call__(
+        self,
+        fields: Annotated[str | None, Query()] = None,
+        expand: Annotated[str | None, Query()] = None,
+    ) -> FieldSelection:
+        if fields is None and expand is None:
+            return FieldSelection.everything(self.schema)
+
+        field_names = split_parameter(fields) or set(self.schema.model_fields)
+        paths = split_parameter(expand)
+
+        unknown_fields = field_names - self.schema.model_fields.keys()
+        unknown_paths = paths - self.relation_paths
+
+        if unknown_fields or unknown_paths:
+            unknown = ", ".join(sorted(unknown_fields | unknown_paths))
+
+            raise HTTPException(
+                status_code=HTTPStatus.BAD_REQUEST, detail=f"Unknown fields: {unknown}"
+            )
+
+        # Listing a relation in ``fields`` expands it
+        paths.update(field_names & self.relation_paths)
+
+        return FieldSelection(self.schema, field_names, paths)
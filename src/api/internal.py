@@ -0,0 +1,56 @@
+from http import HTTPStatus
+
+from fastapi import APIRouter
+
+from src.api import main
+from src.api.cache import catalog_cache
+from src.authentication.cache import logged_users
+from src.database.intervals import lending_intervals
+from src.schemas.internal import (
+    CacheStatisticsSchema,
+    IntervalIndexStatisticsSchema,
+    PoolsStatisticsSchema,
+    PoolStatisticsSchema,
+    ResponseCacheStatisticsSchema,
+)
+
+router = APIRouter(
+    prefix="/internal",
+    tags=["internal"],
+)
+
+
+@router.get("/pool", status_code=int(HTTPStatus.OK))
+def get_pool_statistics() -> PoolsStatisticsSchema:
+    async_statistics = main.async_pool_statistics
+
+    return PoolsStatisticsSchema(
+        sync=PoolStatisticsSchema(**main.pool_statistics.snapshot()),
+        asynchronous=(
+            PoolStatisticsSchema(**async_statistics.snapshot())
+            if async_statistics is not None
+            else None
+        ),
+    )
+
+
+@router.get("/user-cache", status_code=int(HTTPStatus.OK))
+def get_user_cache_statistics() -> CacheStatisticsSchema:
+    return CacheStatisticsSchema(**logged_users.statistics())
+
+
+@router.get("/response-cache", status_code=int(HTTPStatus.OK))
+def get_response_cache_statistics() -> ResponseCacheStatisticsSchema:
+    return ResponseCacheStatisticsSchema(**catalog_cache.statistics())
+
+
+@router.get("/lending-index", status_code=int(HTTPStatus.OK))
+def get_lending_index_statistics() -> IntervalIndexStatisticsSchema:
+    return IntervalIndexStatisticsSchema(**lending_intervals.statistics())
+
+
+@router.delete("/lending-index", status_code=int(HTTPStatus.NO_CONTENT))
+def invalidate_lending_index() -> None:
+    """Drops the whole index, books are reloaded from the database on their next
+    lookup."""
+    lending_intervals.invalidate()
@@ -1,16 +1,35 @@
+from datetime import datetime
 from http import HTTPStatus
-from typing import Annotated, Sequence
+from typing import Annotated
 from uuid import UUID
 from zoneinfo import ZoneInfo
 
-from fastapi import APIRouter, Depends, HTTPException
-from sqlalchemy import ColumnExpressionArgument, select
+from fastapi import APIRouter, Depends, HTTPException, Response
+from fastapi.encoders import jsonable_encoder
+from fastapi.responses import JSONResponse
+from sqlalchemy import ColumnExpressionArgument
+from sqlalchemy.exc import IntegrityError
 from sqlalchemy.orm import Session
 
 from src.api import config, main
+from src.api.fields import FieldSelection, SparseFields
 from src.api.user import get_logged_user
-from src.database.models import Book, Lending, User
-from src.schemas.lending import LendingDumpSchema, LendingEditSchema, LendingSchema
+from src.database.models import (
+    Book,
+    Lending,
+    LendingArchive,
+    User,
+    WaitlistEntry,
+    is_lending_overlap_violation,
+)
+from src.schemas.lending import (
+    LENDING_LIST_ADAPTER,
+    LendingDumpSchema,
+    LendingEditSchema,
+    LendingHistorySchema,
+    LendingSchema,
+    WaitlistEntrySchema,
+)
 
 router = APIRouter(
     prefix="/lending",
@@ -21,16 +40,59 @@ router = APIRouter(
     dependencies=[
         Depends(main.database_connection),
     ],
+    route_class=main.DatabaseRoute,
 )
 
 
-@router.post("/{book_id}", status_code=int(HTTPStatus.OK))
+def promote_waitlist(
+    book_id: int,
+    start_time: datetime,
+    end_time: datetime,
+    session: Session,
+    now: datetime,
+) -> None:
+    """Lends the freed period of a book to its waitlist, in a transaction of its own:
+    the change freeing it is committed already, whatever happens to the promotion."""
+    WaitlistEntry.promote(
+        book_id,
+        start_time,
+        end_time,
+        session,
+        now=now,
+        limit=config.WAITLIST_PROMOTION_LIMIT,
+    )
+
+    try:
+        session.commit()
+    except IntegrityError as error:
+        # A concurrent reservation got the period first, the entries keep waiting
+        if not is_lending_overlap_violation(error):
+            raise
+
+        session.rollback()
+
+
+@router.post(
+    "/{book_id}",
+    status_code=int(HTTPStatus.OK),
+    response_model=LendingDumpSchema,
+    responses={
+        int(HTTPStatus.ACCEPTED): {
+            "model": WaitlistEntrySchema,
+            "description": "Not available, added to the waitlist (``wait``)",
+        },
+    },
+)
 def reserve_book(
     lending_payload: LendingSchema,
     book_id: int,
     session: Annotated[Session, Depends(main.database_connection)],
     logged_user: Annotated[User, Depends(get_logged_user)],
-) -> LendingDumpSchema:
+    wait: bool = False,
+) -> Response | LendingDumpSchema:
+    """Lends the book during the requested period. When it isn't available, the
+    reservation joins the waitlist of the book with ``?wait=true`` (202) and is turned
+    into a lending as soon as the period is freed, instead of failing (422)."""
     book: Book | None = Book.get(book_id, session)
 
     if not book:
@@ -44,41 +106,138 @@ def reserve_book(
     start_time.replace(tzinfo=tz)
     end_time.replace(tzinfo=tz)
 
-    lending: Lending = Lending.lend_book(
-        book,
-        user_id=logged_user.id,
-        start_time=start_time,
-        end_time=end_time,
-        session=session,
-    )
+    try:
+        lending: Lending = Lending.lend_book(
+            book,
+            user_id=logged_user.id,
+            start_time=start_time,
+            end_time=end_time,
+            session=session,
+        )
+        session.commit()
+    except HTTPException:
+        if not wait:
+            raise
 
-    session.commit()
+        return join_waitlist(book, logged_user, start_time, end_time, session)
+    except IntegrityError as error:
+        # A concurrent reservation got the book first
+        if not is_lending_overlap_violation(error):
+            raise
+
+        session.rollback()
+
+        if wait:
+            return join_waitlist(book, logged_user, start_time, end_time, session)
+
+        raise HTTPException(
+            status_code=HTTPStatus.UNPROCESSABLE_ENTITY,
+            detail={"errors": f"Lending failed for {book.title}: not enough stock"},
+        )
 
     return LendingDumpSchema.model_validate(lending)
 
 
-@router.get("/me", status_code=int(HTTPStatus.OK))
+def join_waitlist(
+    book: Book,
+    user: User,
+    start_time: datetime,
+    end_time: datetime,
+    session: Session,
+) -> Response:
+    entry = WaitlistEntry.join(book.id, user.id, start_time, end_time, session)
+    entry_row = WaitlistEntry.get_row(entry.id, session)
+    session.commit()
+
+    return JSONResponse(
+        jsonable_encoder(WaitlistEntrySchema.model_validate(entry_row)),
+        status_code=HTTPStatus.ACCEPTED,
+    )
+
+
+@router.get(
+    "/me",
+    status_code=int(HTTPStatus.OK),
+    response_model=list[LendingDumpSchema],
+)
 def get_my_lendings(
     session: Annotated[Session, Depends(main.database_connection)],
     logged_user: Annotated[User, Depends(get_logged_user)],
-) -> list[LendingDumpSchema]:
+    now: Annotated[datetime, Depends(main.current_time)],
+    selection: Annotated[FieldSelection, Depends(SparseFields(LendingDumpSchema))],
+) -> Response:
+    """The lent books, their author and availability are only loaded when they're
+    expanded (``?expand=book.author``, see ``SparseFields``)."""
     filters: list[ColumnExpressionArgument[bool]] = [
-        User.id == logged_user.id,
+        Lending.user_id == logged_user.id,
     ]
 
+    with_book = "book" in selection
+
+    lendings = Lending.get_all(
+        filters,
+        session,
+        now=now if with_book else None,
+        with_book=with_book,
+        with_author=with_book and "author" in selection.nested("book"),
+    )
+
+    return Response(
+        LENDING_LIST_ADAPTER.dump_json(selection.dump_all(lendings)),
+        media_type="application/json",
+    )
+
+
+@router.get("/me/history", status_code=int(HTTPStatus.OK))
+def get_my_lendings_history(
+    session: Annotated[Session, Depends(main.database_connection)],
+    logged_user: Annotated[User, Depends(get_logged_user)],
+    now: Annotated[datetime, Depends(main.current_time)],
+) -> list[LendingHistorySchema]:
+    """Finished lendings, newest first, including the ones moved to the archive (see
+    ``src.database.maintenance``)."""
     return [
-        LendingDumpSchema.model_validate(lending)
-        for lending in Lending.get_all(filters, session)
+        LendingHistorySchema.model_validate(row)
+        for row in LendingArchive.history(logged_user.id, now, session)
     ]
 
 
+@router.get("/me/waitlist", status_code=int(HTTPStatus.OK))
+def get_my_waitlist(
+    session: Annotated[Session, Depends(main.database_connection)],
+    logged_user: Annotated[User, Depends(get_logged_user)],
+    now: Annotated[datetime, Depends(main.current_time)],
+) -> list[WaitlistEntrySchema]:
+    """Reservations still waiting for their book, oldest first."""
+    return [
+        WaitlistEntrySchema.model_validate(row)
+        for row in WaitlistEntry.get_user_rows(logged_user.id, now, session)
+    ]
+
+
+@router.delete("/me/waitlist/{entry_id}", status_code=int(HTTPStatus.NO_CONTENT))
+def leave_waitlist(
+    entry_id: UUID,
+    session: Annotated[Session, Depends(main.database_connection)],
+    logged_user: Annotated[User, Depends(get_logged_user)],
+) -> None:
+    if not WaitlistEntry.leave(entry_id, logged_user.id, session):
+        session.rollback()
+        raise HTTPException(status_code=HTTPStatus.NOT_FOUND)
+
+    session.commit()
+
+
 @router.put("/me/{lending_id}", status_code=int(HTTPStatus.OK))
 def update_lending(
     lending_id: UUID,
     lending_payload: LendingEditSchema,
     session: Annotated[Session, Depends(main.database_connection)],
     logged_user: Annotated[User, Depends(get_logged_user)],
+    now: Annotated[datetime, Depends(main.current_time)],
 ) -> LendingDumpSchema:
+    """Changes the end of the lending or closes it, a period freed this way is lent to
+    the waitlist of the book."""
     lending: Lending = Lending.get_or_404(
         lending_id,
         logged_user.id,
@@ -88,26 +247,73 @@ def update_lending(
     if lending_payload.end_time < lending.start_time:
         raise HTTPException(status_code=HTTPStatus.BAD_REQUEST)
 
-    # Check if any lendings on the current book (``lending.book``) were registered with
-    # a start date that would be prior to the new end date
-    conflicting_lendings_query = select(Lending).where(
-        Lending.start_time < lending_payload.end_time,
-        Lending.book_id == lending.book_id,
-        Lending.id != lending.id,
-    )
+    # Check if any other active lending on the current book (``lending.book``)
+    # intersects the new period
+    if Lending.is_booked(
+        lending.book_id,
+        lending.start_time,
+        lending_payload.end_time,
+        session,
+        exclude_id=lending.id,
+    ):
+        raise HTTPException(status_code=HTTPStatus.CONFLICT)
 
-    conflicting_lendings: Sequence[Lending] = (
-        session.execute(conflicting_lendings_query).scalars().all()
-    )
+    # Period the lending held before the change, part or all of it may be freed
+    freed = None
 
-    if conflicting_lendings:
-        raise HTTPException(status_code=HTTPStatus.CONFLICT)
+    if lending.is_active and (
+        not lending_payload.is_active or lending_payload.end_time < lending.end_time
+    ):
+        freed = (lending.start_time, lending.end_time)
 
     for field in LendingEditSchema.model_fields.keys():
         new_field_value = getattr(lending_payload, field)
         setattr(lending, field, new_field_value)
 
     session.add(lending)
+
+    try:
+        session.commit()
+    except IntegrityError as error:
+        if not is_lending_overlap_violation(error):
+            raise
+
+        session.rollback()
+        raise HTTPException(status_code=HTTPStatus.CONFLICT)
+
+    if freed is not None:
+        promote_waitlist(lending.book_id, *freed, session, now=now)
+
+    return LendingDumpSchema.model_validate(lending)
+
+
+@router.post("/me/{lending_id}/return", status_code=int(HTTPStatus.OK))
+def return_lending(
+    lending_id: UUID,
+    session: Annotated[Session, Depends(main.database_connection)],
+    logged_user: Annotated[User, Depends(get_logged_user)],
+    now: Annotated[datetime, Depends(main.current_time)],
+) -> LendingDumpSchema:
+    """Ends the lending: the book is available again from now on, the rest of the
+    period is lent to the waitlist of the book or can be lent."""
+    lending: Lending = Lending.get_or_404(
+        lending_id,
+        logged_user.id,
+        session,
+    )
+
+    if not lending.is_active:
+        raise HTTPException(
+            status_code=HTTPStatus.CONFLICT, detail="Lending already closed"
+        )
+
+    lending.is_active = False
+    lending.return_time = now
+
     session.commit()
 
+    promote_waitlist(
+        lending.book_id, lending.start_time, lending.end_time, session, now=now
+    )
+
     return LendingDumpSchema.model_validate(lending)
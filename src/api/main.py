@@ -1,10 +1,67 @@
-from typing import Any, Generator
+import asyncio
+import functools
+import inspect
+import logging
+import sys
+from contextlib import asynccontextmanager
+from datetime import datetime
+from typing import Any, AsyncGenerator, Awaitable, Callable, Generator, TypeVar
 
 from fastapi import FastAPI
-from sqlalchemy import Engine, create_engine
+from fastapi.concurrency import run_in_threadpool
+from fastapi.routing import APIRoute
+from greenlet import getcurrent
+from sqlalchemy import URL, Engine, create_engine, make_url
+from sqlalchemy.ext.asyncio import (
+    AsyncEngine,
+    AsyncSession,
+    async_sessionmaker,
+    create_async_engine,
+)
 from sqlalchemy.orm import Session, sessionmaker
+from sqlalchemy.pool import AsyncAdaptedQueuePool, Pool, QueuePool
+
+# Greenlet recognized by ``await_only``, the primitive through which the async dialects
+# wait for their driver
+from sqlalchemy.util._concurrency_py3k import _AsyncIoGreenlet
 
 from src.api import config
+from src.database.intervals import lending_intervals
+from src.database.pool import PoolStatistics
+
+logger = logging.getLogger(__name__)
+
+ReturnT = TypeVar("ReturnT")
+
+# Async driver used for each database backend when ``SQLALCHEMY_ASYNC`` is enabled
+ASYNC_DRIVERS = {
+    "postgresql": "postgresql+asyncpg",
+    "sqlite": "sqlite+aiosqlite",
+    "mysql": "mysql+aiomysql",
+    "mariadb": "mariadb+aiomysql",
+}
+
+
+def pool_options(db_uri: str | URL, asynchronous: bool = False) -> dict[str, Any]:
+    """Connection pool settings from the configuration.
+
+    In-memory SQLite databases keep SQLAlchemy's default pool: each connection being a
+    distinct database, it relies on a single connection per thread.
+    """
+    url = make_url(db_uri)
+
+    if url.get_backend_name() == "sqlite" and url.database in (None, "", ":memory:"):
+        return {}
+
+    return {
+        # Explicit, some async dialects (aiosqlite) default to a ``NullPool``
+        "poolclass": AsyncAdaptedQueuePool if asynchronous else QueuePool,
+        "pool_size": config.SQLALCHEMY_POOL_SIZE,
+        "max_overflow": config.SQLALCHEMY_MAX_OVERFLOW,
+        "pool_timeout": config.SQLALCHEMY_POOL_TIMEOUT,
+        "pool_recycle": config.SQLALCHEMY_POOL_RECYCLE,
+        "pool_pre_ping": config.SQLALCHEMY_POOL_PRE_PING,
+    }
 
 
 def create_db_connection(db_uri: str, **kwargs: dict[str, Any]) -> Engine:
@@ -16,10 +73,29 @@ def create_db_connection(db_uri: str, **kwargs: dict[str, Any]) -> Engine:
     return engine
 
 
+def async_database_uri(db_uri: str) -> URL:
+    """Swaps the (sync) driver of ``db_uri`` for its async counterpart."""
+    url = make_url(db_uri)
+
+    return url.set(drivername=ASYNC_DRIVERS[url.get_backend_name()])
+
+
+def create_async_db_connection(db_uri: str | URL, **kwargs: Any) -> AsyncEngine:
+    async_engine = create_async_engine(
+        db_uri,
+        **kwargs,
+    )
+
+    return async_engine
+
+
 engine = create_db_connection(
     db_uri=config.SQLALCHEMY_DATABASE_URI,
+    **pool_options(config.SQLALCHEMY_DATABASE_URI),
 )
 
+pool_statistics = PoolStatistics(engine)
+
 session_factory = sessionmaker(
     bind=engine,
     autocommit=False,
@@ -27,6 +103,23 @@ session_factory = sessionmaker(
     expire_on_commit=False,
 )
 
+async_engine: AsyncEngine | None = None
+
+async_session_factory = async_sessionmaker(
+    autoflush=False,
+    expire_on_commit=False,
+)
+
+async_pool_statistics: PoolStatistics | None = None
+
+if config.SQLALCHEMY_ASYNC:
+    async_engine = create_async_db_connection(
+        db_uri=async_database_uri(config.SQLALCHEMY_DATABASE_URI),
+        **pool_options(config.SQLALCHEMY_DATABASE_URI, asynchronous=True),
+    )
+    async_session_factory.configure(bind=async_engine)
+    async_pool_statistics = PoolStatistics(async_engine.sync_engine)
+
 
 def database_connection() -> Generator[Session, None, None]:
     session = session_factory()
@@ -36,17 +129,213 @@ def database_connection() -> Generator[Session, None, None]:
         session.close()
 
 
+async def async_database_connection() -> AsyncGenerator[AsyncSession, None]:
+    """Replaces ``database_connection`` when the API runs in async mode."""
+    async with async_session_factory() as session:
+        yield session
+
+
+async def _await(awaitable: Awaitable[ReturnT]) -> ReturnT:
+    return await awaitable
+
+
+def run_bridged(
+    loop: asyncio.AbstractEventLoop,
+    function: Callable[..., ReturnT],
+    *args: Any,
+    **kwargs: Any,
+) -> ReturnT:
+    """Sync counterpart of ``AsyncSession.run_sync`` for a worker thread: runs
+    ``function`` in a greenlet of the current thread, the coroutines of the async driver
+    it waits for are run on ``loop``, where its connections live, while the thread
+    blocks on their result."""
+    context = _AsyncIoGreenlet(function, getcurrent())
+
+    try:
+        result = context.switch(*args, **kwargs)
+        while not context.dead:
+            try:
+                value = asyncio.run_coroutine_threadsafe(_await(result), loop).result()
+            except BaseException:
+                # Raised in the greenlet, so that ``function`` can handle it
+                result = context.throw(*sys.exc_info())
+            else:
+                result = context.switch(value)
+    finally:
+        del context.driver
+
+    return result
+
+
+def run_in_async_session(
+    endpoint: Callable[..., ReturnT],
+) -> Callable[..., Awaitable[ReturnT]]:
+    """Turns a sync endpoint (or dependency) into a coroutine for the async mode.
+
+    The endpoint receives the ``AsyncSession`` yielded by ``async_database_connection``
+    as its ``session`` argument, its whole body is then run on the threadpool with the
+    sync session of the ``AsyncSession`` (see ``run_bridged``): the ORM code stays the
+    same but every round trip to the database goes through the async driver, on the
+    event loop. Serializing a large page or parsing an import doesn't hold up the
+    other requests of the process, only the threadpool.
+    """
+
+    @functools.wraps(endpoint)
+    async def wrapper(**kwargs: Any) -> ReturnT:
+        async_session = kwargs.pop("session", None)
+
+        if not isinstance(async_session, AsyncSession):
+            if async_session is not None:
+                kwargs["session"] = async_session
+
+            return await run_in_threadpool(endpoint, **kwargs)
+
+        return await run_in_threadpool(
+            run_bridged,
+            asyncio.get_running_loop(),
+            endpoint,
+            session=async_session.sync_session,
+            **kwargs,
+        )
+
+    return wrapper
+
+
+async def run_with_session(
+    session: Session | AsyncSession,
+    function: Callable[..., ReturnT],
+    *args: Any,
+    **kwargs: Any,
+) -> ReturnT:
+    """Runs the database work of a native coroutine endpoint on the threadpool,
+    ``function`` gets the sync session as its ``session`` argument: the sync session of
+    the ``AsyncSession`` in async mode (see ``run_bridged``)."""
+    if isinstance(session, AsyncSession):
+        return await run_in_threadpool(
+            run_bridged,
+            asyncio.get_running_loop(),
+            function,
+            *args,
+            session=session.sync_session,
+            **kwargs,
+        )
+
+    return await run_in_threadpool(function, *args, session=session, **kwargs)
+
+
+class DatabaseRoute(APIRoute):
+    """Route class of the API routers, sync endpoints are run through
+    ``run_in_async_session`` when ``SQLALCHEMY_ASYNC`` is enabled."""
+
+    def __init__(self, path: str, endpoint: Callable[..., Any], **kwargs: Any) -> None:
+        # Endpoints that are already coroutines (including the ones wrapped when a
+        # router is included in another one) are kept as is.
+        if config.SQLALCHEMY_ASYNC and not inspect.iscoroutinefunction(endpoint):
+            endpoint = run_in_async_session(endpoint)
+
+        super().__init__(path, endpoint, **kwargs)
+
+
+def current_time() -> datetime:
+    """Time of the request, computed once and shared by every dependency of the
+    request (FastAPI caches dependencies for the duration of a request)."""
+    return datetime.now()
+
+
+def prewarm_pool(pool: Pool, connections_count: int) -> None:
+    """Opens ``connections_count`` connections at once then gives them back to the
+    pool, where they stay idle until the first requests come in."""
+    connections = [pool.connect() for _ in range(connections_count)]
+
+    for connection in connections:
+        connection.close()
+
+
+def rebuild_lending_intervals() -> None:
+    """Loads the active lendings of every book in the interval index."""
+    # Circular imports
+    from src.database.models import Lending
+
+    with session_factory() as session:
+        lending_intervals.rebuild(Lending.all_active_periods(session))
+
+
+def run_job(job: Callable[[Session], Any]) -> None:
+    with session_factory() as session:
+        job(session)
+
+
+async def run_periodically(job: Callable[[Session], Any], interval: float) -> None:
+    """Runs ``job`` with its own session every ``interval`` seconds, in the
+    threadpool. A failed run is logged, the next one still happens."""
+    while True:
+        await asyncio.sleep(interval)
+
+        try:
+            await run_in_threadpool(run_job, job)
+        except Exception:
+            logger.exception("Scheduled job %s failed", job.__name__)
+
+
+@asynccontextmanager
+async def lifespan(app: FastAPI) -> AsyncGenerator[None, None]:
+    prewarm_count = min(config.SQLALCHEMY_POOL_PREWARM, config.SQLALCHEMY_POOL_SIZE)
+
+    if prewarm_count > 0:
+        # Connections of the async pool can only be opened through the async engine
+        if async_engine is not None:
+            connections = [await async_engine.connect() for _ in range(prewarm_count)]
+            for connection in connections:
+                await connection.close()
+        else:
+            prewarm_pool(engine.pool, prewarm_count)
+
+        logger.info("Connection pool pre-warmed with %d connections", prewarm_count)
+
+    if lending_intervals.enabled:
+        await run_in_threadpool(rebuild_lending_intervals)
+
+        logger.info("Lending interval index rebuilt")
+
+    # Circular imports
+    from src.database.maintenance import scheduled_jobs
+
+    scheduled_tasks = [
+        asyncio.create_task(run_periodically(job, interval))
+        for interval, job in scheduled_jobs()
+    ]
+
+    yield
+
+    for task in scheduled_tasks:
+        task.cancel()
+
+    if async_engine is not None:
+        await async_engine.dispose()
+
+    engine.dispose()
+
+
 def init_api() -> FastAPI:
-    app: FastAPI = FastAPI()
+    app: FastAPI = FastAPI(lifespan=lifespan)
 
     # Circular imports
-    from src.api import authors, books, lending, user
+    from src.api import authors, books, internal, lending, user
 
     app.include_router(books.router)
     app.include_router(authors.router)
     app.include_router(user.router)
     app.include_router(lending.router)
 
+    if config.INTERNAL_ENDPOINTS:
+        app.include_router(internal.router)
+
+    if config.SQLALCHEMY_ASYNC:
+        app.dependency_overrides[database_connection] = async_database_connection
+        app.dependency_overrides[user.get_logged_user] = run_in_async_session(
+            user.get_logged_user
+        )
+
     return app
 
 
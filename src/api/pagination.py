@@ -0,0 +1,68 @@
+import base64
+import binascii
+import json
+from http import HTTPStatus
+from typing import Annotated, Callable, Sequence, TypeVar
+
+from fastapi import HTTPException, Query
+
+from src.api import config
+
+RowT = TypeVar("RowT")
+
+
+def encode_cursor(position: int) -> str:
+    """Encodes a keyset position into an opaque, URL safe, cursor."""
+    raw = json.dumps({"after": position}, separators=(",", ":")).encode()
+
+    return base64.urlsafe_b64encode(raw).decode().rstrip("=")
+
+
+def decode_cursor(cursor: str) -> int:
+    """Decodes a cursor built by ``encode_cursor``, any tampered or malformed cursor
+    is rejected with a 400."""
+    padded = cursor + "=" * (-len(cursor) % 4)
+
+    try:
+        payload = json.loads(base64.urlsafe_b64decode(padded.encode()))
+        position = payload["after"]
+    except (binascii.Error, ValueError, TypeError, KeyError):
+        raise HTTPException(status_code=HTTPStatus.BAD_REQUEST, detail="Invalid cursor")
+
+    if not isinstance(position, int) or isinstance(position, bool):
+        raise HTTPException(status_code=HTTPStatus.BAD_REQUEST, detail="Invalid cursor")
+
+    return position
+
+
+class Pagination:
+    """Keyset pagination parameters shared by the list endpoints.
+
+    Pages are ordered by primary key and the cursor holds the last id of the previous
+    page: fetching any page is a ``WHERE id > :after ORDER BY id LIMIT :limit`` that
+    walks the primary key index, its cost doesn't depend on the page number.
+    """
+
+    def __init__(
+        self,
+        limit: Annotated[
+            int, Query(ge=1, le=config.MAX_PAGE_SIZE)
+        ] = config.DEFAULT_PAGE_SIZE,
+        cursor: str | None = None,
+    ) -> None:
+        self.limit = limit
+        self.after = decode_cursor(cursor) if cursor else None
+
+    def paginate(
+        self,
+        rows: Sequence[RowT],
+        position: Callable[[RowT], int],
+    ) -> tuple[list[RowT], str | None]:
+        """Splits ``rows`` (fetched with ``limit + 1``) into the current page and the
+        cursor of the next one."""
+        items = list(rows[: self.limit])
+
+        if len(rows) <= self.limit:
+            return items, None
+
+        return items, encode_cursor(position(items[-1]))
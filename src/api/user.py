@@ -4,9 +4,12 @@ from typing import Annotated
 from fastapi import APIRouter, Depends, HTTPException
 from fastapi.security import OAuth2PasswordBearer, OAuth2PasswordRequestForm
 from jose import JWTError, jwt
+from sqlalchemy.exc import IntegrityError
 from sqlalchemy.orm import Session
 
 from src.api import config, main
+from src.authentication.cache import logged_users
+from src.authentication.hashing import ahash_password, averify_password
 from src.authentication.utils import create_access_token
 from src.database.models import User
 from src.schemas.user import UserCreationSchema, UserDumpSchema, UserToken
@@ -20,6 +23,7 @@ router = APIRouter(
     dependencies=[
         Depends(main.database_connection),
     ],
+    route_class=main.DatabaseRoute,
 )
 
 
@@ -48,47 +52,94 @@ def get_logged_user(
     if not username:
         raise unauthorized_exception
 
+    cached_user = logged_users.get(username)
+
+    if cached_user is not None:
+        # Attaches a copy of the cached user to the session without any query
+        return session.merge(cached_user, load=False)
+
     user: User | None = User.get(username, session)
 
     if not user:
         raise unauthorized_exception
 
+    logged_users.add(user)
+
     return user
 
 
+def insert_user(
+    user_payload: UserCreationSchema, hashed_password: str, session: Session
+) -> UserDumpSchema:
+    user: User = User.create(user_payload, session, hashed_password=hashed_password)
+
+    session.add(user)
+
+    try:
+        session.commit()
+    except IntegrityError:
+        # Username & email are unique
+        session.rollback()
+        raise HTTPException(
+            status_code=HTTPStatus.CONFLICT,
+            detail="Username or email already registered",
+        )
+
+    return UserDumpSchema.model_validate(user)
+
+
+def save_password_hash(user: User, hashed_password: str, session: Session) -> None:
+    user.hashed_password = hashed_password
+
+    session.commit()
+
+
+# The endpoints hashing passwords are coroutines, in both modes: bcrypt runs in the
+# hashing pool while the event loop serves other requests, only their database work
+# goes through ``main.run_with_session`` (see ``main.run_in_async_session``).
+
+
 @router.post(
     "/",
     status_code=int(HTTPStatus.CREATED),
 )
-def create_user(
+async def create_user(
     user_payload: UserCreationSchema,
     session: Annotated[Session, Depends(main.database_connection)],
 ) -> UserDumpSchema:
-    user: User = User.create(user_payload, session)
-
-    session.add(user)
-    session.commit()
+    hashed_password = await ahash_password(user_payload.password)
 
-    return UserDumpSchema.model_validate(user)
+    return await main.run_with_session(
+        session, insert_user, user_payload, hashed_password
+    )
 
 
 @router.post(
     "/token",
     status_code=int(HTTPStatus.ACCEPTED),
 )
-def create_jwt_token(
+async def create_jwt_token(
     form_data: Annotated[OAuth2PasswordRequestForm, Depends()],
     session: Annotated[Session, Depends(main.database_connection)],
 ) -> UserToken:
-    user = User.authenticate(form_data.username, form_data.password, session)
+    user = await main.run_with_session(session, User.get, form_data.username)
+    verified, upgraded_hash = (
+        await averify_password(form_data.password, user.hashed_password)
+        if user
+        else (False, None)
+    )
 
-    if not user:
+    if not user or not verified:
         raise HTTPException(
             status_code=HTTPStatus.UNAUTHORIZED,
             detail="Incorrect credentials",
             headers={"WWW-Authenticate": "Bearer"},
         )
 
+    # Stored with another number of rounds, persists the upgraded hash
+    if upgraded_hash is not None:
+        await main.run_with_session(session, save_password_hash, user, upgraded_hash)
+
     token = create_access_token(
         data=dict(sub=user.username),
         expires_delta=config.JWT_TOKEN_EXPIRE_TIME,
@@ -0,0 +1,110 @@
+import time
+from collections import OrderedDict
+from threading import Lock
+from typing import Any
+
+from sqlalchemy import event, inspect
+from sqlalchemy.orm import Mapper, make_transient_to_detached
+
+from src.api import config
+from src.database.models import User
+
+
+class UserCache:
+    """Bounded, in-process, cache of the users resolved from a JWT subject.
+
+    Entries are evicted in LRU order once ``max_size`` is reached and expire ``ttl``
+    seconds after being stored. Cached users are detached copies: they must be
+    attached to the session of the request with ``Session.merge(user, load=False)``,
+    which doesn't emit any query.
+    """
+
+    def __init__(self, max_size: int, ttl: float) -> None:
+        self.max_size = max_size
+        self.ttl = ttl
+
+        self._lock = Lock()
+        self._entries: OrderedDict[str, tuple[float, User]] = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+
+    @property
+    def enabled(self) -> bool:
+        return self.max_size > 0 and self.ttl > 0
+
+    def get(self, username: str) -> User | None:
+        with self._lock:
+            entry = self._entries.get(username)
+
+            if entry is None or entry[0] < time.monotonic():
+                if entry is not None:
+                    del self._entries[username]
+
+                self.misses += 1
+                return None
+
+            self._entries.move_to_end(username)
+            self.hits += 1
+
+            return entry[1]
+
+    def add(self, user: User) -> None:
+        if not self.enabled:
+            return
+
+        # Detached copy of the loaded columns: the cached object mustn't be shared with
+        # the session that loaded it.
+        cached_user = User(
+            **{
+                attribute.key: getattr(user, attribute.key)
+                for attribute in inspect(User).column_attrs
+            }
+        )
+        make_transient_to_detached(cached_user)
+
+        with self._lock:
+            self._entries[user.username] = (time.monotonic() + self.ttl, cached_user)
+            self._entries.move_to_end(user.username)
+
+            while len(self._entries) > self.max_size:
+                self._entries.popitem(last=False)
+
+    def invalidate(self, username: str) -> None:
+        with self._lock:
+            self._entries.pop(username, None)
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
+            self.hits = 0
+            self.misses = 0
+
+    def statistics(self) -> dict[str, Any]:
+        with self._lock:
+            lookups = self.hits + self.misses
+
+            return {
+                "size": len(self._entries),
+                "max_size": self.max_size,
+                "ttl": self.ttl,
+                "hits": self.hits,
+                "misses": self.misses,
+                "hit_ratio": self.hits / lookups if lookups else 0.0,
+            }
+
+
+logged_users = UserCache(
+    max_size=config.USER_CACHE_SIZE,
+    ttl=config.USER_CACHE_TTL,
+)
+
+
+@event.listens_for(User, "after_update")
+@event.listens_for(User, "after_delete")
+def invalidate_cached_user(mapper: Mapper[User], connection: Any, user: User) -> None:
+    """Drops updated or deleted users from the cache, including their previous
+    username when it's been changed."""
+    usernames = {user.username, *inspect(user).attrs.username.history.deleted}
+
+    for username in usernames:
+        logged_users.invalidate(username)
@@ -0,0 +1,144 @@
+import asyncio
+import multiprocessing
+import weakref
+from concurrent.futures import Future, ProcessPoolExecutor
+from http import HTTPStatus
+from threading import BoundedSemaphore, Lock
+from typing import Any, Callable, TypeVar
+
+from fastapi import HTTPException
+from fastapi.concurrency import run_in_threadpool
+from passlib.context import CryptContext
+
+from src.api import config
+
+ReturnT = TypeVar("ReturnT")
+
+# Shared by every hash & verification. Hashes with another number of rounds are
+# flagged by ``verify_and_update`` which returns their upgraded version.
+password_context = CryptContext(
+    schemes=["bcrypt"],
+    bcrypt__rounds=config.BCRYPT_ROUNDS,
+)
+
+# Bounds the hashes & verifications waiting for (or running in) the process pool
+_pending_slots = BoundedSemaphore(config.PASSWORD_HASHING_QUEUE_SIZE)
+
+# Same bound for the coroutines (``ahash_password``, ``averify_password``), waited on
+# without blocking the event loop. An asyncio semaphore belongs to the loop it's used
+# with, there's one per loop.
+_async_pending_slots: weakref.WeakKeyDictionary[
+    asyncio.AbstractEventLoop, asyncio.Semaphore
+] = weakref.WeakKeyDictionary()
+
+_executor: ProcessPoolExecutor | None = None
+_executor_lock = Lock()
+
+
+def _hash(password: str) -> str:
+    return password_context.hash(password)
+
+
+def _verify_and_update(password: str, hashed_password: str) -> tuple[bool, str | None]:
+    return password_context.verify_and_update(password, hashed_password)
+
+
+def get_executor() -> ProcessPoolExecutor:
+    global _executor
+
+    with _executor_lock:
+        if _executor is None:
+            # Workers are spawned rather than forked, the API process is multi-threaded
+            _executor = ProcessPoolExecutor(
+                max_workers=config.PASSWORD_HASHING_WORKERS,
+                mp_context=multiprocessing.get_context("spawn"),
+            )
+
+        return _executor
+
+
+def run_in_hashing_pool(function: Callable[..., ReturnT], *args: Any) -> ReturnT:
+    """Runs a bcrypt operation in the dedicated process pool and waits for its result.
+
+    bcrypt is CPU bound: run on a thread of the API it competes for the GIL with every
+    other request. The caller only waits on the result, with the GIL released. When
+    ``PASSWORD_HASHING_QUEUE_SIZE`` operations are already pending, the request is
+    rejected with a 503 instead of piling up threads waiting for the pool.
+    """
+    if config.PASSWORD_HASHING_WORKERS <= 0:
+        return function(*args)
+
+    if not _pending_slots.acquire(timeout=config.PASSWORD_HASHING_QUEUE_TIMEOUT):
+        raise HTTPException(
+            status_code=HTTPStatus.SERVICE_UNAVAILABLE,
+            detail="Too many authentication requests",
+            headers={"Retry-After": "1"},
+        )
+
+    try:
+        future: Future[ReturnT] = get_executor().submit(function, *args)
+
+        return future.result()
+    finally:
+        _pending_slots.release()
+
+
+def get_async_pending_slots() -> asyncio.Semaphore:
+    loop = asyncio.get_running_loop()
+    slots = _async_pending_slots.get(loop)
+
+    if slots is None:
+        slots = _async_pending_slots[loop] = asyncio.Semaphore(
+            config.PASSWORD_HASHING_QUEUE_SIZE
+        )
+
+    return slots
+
+
+async def arun_in_hashing_pool(function: Callable[..., ReturnT], *args: Any) -> ReturnT:
+    """``run_in_hashing_pool`` for coroutines: the event loop keeps serving the other
+    requests while the operation waits for a slot of the queue then runs in the pool
+    (or, without pool, on the threadpool)."""
+    if config.PASSWORD_HASHING_WORKERS <= 0:
+        return await run_in_threadpool(function, *args)
+
+    slots = get_async_pending_slots()
+
+    if slots.locked():
+        try:
+            await asyncio.wait_for(
+                slots.acquire(), timeout=config.PASSWORD_HASHING_QUEUE_TIMEOUT
+            )
+        except TimeoutError:
+            raise HTTPException(
+                status_code=HTTPStatus.SERVICE_UNAVAILABLE,
+                detail="Too many authentication requests",
+                headers={"Retry-After": "1"},
+            )
+    else:
+        await slots.acquire()
+
+    try:
+        return await asyncio.wrap_future(get_executor().submit(function, *args))
+    finally:
+        slots.release()
+
+
+def hash_password(password: str) -> str:
+    return run_in_hashing_pool(_hash, password)
+
+
+def verify_password(password: str, hashed_password: str) -> tuple[bool, str | None]:
+    """Checks ``password`` against ``hashed_password``, also returns the upgraded hash
+    when ``hashed_password`` doesn't use the configured number of rounds."""
+    return run_in_hashing_pool(_verify_and_update, password, hashed_password)
+
+
+async def ahash_password(password: str) -> str:
+    return await arun_in_hashing_pool(_hash, password)
+
+
+async def averify_password(
+    password: str, hashed_password: str
+) -> tuple[bool, str | None]:
+    return await arun_in_hashing_pool(_verify_and_update, password, hashed_password)
@@ -1,5 +1,10 @@
+from sqlalchemy import Engine, Index, func, inspect, select, text
+from sqlalchemy.schema import CreateColumn
+
 from src.api.main import engine
+from src.database import search
 from src.database.common import BaseModel
+from src.database.models import LENDING_EXCLUSION_CONSTRAINT
 
 import argparse
 
@@ -11,10 +16,133 @@ def init_cmd_line() -> argparse.ArgumentParser:
     )
 
     parser.add_argument("-d", "--drop", action="store_true")
+    parser.add_argument(
+        "--lending-exclusion-constraint",
+        action="store_true",
+        help="Postgres only: reject overlapping active lendings of a book in database",
+    )
 
     return parser
 
 
+def add_missing_columns(bind: Engine) -> None:
+    """``create_all`` doesn't alter existing tables, this adds the columns declared
+    since they were created. New columns must be nullable or have a server default."""
+    preparer = bind.dialect.identifier_preparer
+
+    with bind.begin() as connection:
+        # Inspected through the connection altering the tables, SQLite connections
+        # may hold a stale schema otherwise
+        inspector = inspect(connection)
+
+        for table in BaseModel.metadata.sorted_tables:
+            if not inspector.has_table(table.name):
+                continue
+
+            existing_columns = {
+                column["name"] for column in inspector.get_columns(table.name)
+            }
+
+            for column in table.columns:
+                if column.name in existing_columns:
+                    continue
+
+                column_definition = CreateColumn(column).compile(dialect=bind.dialect)
+                connection.execute(
+                    text(
+                        f"ALTER TABLE {preparer.format_table(table)} "
+                        f"ADD COLUMN {column_definition}"
+                    )
+                )
+
+
+def find_duplicates(bind: Engine, index: Index) -> list[tuple]:
+    """Values repeated in the columns of the unique ``index``, which can't be created
+    until they're fixed. NULLs are distinct, they're never duplicates."""
+    columns = list(index.columns)
+
+    with bind.connect() as connection:
+        return [
+            tuple(row)
+            for row in connection.execute(
+                select(*columns)
+                .where(*(column.is_not(None) for column in columns))
+                .group_by(*columns)
+                .having(func.count() > 1)
+            )
+        ]
+
+
+def create_missing_indexes(bind: Engine) -> None:
+    """``create_all`` only creates the indexes of the tables it creates, this adds the
+    indexes declared since the existing tables were created.
+
+    Unique indexes are checked first: existing duplicates are reported rather than
+    failing halfway through the migration."""
+    inspector = inspect(bind)
+    missing_indexes = []
+
+    for table in BaseModel.metadata.sorted_tables:
+        existing_indexes = {
+            index["name"] for index in inspector.get_indexes(table.name)
+        }
+
+        missing_indexes.extend(
+            index for index in table.indexes if index.name not in existing_indexes
+        )
+
+    duplicates = {
+        index.name: find_duplicates(bind, index)
+        for index in missing_indexes
+        if index.unique
+    }
+
+    if any(duplicates.values()):
+        raise SystemExit(
+            "Duplicate values prevent the creation of unique indexes:\n"
+            + "\n".join(
+                f"  {name}: {', '.join('/'.join(map(str, value)) for value in values)}"
+                for name, values in duplicates.items()
+                if values
+            )
+        )
+
+    for index in missing_indexes:
+        index.create(bind=bind, checkfirst=True)
+
+
+def add_lending_exclusion_constraint(bind: Engine) -> None:
+    """Makes Postgres reject any active lending overlapping another active lending of
+    the same book, a safety net for concurrent reservations.
+
+    Periods are half-open (``[start_time, end_time)``) ranges, the same predicate as
+    ``Lending.overlaps``.
+    Columns are timestamps without time zone, hence ``tsrange``.
+    """
+    if bind.dialect.name != "postgresql":
+        raise SystemExit("The lending exclusion constraint requires Postgres")
+
+    with bind.begin() as connection:
+        constraint_exists = connection.execute(
+            text("SELECT 1 FROM pg_constraint WHERE conname = :name"),
+            {"name": LENDING_EXCLUSION_CONSTRAINT},
+        ).scalar()
+
+        if constraint_exists:
+            return
+
+        # Equality on an integer column within a GiST index
+        connection.execute(text("CREATE EXTENSION IF NOT EXISTS btree_gist"))
+        connection.execute(
+            text(
+                f"ALTER TABLE lending ADD CONSTRAINT {LENDING_EXCLUSION_CONSTRAINT} "
+                "EXCLUDE USING gist "
+                "(book_id WITH =, tsrange(start_time, end_time, '[)') WITH &&) "
+                "WHERE (is_active)"
+            )
+        )
+
+
 if __name__ == "__main__":
     args = init_cmd_line().parse_args()
 
@@ -23,3 +151,14 @@ if __name__ == "__main__":
 
     # Create only missing tables
     BaseModel.metadata.create_all(bind=engine, checkfirst=True)
+
+    add_missing_columns(engine)
+
+    create_missing_indexes(engine)
+
+    # Index the books written before the search index existed
+    with engine.begin() as connection:
+        search.refresh(connection)
+
+    if args.lending_exclusion_constraint:
+        add_lending_exclusion_constraint(engine)
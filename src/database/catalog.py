@@ -0,0 +1,256 @@
+import csv
+import time
+from typing import Any, Callable, Iterable, Iterator, Self
+
+from pydantic import ValidationError
+from sqlalchemy import insert, select, tuple_, update
+from sqlalchemy.orm import Session
+
+from src.api import config
+from src.database import search
+from src.database.models import Author, Book
+from src.schemas.catalog import CatalogRecordSchema
+
+# Line of a record in the file & the record, parsed (CSV) or not (NDJSON)
+RawRecord = tuple[int, dict[str, Any] | str]
+
+
+def read_csv(lines: Iterable[str]) -> Iterator[RawRecord]:
+    """Records of a CSV file with a header, ``lines`` must keep their line endings
+    (files opened with ``newline=""``) for quoted values spanning several lines.
+
+    Cells beyond the header are gathered under ``extra_columns``, rejected by the
+    validation of the record.
+    """
+    reader = csv.DictReader(lines, restkey="extra_columns")
+
+    for record in reader:
+        yield reader.line_num, record
+
+
+def read_ndjson(lines: Iterable[str]) -> Iterator[RawRecord]:
+    for line_number, line in enumerate(lines, start=1):
+        if line.strip():
+            yield line_number, line
+
+
+READERS: dict[str, Callable[[Iterable[str]], Iterator[RawRecord]]] = {
+    "csv": read_csv,
+    "ndjson": read_ndjson,
+}
+
+
+class CatalogImport:
+    """Imports catalog records (authors and their books) in batches, each batch being
+    written then committed with a few set based statements.
+
+    Authors are identified by their first & last names, books by their ISBN or, when
+    they don't have one, by their author & title: importing the same file again
+    updates the existing rows instead of creating duplicates. Invalid records are
+    skipped and reported.
+    """
+
+    def __init__(
+        self,
+        session: Session,
+        batch_size: int,
+        max_errors: int,
+        on_progress: Callable[["CatalogImport"], None] | None = None,
+    ) -> None:
+        self.session = session
+        self.batch_size = batch_size
+        self.max_errors = max_errors
+        self.on_progress = on_progress
+
+        self.records = 0
+        self.authors_created = 0
+        self.books_created = 0
+        self.books_updated = 0
+        self.errors_count = 0
+        self.errors: list[dict[str, Any]] = []
+        self.started_at = time.perf_counter()
+
+    def run(self, raw_records: Iterable[RawRecord]) -> Self:
+        self.started_at = time.perf_counter()
+        batch: list[CatalogRecordSchema] = []
+
+        for line, raw_record in raw_records:
+            self.records += 1
+
+            try:
+                record = (
+                    CatalogRecordSchema.model_validate_json(raw_record)
+                    if isinstance(raw_record, str)
+                    else CatalogRecordSchema.model_validate(raw_record)
+                )
+            except ValidationError as error:
+                self.add_error(line, error)
+                continue
+
+            batch.append(record)
+
+            if len(batch) >= self.batch_size:
+                self.write_batch(batch)
+                batch = []
+
+        if batch:
+            self.write_batch(batch)
+
+        return self
+
+    def add_error(self, line: int, error: ValidationError) -> None:
+        self.errors_count += 1
+
+        if len(self.errors) < self.max_errors:
+            detail = "; ".join(
+                f"{'.'.join(map(str, item['loc'])) or 'record'}: {item['msg']}"
+                for item in error.errors()
+            )
+            self.errors.append({"line": line, "detail": detail})
+
+    def write_batch(self, batch: list[CatalogRecordSchema]) -> None:
+        author_ids = self.upsert_authors(
+            {(record.author_first_name, record.author_last_name) for record in batch}
+        )
+
+        # Last occurrence wins within a batch
+        books: dict[tuple[Any, ...], dict[str, Any]] = {}
+
+        for record in batch:
+            if record.title is None:
+                continue
+
+            author_id = author_ids[(record.author_first_name, record.author_last_name)]
+            key = (record.isbn,) if record.isbn else (author_id, record.title)
+
+            books[key] = {
+                "title": record.title,
+                "author_id": author_id,
+                "isbn": record.isbn,
+            }
+
+        self.upsert_books(books)
+
+        # Written with bulk statements, the session listeners don't see them: every
+        # book of the authors of the batch is reindexed
+        search.refresh(self.session.connection(), author_ids=set(author_ids.values()))
+
+        self.session.commit()
+
+        if self.on_progress is not None:
+            self.on_progress(self)
+
+    def upsert_authors(self, names: set[tuple[str, str]]) -> dict[tuple[str, str], int]:
+        """Ids of the authors named ``names``, creating the missing ones."""
+        query = (
+            select(Author.first_name, Author.last_name, Author.id).where(
+                tuple_(Author.first_name, Author.last_name).in_(names)
+            )
+            # The oldest author when names are duplicated in database
+            .order_by(Author.id.desc())
+        )
+
+        author_ids = {
+            (first_name, last_name): author_id
+            for first_name, last_name, author_id in self.session.execute(query)
+        }
+
+        missing_names = names - author_ids.keys()
+
+        if missing_names:
+            created_authors = self.session.execute(
+                insert(Author).returning(
+                    Author.first_name, Author.last_name, Author.id
+                ),
+                [
+                    {"first_name": first_name, "last_name": last_name}
+                    for first_name, last_name in missing_names
+                ],
+            )
+
+            for first_name, last_name, author_id in created_authors:
+                author_ids[(first_name, last_name)] = author_id
+
+            self.authors_created += len(missing_names)
+
+        return author_ids
+
+    def upsert_books(self, books: dict[tuple[Any, ...], dict[str, Any]]) -> None:
+        isbns = [key[0] for key in books if len(key) == 1]
+        authors_titles = [key for key in books if len(key) == 2]
+
+        # Natural key: id, version, title, author id
+        existing_books: dict[tuple[Any, ...], tuple[int, int, str, int]] = {}
+
+        if isbns:
+            query = select(
+                Book.isbn, Book.id, Book.version, Book.title, Book.author_id
+            ).where(Book.isbn.in_(isbns))
+            for isbn, book_id, version, title, author_id in self.session.execute(query):
+                existing_books[(isbn,)] = (book_id, version, title, author_id)
+
+        if authors_titles:
+            query = select(Book.author_id, Book.title, Book.id, Book.version).where(
+                tuple_(Book.author_id, Book.title).in_(authors_titles)
+            )
+            for author_id, title, book_id, version in self.session.execute(query):
+                existing_books[(author_id, title)] = (
+                    book_id,
+                    version,
+                    title,
+                    author_id,
+                )
+
+        new_books = []
+        changed_books = []
+
+        for key, values in books.items():
+            existing_book = existing_books.get(key)
+
+            if existing_book is None:
+                new_books.append(values)
+            elif existing_book[2:] != (values["title"], values["author_id"]):
+                # The current version is checked & bumped by the ORM
+                changed_books.append(
+                    {"id": existing_book[0], "version": existing_book[1], **values}
+                )
+
+        if new_books:
+            self.session.execute(insert(Book), new_books)
+            self.books_created += len(new_books)
+
+        if changed_books:
+            # Bulk UPDATE by primary key
+            self.session.execute(update(Book), changed_books)
+            self.books_updated += len(changed_books)
+
+    def statistics(self) -> dict[str, Any]:
+        seconds = time.perf_counter() - self.started_at
+
+        return {
+            "records": self.records,
+            "authors_created": self.authors_created,
+            "books_created": self.books_created,
+            "books_updated": self.books_updated,
+            "errors_count": self.errors_count,
+            "errors": self.errors,
+            "seconds": seconds,
+            "records_per_second": self.records / seconds if seconds else 0.0,
+        }
+
+
+def import_catalog(
+    lines: Iterable[str],
+    file_format: str,
+    session: Session,
+    on_progress: Callable[[CatalogImport], None] | None = None,
+) -> CatalogImport:
+    """Imports a CSV or NDJSON (``file_format``) catalog read line by line."""
+    catalog_import = CatalogImport(
+        session,
+        batch_size=config.CATALOG_IMPORT_BATCH_SIZE,
+        max_errors=config.CATALOG_IMPORT_MAX_ERRORS,
+        on_progress=on_progress,
+    )
+
+    return catalog_import.run(READERS[file_format](lines))
@@ -1,5 +1,10 @@
+from typing import Any, Callable, TypeVar
+
+from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.orm import DeclarativeBase
 
+ReturnT = TypeVar("ReturnT")
+
 
 class BaseModel(DeclarativeBase):
     """This class subclasses the DeclarativeBase based on SQLA's own tutorial."""
@@ -9,3 +14,16 @@ class BaseModel(DeclarativeBase):
 
 class LendingException(Exception):
     pass
+
+
+async def run_sync(
+    session: AsyncSession,
+    method: Callable[..., ReturnT],
+    *args: Any,
+    **kwargs: Any,
+) -> ReturnT:
+    """Awaits a sync model method through ``AsyncSession.run_sync``, the method gets
+    the underlying sync session as its ``session`` argument."""
+    return await session.run_sync(
+        lambda sync_session: method(*args, session=sync_session, **kwargs)
+    )
@@ -0,0 +1,217 @@
+import bisect
+import time
+import uuid
+from collections import defaultdict
+from datetime import datetime
+from threading import Lock
+from typing import Any, Callable, Iterable
+
+from src.api import config
+
+# Active lending of a book: (start_time, end_time, lending id)
+Period = tuple[datetime, datetime, uuid.UUID]
+
+
+class IntervalIndexInconsistency(AssertionError):
+    """Raised in consistency check mode when the index and the database disagree."""
+
+
+class BookPeriods:
+    """Active lending periods of a single book, sorted by start time.
+
+    ``max_ends[i]`` is the latest end time among the ``i + 1`` first periods: the
+    periods starting before a given time are a prefix of the list, whether one of them
+    ends after another given time is then answered with two lookups.
+    """
+
+    def __init__(self, periods: Iterable[Period] = ()) -> None:
+        self.periods: list[Period] = sorted(periods)
+        # Periods committed by other processes since then are missing
+        self.loaded_at = time.monotonic()
+        self._reindex()
+
+    def _reindex(self) -> None:
+        self.starts = [period[0] for period in self.periods]
+        self.max_ends: list[datetime] = []
+
+        for _, end_time, _ in self.periods:
+            self.max_ends.append(
+                max(self.max_ends[-1], end_time) if self.max_ends else end_time
+            )
+
+    def add(self, period: Period) -> None:
+        bisect.insort(self.periods, period)
+        self._reindex()
+
+    def remove(self, lending_id: uuid.UUID) -> None:
+        periods = [period for period in self.periods if period[2] != lending_id]
+
+        if len(periods) != len(self.periods):
+            self.periods = periods
+            self._reindex()
+
+    def overlaps(
+        self,
+        start_time: datetime,
+        end_time: datetime,
+        exclude_id: uuid.UUID | None = None,
+    ) -> bool:
+        """Same predicate as ``Lending.overlaps``: a period intersects
+        ``start_time`` - ``end_time`` when it starts before ``end_time`` and ends after
+        ``start_time``."""
+        candidates = bisect.bisect_left(self.starts, end_time)
+
+        if candidates == 0 or self.max_ends[candidates - 1] <= start_time:
+            return False
+
+        if exclude_id is None:
+            return True
+
+        return any(
+            period_end > start_time and lending_id != exclude_id
+            for _, period_end, lending_id in self.periods[:candidates]
+        )
+
+
+class LendingIntervalIndex:
+    """In-process index of the active lendings of each book, used to reject
+    reservations that obviously conflict without a round trip to the database.
+
+    The index only ever says "conflict" or "don't know": reservations it lets through
+    are still checked by the database, which stays the source of truth. Books are
+    loaded lazily on their first lookup and kept up to date with the lendings committed
+    by this process (see the session listeners in ``models.py``). Bulk statements
+    bypass those listeners, code issuing them must call ``invalidate``.
+
+    Other processes (API workers, maintenance jobs) write to the database too: a book
+    is reloaded on its first lookup ``ttl`` seconds after it was loaded, a lending they
+    returned or closed keeps rejecting reservations until then at most.
+
+    In consistency check mode, every lookup is compared to the database and a
+    mismatch raises ``IntervalIndexInconsistency``.
+    """
+
+    def __init__(
+        self, enabled: bool, check_consistency: bool = False, ttl: float = 5.0
+    ) -> None:
+        self.enabled = enabled
+        self.check_consistency = check_consistency
+        self.ttl = ttl
+
+        self._lock = Lock()
+        self._books: dict[int, BookPeriods] = {}
+        # Bumped on every change of a book: a load racing with a commit is discarded
+        self._versions: defaultdict[int, int] = defaultdict(int)
+        self.hits = 0
+        self.loads = 0
+
+    def conflicts(
+        self,
+        book_id: int,
+        start_time: datetime,
+        end_time: datetime,
+        load: Callable[[], Iterable[Period]],
+        exclude_id: uuid.UUID | None = None,
+    ) -> bool:
+        """Tells if an indexed lending of ``book_id`` intersects the given period, the
+        periods of the book are loaded with ``load`` if they aren't indexed yet, or
+        were loaded more than ``ttl`` seconds ago."""
+        with self._lock:
+            book_periods = self._books.get(book_id)
+
+            if (
+                book_periods is not None
+                and time.monotonic() - book_periods.loaded_at < self.ttl
+            ):
+                self.hits += 1
+                return book_periods.overlaps(start_time, end_time, exclude_id)
+
+            version = self._versions[book_id]
+
+        loaded_at = time.monotonic()
+        book_periods = BookPeriods(load())
+        book_periods.loaded_at = loaded_at
+
+        with self._lock:
+            self.loads += 1
+
+            if self._versions[book_id] == version:
+                self._books[book_id] = book_periods
+
+        return book_periods.overlaps(start_time, end_time, exclude_id)
+
+    def rebuild(self, periods: Iterable[tuple[int, Period]]) -> None:
+        """Replaces the whole index with ``(book id, period)`` pairs."""
+        books: defaultdict[int, list[Period]] = defaultdict(list)
+
+        for book_id, period in periods:
+            books[book_id].append(period)
+
+        with self._lock:
+            for book_id in self._books.keys() | books.keys():
+                self._versions[book_id] += 1
+
+            self._books = {
+                book_id: BookPeriods(book_periods)
+                for book_id, book_periods in books.items()
+            }
+
+    def apply(
+        self,
+        lending_id: uuid.UUID,
+        book_ids: Iterable[int],
+        period: tuple[int, datetime, datetime] | None,
+    ) -> None:
+        """Records a committed change of a lending: it's removed from ``book_ids``
+        then, when ``period`` (book id, start & end times) is given, indexed again."""
+        with self._lock:
+            for book_id in book_ids:
+                self._versions[book_id] += 1
+
+                book_periods = self._books.get(book_id)
+                if book_periods is not None:
+                    book_periods.remove(lending_id)
+
+            if period is None:
+                return
+
+            book_id, start_time, end_time = period
+
+            self._versions[book_id] += 1
+
+            book_periods = self._books.get(book_id)
+            if book_periods is not None:
+                book_periods.add((start_time, end_time, lending_id))
+
+    def invalidate(self, book_id: int | None = None) -> None:
+        """Drops ``book_id`` (every book by default), reloaded on its next lookup."""
+        with self._lock:
+            book_ids = list(self._books) if book_id is None else [book_id]
+
+            for invalidated_id in book_ids:
+                self._versions[invalidated_id] += 1
+                self._books.pop(invalidated_id, None)
+
+    def clear(self) -> None:
+        self.invalidate()
+
+        with self._lock:
+            self.hits = 0
+            self.loads = 0
+
+    def statistics(self) -> dict[str, Any]:
+        with self._lock:
+            return {
+                "enabled": self.enabled,
+                "books": len(self._books),
+                "periods": sum(len(book.periods) for book in self._books.values()),
+                "hits": self.hits,
+                "loads": self.loads,
+            }
+
+
+lending_intervals = LendingIntervalIndex(
+    enabled=config.LENDING_INTERVAL_INDEX,
+    check_consistency=config.LENDING_INTERVAL_INDEX_CHECK,
+    ttl=config.LENDING_INTERVAL_INDEX_TTL,
+)
@@ -0,0 +1,182 @@
+import logging
+import time
+from datetime import datetime, timedelta
+from typing import Any, Callable
+
+from sqlalchemy import (
+    ColumnElement,
+    DateTime,
+    delete,
+    insert,
+    literal,
+    or_,
+    select,
+    update,
+)
+from sqlalchemy.orm import Session
+
+from src.api import config
+from src.database.intervals import lending_intervals
+from src.database.models import Lending, LendingArchive
+
+# Maintenance jobs of the lending table, run from the command line
+# (``src/maintenance.py``) or periodically by the API (``scheduled_jobs``). Jobs work
+# in batches, each one in its own short transaction: they can run along with the API
+# and an interrupted run is simply resumed by the next one.
+
+logger = logging.getLogger(__name__)
+
+ARCHIVED_COLUMNS = (
+    "id",
+    "user_id",
+    "book_id",
+    "start_time",
+    "end_time",
+    "is_active",
+    "return_time",
+)
+
+
+def archivable(cutoff: datetime) -> ColumnElement[bool]:
+    """Lendings finished before ``cutoff``: returned, or ended (inactive lendings
+    that were never returned included), through ``ix_lending_return_time`` &
+    ``ix_lending_end_time``."""
+    return or_(Lending.return_time < cutoff, Lending.end_time < cutoff)
+
+
+def archive_lendings(session: Session, cutoff: datetime, batch_size: int) -> int:
+    """Moves the lendings finished before ``cutoff`` to ``lending_archive``,
+    ``batch_size`` lendings per transaction. Returns how many were archived."""
+    archived = 0
+    started_at = time.perf_counter()
+
+    while True:
+        batch = session.execute(
+            select(Lending.id, Lending.book_id)
+            .where(archivable(cutoff))
+            .limit(batch_size)
+            # Lendings being updated are left for the next run (Postgres)
+            .with_for_update(skip_locked=True)
+        ).all()
+
+        if not batch:
+            break
+
+        lending_ids = [lending_id for lending_id, _ in batch]
+
+        session.execute(
+            insert(LendingArchive).from_select(
+                [*ARCHIVED_COLUMNS, "archived_at"],
+                select(
+                    *(getattr(Lending, column) for column in ARCHIVED_COLUMNS),
+                    literal(datetime.now(), DateTime),
+                ).where(Lending.id.in_(lending_ids)),
+            )
+        )
+        session.execute(
+            delete(Lending)
+            .where(Lending.id.in_(lending_ids))
+            .execution_options(synchronize_session=False)
+        )
+        session.commit()
+
+        # Deleted with bulk statements, the session listeners don't see them
+        for book_id in {book_id for _, book_id in batch}:
+            lending_intervals.invalidate(book_id)
+
+        archived += len(batch)
+
+        logger.info("%d lendings archived", archived)
+
+        if len(batch) < batch_size:
+            break
+
+    logger.info(
+        "Lendings finished before %s archived: %d in %.1fs",
+        cutoff.isoformat(),
+        archived,
+        time.perf_counter() - started_at,
+    )
+
+    return archived
+
+
+def close_overdue_lendings(session: Session, now: datetime, batch_size: int) -> int:
+    """Deactivates the active lendings that ended before ``now``, ``batch_size``
+    lendings per ``UPDATE`` & transaction. Returns how many were closed.
+
+    They're left unreturned (no ``return_time``): only the loan is over. Each batch
+    is picked through ``ix_lending_active_end_time``, only its rows are locked.
+    """
+    closed = 0
+    started_at = time.perf_counter()
+
+    while True:
+        overdue = (
+            select(Lending.id)
+            .where(Lending.is_active.is_(True), Lending.end_time < now)
+            .limit(batch_size)
+            # Lendings being updated are left for the next run (Postgres)
+            .with_for_update(skip_locked=True)
+        )
+
+        book_ids = (
+            session.execute(
+                update(Lending)
+                .where(Lending.id.in_(overdue))
+                .values(is_active=False)
+                .returning(Lending.book_id)
+                .execution_options(synchronize_session=False)
+            )
+            .scalars()
+            .all()
+        )
+        session.commit()
+
+        # Updated with bulk statements, the session listeners don't see them
+        for book_id in set(book_ids):
+            lending_intervals.invalidate(book_id)
+
+        closed += len(book_ids)
+
+        if len(book_ids) < batch_size:
+            break
+
+        logger.info("%d overdue lendings closed", closed)
+
+    logger.info(
+        "Lendings overdue at %s closed: %d in %.1fs",
+        now.isoformat(),
+        closed,
+        time.perf_counter() - started_at,
+    )
+
+    return closed
+
+
+def run_overdue_sweep(session: Session) -> int:
+    """``close_overdue_lendings`` of the lendings overdue now."""
+    return close_overdue_lendings(
+        session, now=datetime.now(), batch_size=config.LENDING_SWEEP_BATCH_SIZE
+    )
+
+
+def run_lending_archive(session: Session) -> int:
+    """``archive_lendings`` of the lendings finished for
+    ``config.LENDING_ARCHIVE_AFTER_DAYS``."""
+    return archive_lendings(
+        session,
+        cutoff=datetime.now() - timedelta(days=config.LENDING_ARCHIVE_AFTER_DAYS),
+        batch_size=config.LENDING_ARCHIVE_BATCH_SIZE,
+    )
+
+
+def scheduled_jobs() -> list[tuple[float, Callable[[Session], Any]]]:
+    """Jobs run by the API (see ``src.api.main.lifespan``) along with their interval
+    in seconds, the ones with an interval of 0 are disabled."""
+    jobs: list[tuple[float, Callable[[Session], Any]]] = [
+        (config.LENDING_SWEEP_INTERVAL, run_overdue_sweep),
+        (config.LENDING_ARCHIVE_INTERVAL, run_lending_archive),
+    ]
+
+    return [(interval, job) for interval, job in jobs if interval > 0]
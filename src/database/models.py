@@ -1,27 +1,112 @@
 import uuid
 from datetime import datetime
 from http import HTTPStatus
-from typing import Self, Sequence
+from typing import Any, Callable, Iterable, Iterator, Self, Sequence
 
 from fastapi import HTTPException
-from passlib.context import CryptContext
 from sqlalchemy import (
     ColumnExpressionArgument,
+    DateTime,
     ForeignKey,
+    Index,
+    Row,
+    Select,
     String,
     and_,
+    case,
+    cast,
     delete,
+    event,
+    func,
+    insert,
+    inspect,
+    literal,
+    literal_column,
+    null,
     or_,
     select,
+    union_all,
+    update,
 )
-from sqlalchemy.orm import Mapped, Session, mapped_column, relationship
+from sqlalchemy.orm import (
+    Bundle,
+    Mapped,
+    Session,
+    aliased,
+    joinedload,
+    mapped_column,
+    query_expression,
+    relationship,
+    with_expression,
+)
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm.interfaces import ORMOption
 from sqlalchemy.ext.hybrid import hybrid_property
 from sqlalchemy import type_coerce, ColumnElement, Boolean
 
-from src.database.common import BaseModel
+from src.authentication.hashing import averify_password, hash_password, verify_password
+from src.database import search
+from src.database.common import BaseModel, run_sync
+from src.database.intervals import (
+    IntervalIndexInconsistency,
+    Period,
+    lending_intervals,
+)
 from src.schemas.books import AuthorSchema, BookSchema
 from src.schemas.user import UserSchema
 
+# Optional Postgres constraint, see ``bootstrap_database_schema.py``
+LENDING_EXCLUSION_CONSTRAINT = "lending_active_period_excl"
+
+# Key of the lending changes flushed by a session, indexed once committed
+PENDING_LENDINGS = "pending_lendings"
+
+
+class NestedRow(Bundle):
+    """Columns fetched as a nested row named after the bundle, whose attributes keep
+    the names of the columns (``Bundle`` deduplicates them across the statement:
+    ``id`` would become ``id_1``)."""
+
+    def create_row_processor(
+        self,
+        query: Select[Any],
+        procs: Sequence[Callable[[Row[Any]], Any]],
+        labels: Sequence[str],
+    ) -> Callable[[Row[Any]], Any]:
+        return super().create_row_processor(query, procs, self.c.keys())
+
+
+def is_lending_overlap_violation(error: IntegrityError) -> bool:
+    """Tells if ``error`` was raised by ``LENDING_EXCLUSION_CONSTRAINT``."""
+    # SQLSTATE of exclusion violations
+    return getattr(error.orig, "pgcode", None) == "23P01"
+
+
+def bulk_delete_ids(
+    model: type[BaseModel], ids: Iterable[int], session: Session, batch_size: int
+) -> list[int]:
+    """Deletes the rows of ``model`` by id, ``batch_size`` ids per ``DELETE ...
+    RETURNING`` statement, returns the ids that were deleted.
+
+    Ids are sorted: concurrent deletes lock the rows in the same order, they can't
+    deadlock each other.
+    """
+    sorted_ids = sorted(set(ids))
+    deleted_ids: list[int] = []
+    model_id = model.__table__.c.id
+
+    for batch_start in range(0, len(sorted_ids), batch_size):
+        query = (
+            delete(model)
+            .where(model_id.in_(sorted_ids[batch_start : batch_start + batch_size]))
+            .returning(model_id)
+        )
+
+        deleted_ids.extend(session.execute(query).scalars())
+
+    return sorted(deleted_ids)
+
 
 class Author(BaseModel):
     __tablename__ = "author"
@@ -33,6 +118,12 @@ class Author(BaseModel):
 
     books: Mapped[list["Book"]] = relationship(back_populates="author")
 
+    # Bumped by every ORM update (``version_id_col``), ETags are derived from it. Bulk
+    # UPDATE statements must bump it themselves.
+    version: Mapped[int] = mapped_column(server_default="1")
+
+    __mapper_args__ = {"version_id_col": version}
+
     @classmethod
     def exists(cls, author_id: int, session: Session) -> bool:
         res: bool = session.query(
@@ -45,21 +136,124 @@ class Author(BaseModel):
     def get(cls, author_id: int, session: Session) -> "Self | None":
         return session.query(cls).filter(cls.id == author_id).first()
 
+    @classmethod
+    def existing_ids(cls, author_ids: Iterable[int], session: Session) -> set[int]:
+        """Subset of ``author_ids`` that exist, in a single query."""
+        query = select(cls.id).where(cls.id.in_(set(author_ids)))
+
+        return set(session.execute(query).scalars())
+
     @classmethod
     def delete(cls, author_id: int, session: Session) -> bool:
-        author_exists = cls.exists(author_id, session)
-        if not author_exists:
-            return False
+        """Deletes the author with a single ``DELETE ... RETURNING``, tells if it
+        existed. The caller commits the session."""
+        return bool(cls.bulk_delete([author_id], session, batch_size=1))
 
-        query = delete(cls).where(cls.id == author_id)
+    @classmethod
+    def bulk_delete(
+        cls, author_ids: Iterable[int], session: Session, batch_size: int
+    ) -> list[int]:
+        """Deletes authors with ``DELETE ... RETURNING`` statements of ``batch_size``
+        ids, without loading them, in the transaction of ``session``. Returns the ids
+        of the deleted authors, the others don't exist."""
+        return bulk_delete_ids(cls, author_ids, session, batch_size)
 
-        session.execute(query)
+    @classmethod
+    def get_authors_list(
+        cls,
+        session: Session,
+        after_id: int | None = None,
+        limit: int | None = None,
+    ) -> list[Self]:
+        """Gets authors ordered by id, starting after ``after_id`` (keyset
+        pagination)."""
+        query = select(cls).order_by(cls.id).limit(limit)
 
-        return True
+        if after_id is not None:
+            query = query.where(cls.id > after_id)
+
+        return list(session.execute(query).scalars().fetchall())
+
+    @classmethod
+    def rows_query(cls) -> Select[Any]:
+        """Plain columns of the authors (``AuthorDumpSchema`` & version), for the read
+        only endpoints: rows are tuples, no ORM instance is built or tracked."""
+        return select(cls.id, cls.first_name, cls.last_name, cls.version).order_by(
+            cls.id
+        )
+
+    @classmethod
+    def get_authors_rows(
+        cls,
+        session: Session,
+        after_id: int | None = None,
+        limit: int | None = None,
+    ) -> Sequence[Row[Any]]:
+        """Rows of ``rows_query`` ordered by id, starting after ``after_id``."""
+        query = cls.rows_query().limit(limit)
+
+        if after_id is not None:
+            query = query.where(cls.id > after_id)
+
+        return session.execute(query).all()
 
     @classmethod
-    def get_authors_list(cls, session: Session) -> list[Self]:
-        return list(session.execute(select(cls)).scalars().fetchall())
+    def get_authors_counts_rows(
+        cls,
+        session: Session,
+        now: datetime,
+        after_id: int | None = None,
+        limit: int | None = None,
+    ) -> Sequence[Row[Any]]:
+        """Rows of ``get_authors_rows`` along with the number of books of each author
+        (``books_count``) and how many of them are lent at ``now``
+        (``lent_books_count``), in a single ``GROUP BY`` query.
+
+        The page of authors is selected first, only its books & lendings are joined
+        (through ``ix_book_author_id_id`` & ``ix_lending_book_id_is_active_period``).
+        """
+        page_query = select(cls.id, cls.first_name, cls.last_name, cls.version)
+
+        if after_id is not None:
+            page_query = page_query.where(cls.id > after_id)
+
+        page = page_query.order_by(cls.id).limit(limit).subquery("author_page")
+
+        query = (
+            select(
+                page.c.id,
+                page.c.first_name,
+                page.c.last_name,
+                page.c.version,
+                func.count(Book.id.distinct()).label("books_count"),
+                func.count(Lending.book_id.distinct()).label("lent_books_count"),
+            )
+            .select_from(page)
+            .outerjoin(Book, Book.author_id == page.c.id)
+            .outerjoin(
+                Lending,
+                and_(
+                    Lending.book_id == Book.id,
+                    Lending.is_active.is_(True),
+                    Lending.start_time <= now,
+                    Lending.end_time > now,
+                ),
+            )
+            .group_by(page.c.id, page.c.first_name, page.c.last_name, page.c.version)
+            .order_by(page.c.id)
+        )
+
+        return session.execute(query).all()
+
+    @classmethod
+    def stream_rows(
+        cls, session: Session, batch_size: int
+    ) -> Iterator[Sequence[Row[Any]]]:
+        """Every row of ``rows_query``, in partitions of ``batch_size`` fetched one at a
+        time (server side cursor on the backends supporting it)."""
+        query = cls.rows_query().execution_options(yield_per=batch_size)
+
+        yield from session.execute(query).partitions()
 
     @classmethod
     def create(cls, validated_data: AuthorSchema, session: Session) -> Self:
@@ -69,9 +263,69 @@ class Author(BaseModel):
 
         return instance
 
+    @classmethod
+    def patch(
+        cls, author_id: int, changes: dict[str, Any], session: Session
+    ) -> Row[Any] | None:
+        """Writes ``changes`` (column names & values) with a single ``UPDATE ...
+        RETURNING``, bumping ``version``: the author isn't loaded. Returns the row of
+        ``rows_query`` (read without any change), ``None`` if the author doesn't
+        exist."""
+        columns = (cls.id, cls.first_name, cls.last_name, cls.version)
+
+        if not changes:
+            return session.execute(select(*columns).where(cls.id == author_id)).first()
+
+        query = (
+            update(cls)
+            .where(cls.id == author_id)
+            # ORM bulk UPDATEs don't bump ``version_id_col``
+            .values(**changes, version=cls.version + 1)
+            .returning(*columns)
+        )
+
+        row = session.execute(query).first()
+
+        if row is not None:
+            # Written with a bulk statement, the session listeners don't see it
+            search.refresh(session.connection(), author_ids=[author_id])
+
+        return row
+
+    # Awaitable equivalents, for the async mode (``config.SQLALCHEMY_ASYNC``)
+
+    @classmethod
+    async def aexists(cls, author_id: int, session: AsyncSession) -> bool:
+        return await run_sync(session, cls.exists, author_id)
+
+    @classmethod
+    async def aget(cls, author_id: int, session: AsyncSession) -> "Self | None":
+        return await run_sync(session, cls.get, author_id)
+
+    @classmethod
+    async def adelete(cls, author_id: int, session: AsyncSession) -> bool:
+        return await run_sync(session, cls.delete, author_id)
+
+    @classmethod
+    async def aget_authors_list(
+        cls,
+        session: AsyncSession,
+        after_id: int | None = None,
+        limit: int | None = None,
+    ) -> list[Self]:
+        return await run_sync(
+            session, cls.get_authors_list, after_id=after_id, limit=limit
+        )
+
 
 class Book(BaseModel):
     __tablename__ = "book"
+    __table_args__ = (
+        # Several books without ISBN are allowed, NULLs are distinct
+        Index("ix_book_isbn", "isbn", unique=True),
+        # Books of an author, in the order of the keyset pagination
+        Index("ix_book_author_id_id", "author_id", "id"),
+    )
 
     id: Mapped[int] = mapped_column(primary_key=True)
 
@@ -83,15 +337,32 @@ class Book(BaseModel):
 
     current_lends: Mapped[list["Lending"]] = relationship(back_populates="book")
 
+    # Bumped by every ORM update (``version_id_col``), ETags are derived from it. Bulk
+    # UPDATE statements must bump it themselves.
+    version: Mapped[int] = mapped_column(server_default="1")
+
+    __mapper_args__ = {"version_id_col": version}
+
+    # Availability computed by the database when the book is loaded through
+    # ``Book.read_options``, ``None`` otherwise.
+    available_now: Mapped[bool | None] = query_expression()
+
     @hybrid_property
     def available(self) -> bool:
+        if self.available_now is not None:
+            return self.available_now
+
         if not self.current_lends:
             return True
 
         now = datetime.now()
 
         for lending in self.current_lends:
-            if lending.start_time <= now and now <= lending.end_time:
+            if (
+                lending.is_active
+                and lending.start_time <= now
+                and now < lending.end_time
+            ):
                 return False
 
         return True
@@ -99,22 +370,194 @@ class Book(BaseModel):
     @available.expression
     @classmethod
     def available(cls) -> ColumnElement[bool]:
+        return cls.available_at(datetime.now())
+
+    @classmethod
+    def available_at(cls, now: datetime) -> ColumnElement[bool]:
+        """SQL expression telling if a book isn't covered by any active lending at
+        ``now``, evaluated as a correlated ``NOT EXISTS`` subquery."""
+        # Aliased so that the subquery stays correlated to ``book`` only, even when
+        # the enclosing query selects from ``lending`` too.
+        lending = aliased(Lending)
+
         return type_coerce(
-            select(Lending.id)
+            ~select(lending.id)
             .where(
-                Lending.start_time <= datetime.now(), Lending.end_time >= datetime.now()
+                lending.book_id == cls.id,
+                lending.is_active.is_(True),
+                lending.start_time <= now,
+                lending.end_time > now,
             )
+            .correlate_except(lending)
             .exists(),
             Boolean,
         )
 
     @classmethod
-    def get(cls, book_id: int, session: Session) -> "Book | None":
-        return session.execute(select(cls).filter(cls.id == book_id)).scalar()
+    def read_options(
+        cls,
+        now: datetime | None,
+        with_author: bool = True,
+    ) -> list[ORMOption]:
+        """Loader options fetching the author (unless ``with_author`` is false) and,
+        when ``now`` is given, the availability of the books in the same query, instead
+        of lazy loading ``author`` and ``current_lends`` for each book."""
+        options: list[ORMOption] = [joinedload(cls.author)] if with_author else []
+
+        if now is not None:
+            options.append(with_expression(cls.available_now, cls.available_at(now)))
+
+        return options
+
+    @classmethod
+    def get(
+        cls,
+        book_id: int,
+        session: Session,
+        now: datetime | None = None,
+        with_author: bool = True,
+    ) -> "Book | None":
+        """Gets a book along with, in the same query, its author (unless
+        ``with_author`` is false) and, when ``now`` is given, its availability at
+        ``now``."""
+        query = (
+            select(cls)
+            .filter(cls.id == book_id)
+            .options(*cls.read_options(now, with_author=with_author))
+        )
+
+        if now is not None:
+            # ``with_expression`` only applies to freshly loaded objects, refresh the
+            # ones already in the identity map.
+            query = query.execution_options(populate_existing=True)
+
+        return session.execute(query).scalar()
 
     @classmethod
-    def get_all(cls, session: Session) -> "list[Book]":
-        return list(session.execute(select(cls)).scalars())
+    def get_all(
+        cls,
+        session: Session,
+        after_id: int | None = None,
+        limit: int | None = None,
+        now: datetime | None = None,
+        with_author: bool = True,
+    ) -> "list[Book]":
+        """Gets books ordered by id, starting after ``after_id`` (keyset pagination).
+
+        The author (unless ``with_author`` is false) and, when ``now`` is given, the
+        availability at ``now`` of every book are loaded by the same query.
+        """
+        query = (
+            select(cls)
+            .order_by(cls.id)
+            .limit(limit)
+            .options(*cls.read_options(now, with_author=with_author))
+        )
+
+        if now is not None:
+            # ``with_expression`` only applies to freshly loaded objects, refresh the
+            # ones already in the identity map.
+            query = query.execution_options(populate_existing=True)
+
+        if after_id is not None:
+            query = query.where(cls.id > after_id)
+
+        return list(session.execute(query).scalars())
+
+    @classmethod
+    def rows_query(
+        cls,
+        now: datetime | None = None,
+        with_author: bool = True,
+    ) -> Select[Any]:
+        """Plain columns of the books (``BookDumpSchema`` & version) for the read only
+        endpoints: rows are tuples, no ORM instance is built or tracked.
+
+        The author is joined in as a nested ``author`` row (unless ``with_author`` is
+        false) and, when ``now`` is given, the availability at ``now`` is computed as
+        an ``available`` column: rows have the attributes of ``Book`` instances.
+        """
+        columns: list[Any] = [cls.id, cls.title, cls.author_id, cls.isbn, cls.version]
+
+        if with_author:
+            columns.append(
+                NestedRow(
+                    "author",
+                    Author.first_name,
+                    Author.last_name,
+                    Author.id,
+                    Author.version,
+                )
+            )
+
+        if now is not None:
+            columns.append(cls.available_at(now).label("available"))
+
+        query = select(*columns).order_by(cls.id)
+
+        if with_author:
+            query = query.join(cls.author)
+
+        return query
+
+    @classmethod
+    def get_all_rows(
+        cls,
+        session: Session,
+        after_id: int | None = None,
+        limit: int | None = None,
+        now: datetime | None = None,
+        with_author: bool = True,
+        filters: Sequence[ColumnExpressionArgument[bool]] = (),
+    ) -> Sequence[Row[Any]]:
+        """Rows of ``rows_query`` that fall under ``filters``, ordered by id, starting
+        after ``after_id``."""
+        query = (
+            cls.rows_query(now, with_author=with_author).where(*filters).limit(limit)
+        )
+
+        if after_id is not None:
+            query = query.where(cls.id > after_id)
+
+        return session.execute(query).all()
+
+    @classmethod
+    def search_rows(
+        cls,
+        terms: Sequence[str],
+        session: Session,
+        offset: int = 0,
+        limit: int | None = None,
+        now: datetime | None = None,
+        with_author: bool = True,
+    ) -> Sequence[Row[Any]]:
+        """Rows of ``rows_query`` of the books whose title or author name match every
+        term (as a prefix), best matches first. See ``src.database.search``."""
+        matches = search.matches(session.get_bind().dialect.name, terms).subquery()
+
+        query = (
+            cls.rows_query(now, with_author=with_author)
+            .join(matches, matches.c.book_id == cls.id)
+            .order_by(None)
+            .order_by(matches.c.rank, cls.id)
+            .offset(offset)
+            .limit(limit)
+        )
+
+        return session.execute(query).all()
+
+    @classmethod
+    def stream_rows(
+        cls,
+        session: Session,
+        batch_size: int,
+        now: datetime,
+    ) -> Iterator[Sequence[Row[Any]]]:
+        """Every row of ``rows_query``, in partitions of ``batch_size`` fetched one at a
+        time (server side cursor on the backends supporting it)."""
+        query = cls.rows_query(now).execution_options(yield_per=batch_size)
+
+        yield from session.execute(query).partitions()
 
     @classmethod
     def create(cls, validated_data: BookSchema, session: Session) -> Self:
@@ -124,6 +567,109 @@ class Book(BaseModel):
 
         return instance
 
+    @classmethod
+    def patch(
+        cls,
+        book_id: int,
+        changes: dict[str, Any],
+        session: Session,
+        now: datetime,
+    ) -> Row[Any] | None:
+        """Writes ``changes`` (column names & values) with a single ``UPDATE ...
+        RETURNING``, bumping ``version``: neither the book nor its author is loaded.
+
+        Returns the columns of ``BookDumpSchema`` (author ones prefixed with
+        ``author_``) & the availability at ``now``, read by subqueries of the same
+        statement. Without any change the book is only read. ``None`` if the book
+        doesn't exist, or if the author it's moved to doesn't (nothing is written).
+        """
+
+        def author_column(column: Any) -> Any:
+            return (
+                select(column)
+                .where(Author.id == cls.author_id)
+                .scalar_subquery()
+                .label(f"author_{column.key}")
+            )
+
+        columns = (
+            cls.id,
+            cls.title,
+            cls.author_id,
+            cls.isbn,
+            cls.version,
+            author_column(Author.first_name),
+            author_column(Author.last_name),
+            author_column(Author.version),
+            cls.available_at(now).label("available"),
+        )
+
+        if not changes:
+            return session.execute(select(*columns).where(cls.id == book_id)).first()
+
+        query = update(cls).where(cls.id == book_id)
+
+        if "author_id" in changes:
+            query = query.where(
+                select(Author.id).where(Author.id == changes["author_id"]).exists()
+            )
+
+        query = (
+            # ORM bulk UPDATEs don't bump ``version_id_col``
+            query.values(**changes, version=cls.version + 1).returning(*columns)
+        )
+
+        row = session.execute(query).first()
+
+        if row is not None and changes.keys() & {"title", "author_id"}:
+            # Written with a bulk statement, the session listeners don't see it
+            search.refresh(session.connection(), book_ids=[book_id])
+
+        return row
+
+    @classmethod
+    def bulk_create(
+        cls,
+        validated_data: Sequence[BookSchema],
+        session: Session,
+        batch_size: int,
+    ) -> list[int]:
+        """Inserts books with multi-row ``INSERT ... RETURNING`` statements of
+        ``batch_size`` rows, without loading them in the session.
+
+        Returns the ids of the books, in the order of ``validated_data``. Backends that
+        can't guarantee the order of the rows returned by a multi-row ``INSERT``
+        (SQLite) fall back to one statement per book, still in the same transaction.
+        """
+        ids: list[int] = []
+        query = insert(cls).returning(cls.id, sort_by_parameter_order=True)
+
+        for batch_start in range(0, len(validated_data), batch_size):
+            rows = [
+                book.model_dump()
+                for book in validated_data[batch_start : batch_start + batch_size]
+            ]
+
+            ids.extend(session.execute(query, rows).scalars())
+
+        # Inserted with bulk statements, the session listeners don't see them
+        search.refresh(session.connection(), book_ids=ids)
+
+        return ids
+
+    @classmethod
+    def existing_isbns(cls, isbns: Iterable[str], session: Session) -> set[str]:
+        """Subset of ``isbns`` already taken by a book, in a single query (none when
+        ``isbns`` is empty)."""
+        isbns = set(isbns)
+
+        if not isbns:
+            return set()
+
+        query = select(cls.isbn).where(cls.isbn.in_(isbns))
+
+        return set(session.execute(query).scalars())
+
     @classmethod
     def exists(cls, book_id: int, session: Session) -> bool:
         res: bool = session.query(
@@ -134,21 +680,66 @@ class Book(BaseModel):
 
     @classmethod
     def delete(cls, book_id: int, session: Session) -> bool:
-        book_exists = cls.exists(book_id, session)
-        if not book_exists:
-            return False
+        """Deletes the book with a single ``DELETE ... RETURNING``, tells if it
+        existed. The caller commits the session."""
+        return bool(cls.bulk_delete([book_id], session, batch_size=1))
 
-        query = delete(cls).where(cls.id == book_id)
+    @classmethod
+    def bulk_delete(
+        cls, book_ids: Iterable[int], session: Session, batch_size: int
+    ) -> list[int]:
+        """Deletes books with ``DELETE ... RETURNING`` statements of ``batch_size``
+        ids, without loading them, in the transaction of ``session``. Returns the ids
+        of the deleted books, the others don't exist."""
+        deleted_ids = bulk_delete_ids(cls, book_ids, session, batch_size)
 
-        session.execute(query)
+        # Deleted with bulk statements, the session listeners don't see them
+        search.remove(session.connection(), deleted_ids)
 
-        session.commit()
+        for book_id in deleted_ids:
+            lending_intervals.invalidate(book_id)
 
-        return True
+        return deleted_ids
+
+    # Awaitable equivalents, for the async mode (``config.SQLALCHEMY_ASYNC``)
+
+    @classmethod
+    async def aget(
+        cls,
+        book_id: int,
+        session: AsyncSession,
+        now: datetime | None = None,
+    ) -> "Book | None":
+        return await run_sync(session, cls.get, book_id, now=now)
+
+    @classmethod
+    async def aget_all(
+        cls,
+        session: AsyncSession,
+        after_id: int | None = None,
+        limit: int | None = None,
+        now: datetime | None = None,
+    ) -> "list[Book]":
+        return await run_sync(
+            session, cls.get_all, after_id=after_id, limit=limit, now=now
+        )
+
+    @classmethod
+    async def aexists(cls, book_id: int, session: AsyncSession) -> bool:
+        return await run_sync(session, cls.exists, book_id)
+
+    @classmethod
+    async def adelete(cls, book_id: int, session: AsyncSession) -> bool:
+        return await run_sync(session, cls.delete, book_id)
 
 
 class User(BaseModel):
     __tablename__ = "user"
+    __table_args__ = (
+        # Logins & ``get_logged_user`` look users up by username
+        Index("ix_user_username", "username", unique=True),
+        Index("ix_user_email", "email", unique=True),
+    )
 
     id: Mapped[uuid.UUID] = mapped_column(default=uuid.uuid4, primary_key=True)
 
@@ -167,12 +758,25 @@ class User(BaseModel):
 
     @password.setter
     def password(self, new_password: str) -> None:
-        context = CryptContext(schemes=["bcrypt"])
-        self.hashed_password = context.hash(new_password)
+        self.hashed_password = hash_password(new_password)
 
     @classmethod
-    def create(cls, validated_data: UserSchema, session: Session) -> Self:
-        instance = cls(**validated_data.model_dump())
+    def create(
+        cls,
+        validated_data: UserSchema,
+        session: Session,
+        hashed_password: str | None = None,
+    ) -> Self:
+        """Adds a user, its password is hashed unless ``hashed_password`` is given
+        (see ``ahash_password``)."""
+        if hashed_password is None:
+            instance = cls(**validated_data.model_dump())
+        else:
+            instance = cls(
+                **validated_data.model_dump(exclude={"password"}),
+                hashed_password=hashed_password,
+            )
+
         session.add(instance)
         return instance
 
@@ -189,11 +793,43 @@ class User(BaseModel):
         if not user:
             return None
 
-        context = CryptContext(schemes=["bcrypt"])
+        verified, upgraded_hash = verify_password(password, user.hashed_password)
+
+        if not verified:
+            return None
+
+        # The hash was computed with another number of rounds, the caller has to
+        # commit the session to persist the upgraded one.
+        if upgraded_hash is not None:
+            user.hashed_password = upgraded_hash
+
+        return user
+
+    # Awaitable equivalents, for the async mode (``config.SQLALCHEMY_ASYNC``)
+
+    @classmethod
+    async def aget(cls, username: str, session: AsyncSession) -> "Self | None":
+        return await run_sync(session, cls.get, username)
+
+    @classmethod
+    async def aauthenticate(
+        cls, username: str, password: str, session: AsyncSession
+    ) -> "User | None":
+        """``authenticate`` verifying the password outside ``run_sync``, without
+        blocking the event loop (see ``averify_password``)."""
+        user = await cls.aget(username, session)
+
+        if not user:
+            return None
+
+        verified, upgraded_hash = await averify_password(password, user.hashed_password)
 
-        if not context.verify(password, user.hashed_password):
+        if not verified:
             return None
 
+        if upgraded_hash is not None:
+            user.hashed_password = upgraded_hash
+
         return user
 
 
@@ -201,6 +837,19 @@ class Lending(BaseModel):
     """Represents the lending of a book by a given user."""
 
     __tablename__ = "lending"
+    __table_args__ = (
+        # Conflict checks: equality on the book & the active flag, ranges on the period
+        Index(
+            "ix_lending_book_id_is_active_period",
+            "book_id",
+            "is_active",
+            "start_time",
+            "end_time",
+        ),
+        # Batches of the archival job (``src.database.maintenance``)
+        Index("ix_lending_end_time", "end_time"),
+        Index("ix_lending_return_time", "return_time"),
+    )
 
     id: Mapped[uuid.UUID] = mapped_column(default=uuid.uuid4, primary_key=True)
 
@@ -216,6 +865,186 @@ class Lending(BaseModel):
     user: Mapped[User] = relationship(back_populates="current_lends")
     book: Mapped[Book] = relationship(back_populates="current_lends")
 
+    @classmethod
+    def overlaps(cls, start_time: datetime, end_time: datetime) -> ColumnElement[bool]:
+        """SQL predicate telling if a lending intersects ``start_time`` - ``end_time``.
+
+        Periods are half-open (``[start_time, end_time)``), like the ranges of the
+        lending exclusion constraint: a new lending doesn't conflict with an existing
+        one when:
+            * start_time < end_time <= existing start_time
+            OR
+            * existing end_time <= start_time < end_time
+        """
+        return and_(cls.start_time < end_time, cls.end_time > start_time)
+
+    @classmethod
+    def has_conflict(
+        cls,
+        book_id: int,
+        start_time: datetime,
+        end_time: datetime,
+        session: Session,
+        exclude_id: uuid.UUID | None = None,
+    ) -> bool:
+        """Tells if an active lending of ``book_id`` intersects the given period.
+
+        Runs as an ``EXISTS`` probe on ``ix_lending_book_id_is_active_period``, the
+        database stops at the first conflicting row.
+        """
+        query = select(cls.id).where(
+            cls.book_id == book_id,
+            cls.is_active.is_(True),
+            cls.overlaps(start_time, end_time),
+        )
+
+        if exclude_id is not None:
+            query = query.where(cls.id != exclude_id)
+
+        conflict_exists: bool = session.execute(select(query.exists())).scalar_one()
+
+        return conflict_exists
+
+    @classmethod
+    def is_booked(
+        cls,
+        book_id: int,
+        start_time: datetime,
+        end_time: datetime,
+        session: Session,
+        exclude_id: uuid.UUID | None = None,
+    ) -> bool:
+        """Conflict check of the reservations, ``has_conflict`` preceded by a lookup in
+        the interval index (``config.LENDING_INTERVAL_INDEX``) when it's enabled.
+
+        Conflicts found by the index are final, the database is only queried to confirm
+        the periods the index considers free. Lendings closed by other processes are
+        only seen once the book is reloaded, ``config.LENDING_INTERVAL_INDEX_TTL``
+        seconds after it was loaded at most.
+        """
+        if not lending_intervals.enabled:
+            return cls.has_conflict(
+                book_id, start_time, end_time, session, exclude_id=exclude_id
+            )
+
+        indexed_conflict = lending_intervals.conflicts(
+            book_id,
+            start_time,
+            end_time,
+            load=lambda: cls.active_periods(book_id, session),
+            exclude_id=exclude_id,
+        )
+
+        if indexed_conflict and not lending_intervals.check_consistency:
+            return True
+
+        conflict = cls.has_conflict(
+            book_id, start_time, end_time, session, exclude_id=exclude_id
+        )
+
+        # The index only knows committed lendings, it can't be compared with the
+        # database while the session has uncommitted changes on the book.
+        pending_book_ids = {
+            changed_book_id
+            for book_ids, _ in session.info.get(PENDING_LENDINGS, {}).values()
+            for changed_book_id in book_ids
+        }
+
+        if (
+            lending_intervals.check_consistency
+            and conflict != indexed_conflict
+            and book_id not in pending_book_ids
+        ):
+            raise IntervalIndexInconsistency(
+                f"Lending index of book {book_id} says {indexed_conflict} for "
+                f"{start_time} - {end_time}, the database says {conflict}"
+            )
+
+        return conflict
+
+    @classmethod
+    def free_periods(
+        cls,
+        book_id: int,
+        window_start: datetime,
+        window_end: datetime,
+        session: Session,
+    ) -> list[tuple[datetime, datetime]]:
+        """Periods of ``window_start`` - ``window_end`` not covered by any active
+        lending of ``book_id``, in chronological order.
+
+        Gaps and islands, in a single query: the lendings overlapping the window are
+        sorted by start time and each one is compared to the latest end time of the
+        ones before it, a lending starting after it opens a free period. A sentinel row
+        starting at ``window_end`` closes the last one. Periods being half-open (see
+        ``overlaps``), each free period can be reserved as is.
+        """
+        boundaries = union_all(
+            select(cls.start_time, cls.end_time).where(
+                cls.book_id == book_id,
+                cls.is_active.is_(True),
+                cls.overlaps(window_start, window_end),
+            ),
+            select(
+                literal(window_end, DateTime).label("start_time"),
+                literal(window_end, DateTime).label("end_time"),
+            ),
+        ).subquery()
+
+        previous_end = (
+            func.max(boundaries.c.end_time)
+            .over(
+                order_by=(boundaries.c.start_time, boundaries.c.end_time),
+                rows=(None, -1),
+            )
+            .label("previous_end")
+        )
+        islands = select(boundaries.c.start_time, previous_end).subquery()
+
+        free_start = case(
+            (
+                or_(
+                    islands.c.previous_end.is_(None),
+                    islands.c.previous_end < window_start,
+                ),
+                literal(window_start, DateTime),
+            ),
+            else_=islands.c.previous_end,
+        )
+
+        query = (
+            select(free_start, islands.c.start_time)
+            .where(islands.c.start_time > free_start)
+            .order_by(islands.c.start_time)
+        )
+
+        return [
+            (start_time, end_time) for start_time, end_time in session.execute(query)
+        ]
+
+    @classmethod
+    def active_periods(cls, book_id: int, session: Session) -> list[Period]:
+        """Periods of the active lendings of ``book_id``, to load the interval index."""
+        query = select(cls.start_time, cls.end_time, cls.id).where(
+            cls.book_id == book_id,
+            cls.is_active.is_(True),
+        )
+
+        return [tuple(row) for row in session.execute(query)]
+
+    @classmethod
+    def all_active_periods(cls, session: Session) -> list[tuple[int, Period]]:
+        """Periods of every active lending along with their book, to rebuild the
+        interval index."""
+        query = select(cls.book_id, cls.start_time, cls.end_time, cls.id).where(
+            cls.is_active.is_(True),
+        )
+
+        return [
+            (book_id, (start_time, end_time, lending_id))
+            for book_id, start_time, end_time, lending_id in session.execute(query)
+        ]
+
     @classmethod
     def get_or_404(
         cls,
@@ -242,11 +1071,31 @@ class Lending(BaseModel):
         cls,
         filters: list[ColumnExpressionArgument[bool]],
         session: Session,
+        now: datetime | None = None,
+        with_book: bool = True,
+        with_author: bool = True,
     ) -> Sequence[Self]:
-        """Gets all lendings that fall under specified predicates (``filters``)."""
+        """Gets all lendings that fall under specified predicates (``filters``).
+
+        The lent books (unless ``with_book`` is false) along with their author (unless
+        ``with_author`` is false) and, when ``now`` is given, their availability are
+        loaded by the same query.
+        """
 
         query = select(cls).where(*filters)
 
+        if with_book:
+            book_loader = joinedload(cls.book)
+            query = query.options(
+                *(
+                    book_loader.options(option)
+                    for option in Book.read_options(now, with_author=with_author)
+                )
+            )
+
+        if now is not None:
+            query = query.execution_options(populate_existing=True)
+
         return session.execute(query).scalars().all()
 
     @classmethod
@@ -264,28 +1113,9 @@ class Lending(BaseModel):
         Each row in this table is linked to one physical book, this means that
         counting rows isn't sufficient to check if there's available stock to lend.
 
-        The book needs to be available during the given dates:
-            * start_time < end_time <= any existing start_time
-            OR
-            * any existing end_time < start_time < end_time
+        The book needs to be available during the given dates, see ``overlaps``.
         """
-        query = select(Lending).where(
-            Lending.book_id == book.id,
-            Lending.is_active.is_(True),
-            ~or_(
-                and_(
-                    start_time <= Lending.start_time,
-                    end_time <= Lending.start_time,
-                ),
-                and_(
-                    start_time > Lending.end_time,
-                    end_time > Lending.end_time,
-                ),
-            ),
-        )
-        conflicting_lendings: Sequence[Lending] = session.execute(query).scalars().all()
-
-        if conflicting_lendings:
+        if cls.is_booked(book.id, start_time, end_time, session):
             raise HTTPException(
                 status_code=HTTPStatus.UNPROCESSABLE_ENTITY,
                 detail={"errors": f"Lending failed for {book.title}: not enough stock"},
@@ -300,3 +1130,348 @@ class Lending(BaseModel):
         session.add(row)
 
         return row
+
+    # Awaitable equivalents, for the async mode (``config.SQLALCHEMY_ASYNC``)
+
+    @classmethod
+    async def aget_or_404(
+        cls,
+        lending_id: uuid.UUID,
+        user_id: uuid.UUID,
+        session: AsyncSession,
+    ) -> Self:
+        return await run_sync(session, cls.get_or_404, lending_id, user_id)
+
+    @classmethod
+    async def aget_all(
+        cls,
+        filters: list[ColumnExpressionArgument[bool]],
+        session: AsyncSession,
+        now: datetime | None = None,
+    ) -> Sequence[Self]:
+        return await run_sync(session, cls.get_all, filters, now=now)
+
+    @classmethod
+    async def alend_book(
+        cls,
+        book: Book,
+        user_id: uuid.UUID,
+        start_time: datetime,
+        end_time: datetime,
+        session: AsyncSession,
+    ) -> Self:
+        return await run_sync(
+            session,
+            cls.lend_book,
+            book,
+            user_id=user_id,
+            start_time=start_time,
+            end_time=end_time,
+        )
+
+
+# Batches of the overdue sweeper, only the active lendings are indexed. Declared once
+# the columns exist: the predicate must match the queries (``is_active IS true``)
+Index(
+    "ix_lending_active_end_time",
+    Lending.end_time,
+    postgresql_where=Lending.is_active.is_(True),
+    sqlite_where=Lending.is_active.is_(True),
+)
+
+
+class LendingArchive(BaseModel):
+    """Finished lendings moved out of ``lending`` by ``archive_lendings``
+    (``src.database.maintenance``): the conflict checks and the availability only
+    scan the lendings that can still matter. Same columns, along with the time of the
+    archival."""
+
+    __tablename__ = "lending_archive"
+    __table_args__ = (
+        # History of a user, newest first
+        Index("ix_lending_archive_user_id_start_time", "user_id", "start_time"),
+    )
+
+    id: Mapped[uuid.UUID] = mapped_column(primary_key=True)
+
+    user_id: Mapped[uuid.UUID] = mapped_column(ForeignKey("user.id"), nullable=False)
+    book_id: Mapped[int] = mapped_column(ForeignKey("book.id"), nullable=False)
+
+    start_time: Mapped[datetime] = mapped_column(nullable=False)
+    end_time: Mapped[datetime] = mapped_column(nullable=False)
+
+    is_active: Mapped[bool] = mapped_column(nullable=False)
+    return_time: Mapped[datetime | None] = mapped_column(nullable=True)
+
+    archived_at: Mapped[datetime] = mapped_column(nullable=False)
+
+    @classmethod
+    def history(
+        cls, user_id: uuid.UUID, now: datetime, session: Session
+    ) -> Sequence[Row[Any]]:
+        """Finished lendings of a user (inactive or ended before ``now``), archived or
+        not yet, newest first. ``archived_at`` is null for the ones not archived."""
+        columns = (
+            "id",
+            "book_id",
+            "user_id",
+            "start_time",
+            "end_time",
+            "is_active",
+            "return_time",
+        )
+
+        lendings = select(
+            *(getattr(Lending, column) for column in columns),
+            cast(null(), DateTime).label("archived_at"),
+        ).where(
+            Lending.user_id == user_id,
+            or_(Lending.is_active.is_(False), Lending.end_time < now),
+        )
+        archived = select(
+            *(getattr(cls, column) for column in columns), cls.archived_at
+        ).where(cls.user_id == user_id)
+
+        query = union_all(lendings, archived).order_by(
+            literal_column("start_time").desc()
+        )
+
+        return session.execute(query).all()
+
+
+class WaitlistEntry(BaseModel):
+    """Reservation waiting for a book that wasn't available during the requested
+    period, served first come, first served: entries are promoted to lendings in the
+    order they were created as soon as their period is free (see ``promote``)."""
+
+    __tablename__ = "lending_waitlist"
+    __table_args__ = (
+        # Next in line of a book, in FIFO order
+        Index("ix_lending_waitlist_book_id_created_at", "book_id", "created_at", "id"),
+        Index("ix_lending_waitlist_user_id", "user_id"),
+    )
+
+    id: Mapped[uuid.UUID] = mapped_column(default=uuid.uuid4, primary_key=True)
+
+    user_id: Mapped[uuid.UUID] = mapped_column(ForeignKey("user.id"), nullable=False)
+    book_id: Mapped[int] = mapped_column(ForeignKey("book.id"), nullable=False)
+
+    start_time: Mapped[datetime] = mapped_column(nullable=False)
+    end_time: Mapped[datetime] = mapped_column(nullable=False)
+
+    created_at: Mapped[datetime] = mapped_column(default=datetime.now, nullable=False)
+
+    @classmethod
+    def rows_query(cls) -> Select[Any]:
+        """Entries along with their ``position`` in the waitlist of their book (1 for
+        the next in line), counted on ``ix_lending_waitlist_book_id_created_at``."""
+        ahead = aliased(cls)
+        position = (
+            select(func.count(ahead.id) + 1)
+            .where(
+                ahead.book_id == cls.book_id,
+                or_(
+                    ahead.created_at < cls.created_at,
+                    and_(ahead.created_at == cls.created_at, ahead.id < cls.id),
+                ),
+            )
+            .scalar_subquery()
+            .label("position")
+        )
+
+        return select(
+            cls.id,
+            cls.book_id,
+            cls.user_id,
+            cls.start_time,
+            cls.end_time,
+            cls.created_at,
+            position,
+        )
+
+    @classmethod
+    def get_row(cls, entry_id: uuid.UUID, session: Session) -> Row[Any]:
+        return session.execute(cls.rows_query().where(cls.id == entry_id)).one()
+
+    @classmethod
+    def get_user_rows(
+        cls, user_id: uuid.UUID, now: datetime, session: Session
+    ) -> Sequence[Row[Any]]:
+        """Entries of a user still waiting (their period isn't over), oldest first."""
+        query = (
+            cls.rows_query()
+            .where(cls.user_id == user_id, cls.end_time > now)
+            .order_by(cls.created_at, cls.id)
+        )
+
+        return session.execute(query).all()
+
+    @classmethod
+    def join(
+        cls,
+        book_id: int,
+        user_id: uuid.UUID,
+        start_time: datetime,
+        end_time: datetime,
+        session: Session,
+    ) -> Self:
+        entry = cls(
+            book_id=book_id,
+            user_id=user_id,
+            start_time=start_time,
+            end_time=end_time,
+        )
+        session.add(entry)
+        session.flush()
+
+        return entry
+
+    @classmethod
+    def leave(cls, entry_id: uuid.UUID, user_id: uuid.UUID, session: Session) -> bool:
+        """Deletes the entry of a user, tells if it existed. The caller commits the
+        session."""
+        query = (
+            delete(cls)
+            .where(cls.id == entry_id, cls.user_id == user_id)
+            .returning(cls.id)
+        )
+
+        return session.execute(query).first() is not None
+
+    @classmethod
+    def promote(
+        cls,
+        book_id: int,
+        start_time: datetime,
+        end_time: datetime,
+        session: Session,
+        now: datetime,
+        limit: int,
+    ) -> list[Lending]:
+        """Lends ``book_id`` to the entries waiting for it now that ``start_time`` -
+        ``end_time`` was freed (a lending returned or shortened), in FIFO order.
+
+        Only the entries overlapping the freed period can have become satisfiable, the
+        others are left untouched: the ``limit`` oldest of them are read through
+        ``ix_lending_waitlist_book_id_created_at`` and each one is checked with
+        ``Lending.is_booked``, the lendings promoted before it are flushed. Entries
+        whose period is over are dropped. The caller commits the session.
+        """
+        session.execute(
+            delete(cls)
+            .where(cls.book_id == book_id, cls.end_time <= now)
+            .execution_options(synchronize_session=False)
+        )
+
+        entries = (
+            session.execute(
+                select(cls)
+                .where(
+                    cls.book_id == book_id,
+                    and_(cls.start_time < end_time, cls.end_time > start_time),
+                )
+                .order_by(cls.created_at, cls.id)
+                .limit(limit)
+                # Entries being promoted by a concurrent return are left to it
+                # (Postgres)
+                .with_for_update(skip_locked=True)
+            )
+            .scalars()
+            .all()
+        )
+
+        promoted: list[Lending] = []
+
+        for entry in entries:
+            if Lending.is_booked(book_id, entry.start_time, entry.end_time, session):
+                continue
+
+            lending = Lending(
+                book_id=book_id,
+                user_id=entry.user_id,
+                start_time=entry.start_time,
+                end_time=entry.end_time,
+            )
+            session.add(lending)
+            session.delete(entry)
+            # Seen by the conflict checks of the next entries
+            session.flush()
+            promoted.append(lending)
+
+        return promoted
+
+
+@event.listens_for(Session, "after_flush")
+def record_lending_changes(session: Session, flush_context: Any) -> None:
+    """Keeps the lendings flushed by ``session`` until the transaction is over, the
+    interval index is only updated with committed changes."""
+    if not lending_intervals.enabled:
+        return
+
+    pending = session.info.setdefault(PENDING_LENDINGS, {})
+
+    # Still the pre-flush state of the session & of the attributes history
+    for instance in (*session.new, *session.dirty, *session.deleted):
+        if not isinstance(instance, Lending):
+            continue
+
+        book_ids: set[int] = pending.get(instance.id, (set(), None))[0]
+        book_ids.add(instance.book_id)
+        book_ids.update(inspect(instance).attrs.book_id.history.deleted)
+
+        period = (
+            (instance.book_id, instance.start_time, instance.end_time)
+            if instance.is_active and instance not in session.deleted
+            else None
+        )
+
+        pending[instance.id] = (book_ids, period)
+
+
+@event.listens_for(Session, "after_commit")
+def index_committed_lendings(session: Session) -> None:
+    for lending_id, (book_ids, period) in session.info.pop(
+        PENDING_LENDINGS, {}
+    ).items():
+        lending_intervals.apply(lending_id, book_ids, period)
+
+
+@event.listens_for(Session, "after_rollback")
+def discard_pending_lendings(session: Session) -> None:
+    session.info.pop(PENDING_LENDINGS, None)
+
+
+@event.listens_for(Session, "after_flush")
+def index_flushed_books(session: Session, flush_context: Any) -> None:
+    """Keeps the full-text search index up to date with the books & authors written
+    through the ORM, in the same transaction (see ``src.database.search``)."""
+    book_ids: set[int] = set()
+    author_ids: set[int] = set()
+
+    for instance in session.new:
+        if isinstance(instance, Book):
+            book_ids.add(instance.id)
+
+    for instance in session.dirty:
+        attributes = inspect(instance).attrs
+
+        if isinstance(instance, Book) and (
+            attributes.title.history.has_changes()
+            or attributes.author_id.history.has_changes()
+            or attributes.author.history.has_changes()
+        ):
+            book_ids.add(instance.id)
+        elif isinstance(instance, Author) and (
+            attributes.first_name.history.has_changes()
+            or attributes.last_name.history.has_changes()
+        ):
+            author_ids.add(instance.id)
+
+    deleted_book_ids = [
+        instance.id for instance in session.deleted if isinstance(instance, Book)
+    ]
+
+    if book_ids or author_ids:
+        search.refresh(session.connection(), book_ids=book_ids, author_ids=author_ids)
+
+    search.remove(session.connection(), deleted_book_ids)
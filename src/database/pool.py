@@ -0,0 +1,76 @@
+import time
+from threading import Lock
+from typing import Any
+
+from sqlalchemy import Engine, event
+from sqlalchemy.pool import ConnectionPoolEntry, PoolProxiedConnection, QueuePool
+
+# Key of the checkout timestamp in ``ConnectionPoolEntry.info``
+CHECKED_OUT_AT = "checked_out_at"
+
+
+class PoolStatistics:
+    """Tracks how long connections are held out of the pool of an engine through the
+    ``checkout`` and ``checkin`` pool events.
+
+    Listeners are registered on the engine rather than on its pool, they carry over to
+    the new pool when the engine is disposed.
+    """
+
+    def __init__(self, engine: Engine) -> None:
+        self.engine = engine
+
+        self._lock = Lock()
+        self.checkouts = 0
+        self.total_held_time = 0.0
+        self.max_held_time = 0.0
+
+        event.listen(engine, "checkout", self.on_checkout)
+        event.listen(engine, "checkin", self.on_checkin)
+
+    def on_checkout(
+        self,
+        dbapi_connection: Any,
+        connection_record: ConnectionPoolEntry,
+        connection_proxy: PoolProxiedConnection,
+    ) -> None:
+        connection_record.info[CHECKED_OUT_AT] = time.perf_counter()
+
+    def on_checkin(
+        self,
+        dbapi_connection: Any,
+        connection_record: ConnectionPoolEntry,
+    ) -> None:
+        checked_out_at = connection_record.info.pop(CHECKED_OUT_AT, None)
+
+        if checked_out_at is None:
+            return
+
+        held_time = time.perf_counter() - checked_out_at
+
+        with self._lock:
+            self.checkouts += 1
+            self.total_held_time += held_time
+            self.max_held_time = max(self.max_held_time, held_time)
+
+    def snapshot(self) -> dict[str, Any]:
+        """Current state of the pool, occupancy figures are only known for queue
+        based pools (the ones used with Postgres and MariaDB)."""
+        pool = self.engine.pool
+        queue_pool = pool if isinstance(pool, QueuePool) else None
+
+        with self._lock:
+            return {
+                "pool_class": type(pool).__name__,
+                "size": queue_pool.size() if queue_pool else None,
+                "checked_out": queue_pool.checkedout() if queue_pool else None,
+                "idle": queue_pool.checkedin() if queue_pool else None,
+                "overflow": queue_pool.overflow() if queue_pool else None,
+                "checkouts": self.checkouts,
+                "average_held_ms": (
+                    self.total_held_time / self.checkouts * 1000
+                    if self.checkouts
+                    else 0.0
+                ),
+                "max_held_ms": self.max_held_time * 1000,
+            }
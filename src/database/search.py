@@ -0,0 +1,205 @@
+import re
+from typing import Any, Collection
+
+from sqlalchemy import (
+    DDL,
+    ColumnElement,
+    Connection,
+    Engine,
+    Integer,
+    Select,
+    String,
+    column,
+    delete,
+    event,
+    func,
+    insert,
+    literal,
+    literal_column,
+    or_,
+    select,
+    table,
+    true,
+)
+
+from src.database.common import BaseModel
+
+# Full-text search index of the books, over their title and the name of their author.
+#
+# Postgres: ``book_search`` holds a ``tsvector`` of each book, with a GIN index.
+# SQLite: ``book_search`` is an FTS5 virtual table whose rowid is the book id.
+#
+# The table is kept up to date by the application (the document of a book depends on
+# its author row, a generated column can't express it): see the session listeners of
+# ``src.database.models``, code issuing bulk statements must call ``refresh``.
+
+SEARCH_TABLE = "book_search"
+
+# Postgres text search configuration: titles & names are matched as written, without
+# stemming or stop words
+TEXT_SEARCH_CONFIG = literal_column("'simple'::regconfig")
+
+# Weight of the title relative to the author name in the ranking (SQLite ``bm25``)
+TITLE_WEIGHT = 2.0
+AUTHOR_WEIGHT = 1.0
+
+SUPPORTED_DIALECTS = ("postgresql", "sqlite")
+
+book = table(
+    "book",
+    column("id", Integer),
+    column("title", String),
+    column("author_id", Integer),
+)
+author = table(
+    "author",
+    column("id", Integer),
+    column("first_name", String),
+    column("last_name", String),
+)
+
+postgres_search = table(SEARCH_TABLE, column("book_id"), column("document"))
+sqlite_search = table(SEARCH_TABLE, column("rowid"), column("title"), column("author"))
+
+for statement in (
+    "CREATE TABLE IF NOT EXISTS book_search ("
+    "book_id INTEGER PRIMARY KEY REFERENCES book (id) ON DELETE CASCADE, "
+    "document TSVECTOR NOT NULL)",
+    "CREATE INDEX IF NOT EXISTS ix_book_search_document "
+    "ON book_search USING gin (document)",
+):
+    event.listen(
+        BaseModel.metadata,
+        "after_create",
+        DDL(statement).execute_if(dialect="postgresql"),
+    )
+
+event.listen(
+    BaseModel.metadata,
+    "after_create",
+    DDL(
+        "CREATE VIRTUAL TABLE IF NOT EXISTS book_search USING fts5("
+        "title, author, tokenize = 'unicode61 remove_diacritics 2')"
+    ).execute_if(dialect="sqlite"),
+)
+
+for dialect in SUPPORTED_DIALECTS:
+    event.listen(
+        BaseModel.metadata,
+        "before_drop",
+        DDL("DROP TABLE IF EXISTS book_search").execute_if(dialect=dialect),
+    )
+
+
+def search_terms(query: str) -> list[str]:
+    """Words of a search query, each one matched as a prefix. Anything else
+    (operators, quotes...) is ignored: the query can't be malformed."""
+    return re.findall(r"\w+", query.lower())
+
+
+def is_supported(bind: Connection | Engine) -> bool:
+    return bind.dialect.name in SUPPORTED_DIALECTS
+
+
+def matches(dialect_name: str, terms: Collection[str]) -> Select[Any]:
+    """Books matching every term, ``book_id`` along with a ``rank`` to sort them by
+    (ascending, best matches first)."""
+    if dialect_name == "postgresql":
+        tsquery = func.to_tsquery(
+            TEXT_SEARCH_CONFIG,
+            literal(" & ".join(f"{term}:*" for term in terms)),
+        )
+
+        return select(
+            postgres_search.c.book_id,
+            (-func.ts_rank(postgres_search.c.document, tsquery)).label("rank"),
+        ).where(postgres_search.c.document.op("@@")(tsquery))
+
+    fts_table = literal_column(SEARCH_TABLE)
+
+    return select(
+        sqlite_search.c.rowid.label("book_id"),
+        func.bm25(fts_table, TITLE_WEIGHT, AUTHOR_WEIGHT).label("rank"),
+    ).where(fts_table.op("MATCH")(" ".join(f'"{term}"*' for term in terms)))
+
+
+def remove(connection: Connection, book_ids: Collection[int]) -> None:
+    """Removes deleted books from the index."""
+    if not book_ids or not is_supported(connection):
+        return
+
+    if connection.dialect.name == "postgresql":
+        connection.execute(
+            delete(postgres_search).where(postgres_search.c.book_id.in_(book_ids))
+        )
+    else:
+        connection.execute(
+            delete(sqlite_search).where(sqlite_search.c.rowid.in_(book_ids))
+        )
+
+
+def refresh(
+    connection: Connection,
+    book_ids: Collection[int] | None = None,
+    author_ids: Collection[int] | None = None,
+) -> None:
+    """(Re)indexes the books ``book_ids`` and the books of the authors ``author_ids``,
+    every book when both are ``None``. Runs in the transaction of ``connection``."""
+    if not is_supported(connection):
+        return
+
+    if book_ids is None and author_ids is None:
+        selected: ColumnElement[bool] = true()
+    elif not book_ids and not author_ids:
+        return
+    else:
+        selected = or_(
+            book.c.id.in_(book_ids or ()),
+            book.c.author_id.in_(author_ids or ()),
+        )
+
+    books = book.outerjoin(author, book.c.author_id == author.c.id)
+    author_name = (
+        func.coalesce(author.c.first_name, "")
+        + " "
+        + func.coalesce(author.c.last_name, "")
+    )
+
+    if connection.dialect.name == "postgresql":
+
+        def weighted(text: ColumnElement[Any], weight: str) -> ColumnElement[Any]:
+            return func.setweight(
+                func.to_tsvector(TEXT_SEARCH_CONFIG, func.coalesce(text, "")),
+                literal_column(f"'{weight}'"),
+            )
+
+        connection.execute(
+            delete(postgres_search).where(
+                postgres_search.c.book_id.in_(select(book.c.id).where(selected))
+            )
+        )
+        connection.execute(
+            insert(postgres_search).from_select(
+                ["book_id", "document"],
+                select(
+                    book.c.id,
+                    weighted(book.c.title, "A").op("||")(weighted(author_name, "B")),
+                )
+                .select_from(books)
+                .where(selected),
+            )
+        )
+    else:
+        connection.execute(
+            delete(sqlite_search).where(
+                sqlite_search.c.rowid.in_(select(book.c.id).where(selected))
+            )
+        )
+        connection.execute(
+            insert(sqlite_search).from_select(
+                ["rowid", "title", "author"],
+                select(book.c.id, book.c.title, author_name)
+                .select_from(books)
+                .where(selected),
+            )
+        )
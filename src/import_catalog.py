@@ -0,0 +1,70 @@
+import argparse
+import logging
+import sys
+from pathlib import Path
+
+from src.api.main import session_factory
+from src.database.catalog import READERS, CatalogImport, import_catalog
+
+logger = logging.getLogger("import_catalog")
+
+
+def init_cmd_line() -> argparse.ArgumentParser:
+    parser = argparse.ArgumentParser(
+        prog="Catalog importer",
+        description="Creates or updates authors & books from a CSV or NDJSON catalog",
+    )
+
+    parser.add_argument("path", type=Path)
+    parser.add_argument(
+        "-f",
+        "--format",
+        choices=list(READERS),
+        help="Defaults to the extension of the file",
+    )
+
+    return parser
+
+
+def log_progress(catalog_import: CatalogImport) -> None:
+    statistics = catalog_import.statistics()
+
+    logger.info(
+        "%d records (%d invalid), %.0f records/s",
+        statistics["records"],
+        statistics["errors_count"],
+        statistics["records_per_second"],
+    )
+
+
+if __name__ == "__main__":
+    logging.basicConfig(level=logging.INFO, format="%(asctime)s %(message)s")
+
+    args = init_cmd_line().parse_args()
+    file_format = args.format or args.path.suffix.lstrip(".").lower()
+
+    if file_format not in READERS:
+        raise SystemExit(f"Unknown format {file_format!r}, use --format")
+
+    with args.path.open(encoding="utf-8", newline="") as lines:
+        with session_factory() as session:
+            catalog_import = import_catalog(lines, file_format, session, log_progress)
+
+    statistics = catalog_import.statistics()
+
+    logger.info(
+        "Done in %.1fs: %d authors created, %d books created, %d books updated",
+        statistics["seconds"],
+        statistics["authors_created"],
+        statistics["books_created"],
+        statistics["books_updated"],
+    )
+
+    for error in statistics["errors"]:
+        print(f"line {error['line']}: {error['detail']}", file=sys.stderr)
+
+    if statistics["errors_count"] > len(statistics["errors"]):
+        print(
+            f"... {statistics['errors_count'] - len(statistics['errors'])} more errors",
+            file=sys.stderr,
+        )
@@ -0,0 +1,66 @@
+import argparse
+import logging
+from datetime import datetime, timedelta
+
+from src.api import config
+from src.api.main import session_factory
+from src.database.maintenance import archive_lendings, close_overdue_lendings
+
+logger = logging.getLogger("maintenance")
+
+
+def init_cmd_line() -> argparse.ArgumentParser:
+    parser = argparse.ArgumentParser(
+        prog="Maintenance",
+        description="Maintenance jobs of the lending tables, safe to run along the API",
+    )
+
+    jobs = parser.add_subparsers(dest="job", required=True)
+
+    archive = jobs.add_parser(
+        "archive-lendings",
+        help="Moves the finished lendings to the lending_archive table",
+    )
+    archive.add_argument(
+        "--older-than",
+        type=float,
+        default=config.LENDING_ARCHIVE_AFTER_DAYS,
+        help="Days since the lendings ended or were returned",
+    )
+    archive.add_argument(
+        "--batch-size",
+        type=int,
+        default=config.LENDING_ARCHIVE_BATCH_SIZE,
+        help="Lendings moved per transaction",
+    )
+
+    sweep = jobs.add_parser(
+        "close-overdue",
+        help="Deactivates the active lendings past their end",
+    )
+    sweep.add_argument(
+        "--batch-size",
+        type=int,
+        default=config.LENDING_SWEEP_BATCH_SIZE,
+        help="Lendings closed per transaction",
+    )
+
+    return parser
+
+
+if __name__ == "__main__":
+    logging.basicConfig(level=logging.INFO, format="%(asctime)s %(message)s")
+
+    args = init_cmd_line().parse_args()
+
+    with session_factory() as session:
+        if args.job == "archive-lendings":
+            archive_lendings(
+                session,
+                cutoff=datetime.now() - timedelta(days=args.older_than),
+                batch_size=args.batch_size,
+            )
+        elif args.job == "close-overdue":
+            close_overdue_lendings(
+                session, now=datetime.now(), batch_size=args.batch_size
+            )
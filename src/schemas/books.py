@@ -1,4 +1,9 @@
-from pydantic import BaseModel, ConfigDict
+from datetime import datetime
+
+from pydantic import BaseModel, ConfigDict, TypeAdapter, field_validator
+from typing_extensions import TypedDict
+
+from src.schemas.pagination import PageRow
 
 
 class AuthorSchema(BaseModel):
@@ -12,6 +17,28 @@ class AuthorDumpSchema(AuthorSchema):
     model_config = ConfigDict(from_attributes=True)
 
 
+class AuthorCountsDumpSchema(AuthorDumpSchema):
+    books_count: int
+    # Books lent at the time of the request
+    lent_books_count: int
+
+
+class AuthorPatchSchema(BaseModel):
+    """Partial ``AuthorSchema``, only the fields sent are updated."""
+
+    first_name: str | None = None
+    last_name: str | None = None
+
+    @field_validator("first_name", "last_name")
+    @classmethod
+    def not_null(cls, value: str | None) -> str:
+        # Omitted fields are left as is, they can't be set to null
+        if value is None:
+            raise ValueError("Field can't be null")
+
+        return value
+
+
 class BookSchema(BaseModel):
     title: str
     author_id: int
@@ -22,9 +49,88 @@ class BookSchema(BaseModel):
     model_config = ConfigDict(from_attributes=True)
 
 
+class BookPatchSchema(BaseModel):
+    """Partial ``BookSchema``, only the fields sent are updated."""
+
+    title: str | None = None
+    author_id: int | None = None
+    isbn: str | None = None
+
+    @field_validator("title", "author_id")
+    @classmethod
+    def not_null(cls, value: str | int | None) -> str | int:
+        # Omitted fields are left as is, they can't be set to null
+        if value is None:
+            raise ValueError("Field can't be null")
+
+        return value
+
+
 class BookDumpSchema(BookSchema):
     id: int
     author: AuthorDumpSchema
     available: bool
 
     model_config = ConfigDict(from_attributes=True)
+
+
+# Plain dict equivalents of the dump schemas, for the read only endpoints selecting
+# columns instead of ORM instances (see ``FieldSelection.dump``): they're serialized
+# straight to JSON by the adapters below, without building models. Keys must be
+# inserted in the order of the schema fields for the output to stay identical, fields
+# left out by ``?fields=`` are missing.
+
+
+class AuthorDumpRow(TypedDict, total=False):
+    first_name: str
+    last_name: str
+    id: int
+
+
+class AuthorCountsDumpRow(AuthorDumpRow, total=False):
+    books_count: int
+    lent_books_count: int
+
+
+class BookDumpRow(TypedDict, total=False):
+    title: str
+    author_id: int
+    isbn: str | None
+    id: int
+    author: AuthorDumpRow
+    available: bool
+
+
+AUTHOR_ROW_ADAPTER = TypeAdapter(AuthorDumpRow)
+AUTHOR_PAGE_ADAPTER = TypeAdapter(PageRow[AuthorDumpRow])
+AUTHOR_COUNTS_PAGE_ADAPTER = TypeAdapter(PageRow[AuthorCountsDumpRow])
+BOOK_ROW_ADAPTER = TypeAdapter(BookDumpRow)
+BOOK_PAGE_ADAPTER = TypeAdapter(PageRow[BookDumpRow])
+
+
+class BookBulkErrorSchema(BaseModel):
+    # Position of the book in the payload
+    index: int
+    detail: str
+
+
+class BookBulkCreatedSchema(BaseModel):
+    # In the order of the payload
+    ids: list[int]
+
+
+class BulkDeletedSchema(BaseModel):
+    # Sorted
+    deleted: list[int]
+    # Ids that don't exist, in the order of the payload
+    not_found: list[int]
+
+
+class FreePeriodSchema(BaseModel):
+    start_time: datetime
+    end_time: datetime
+
+
+class BookAvailabilitySchema(BaseModel):
+    book_id: int
+    free_periods: list[FreePeriodSchema]
@@ -0,0 +1,37 @@
+from pydantic import BaseModel, ConfigDict, Field, field_validator
+
+
+class CatalogRecordSchema(BaseModel):
+    """A line of a catalog file (CSV or NDJSON), an author and optionally one of their
+    books. Records with other fields (unknown columns) are rejected."""
+
+    model_config = ConfigDict(extra="forbid")
+
+    author_first_name: str = Field(min_length=1)
+    author_last_name: str = Field(min_length=1)
+    title: str | None = None
+    isbn: str | None = Field(default=None, max_length=13)
+
+    @field_validator("title", "isbn", mode="before")
+    @classmethod
+    def empty_as_none(cls, value: str | None) -> str | None:
+        # Empty CSV cells
+        return value or None
+
+
+class CatalogImportErrorSchema(BaseModel):
+    # Line of the record in the file
+    line: int
+    detail: str
+
+
+class CatalogImportSchema(BaseModel):
+    records: int
+    authors_created: int
+    books_created: int
+    books_updated: int
+    # Only the first ``config.CATALOG_IMPORT_MAX_ERRORS`` errors are detailed
+    errors_count: int
+    errors: list[CatalogImportErrorSchema]
+    seconds: float
+    records_per_second: float
@@ -0,0 +1,52 @@
+from pydantic import BaseModel
+
+
+class PoolStatisticsSchema(BaseModel):
+    pool_class: str
+    # Occupancy, only known for queue based pools
+    size: int | None
+    checked_out: int | None
+    idle: int | None
+    overflow: int | None
+    # Time connections are held out of the pool since the API started
+    checkouts: int
+    average_held_ms: float
+    max_held_ms: float
+
+
+class PoolsStatisticsSchema(BaseModel):
+    sync: PoolStatisticsSchema
+    # Only when the API runs in async mode
+    asynchronous: PoolStatisticsSchema | None = None
+
+
+class CacheStatisticsSchema(BaseModel):
+    size: int
+    max_size: int
+    ttl: float
+    hits: int
+    misses: int
+    hit_ratio: float
+
+
+class IntervalIndexStatisticsSchema(BaseModel):
+    enabled: bool
+    # Books & active lendings currently indexed
+    books: int
+    periods: int
+    hits: int
+    loads: int
+
+
+class ResponseCacheStatisticsSchema(BaseModel):
+    enabled: bool
+    backend: str | None
+    ttl: float
+    hits: int
+    misses: int
+    hit_ratio: float
+    # Only known for the in-process backend
+    entries: int | None
+    size: int | None
+    max_size: int | None
+    evictions: int | None
@@ -1,9 +1,10 @@
 from datetime import datetime
 from uuid import UUID
 
-from pydantic import BaseModel, ConfigDict
+from pydantic import BaseModel, ConfigDict, TypeAdapter
+from typing_extensions import TypedDict
 
-from src.schemas.books import BookDumpSchema
+from src.schemas.books import BookDumpRow, BookDumpSchema
 
 
 class LendingSchema(BaseModel):
@@ -19,6 +20,7 @@ class LendingEditSchema(BaseModel):
 
 class LendingDumpSchema(BaseModel):
     id: UUID
+    book_id: int
     book: BookDumpSchema
     user_id: UUID
     start_time: datetime
@@ -27,3 +29,46 @@ class LendingDumpSchema(BaseModel):
     return_time: datetime | None
 
     model_config = ConfigDict(from_attributes=True)
+
+
+class LendingHistorySchema(BaseModel):
+    id: UUID
+    book_id: int
+    user_id: UUID
+    start_time: datetime
+    end_time: datetime
+    is_active: bool
+    return_time: datetime | None
+    # Null until the lending is moved to the archive
+    archived_at: datetime | None
+
+    model_config = ConfigDict(from_attributes=True)
+
+
+class WaitlistEntrySchema(BaseModel):
+    id: UUID
+    book_id: int
+    user_id: UUID
+    start_time: datetime
+    end_time: datetime
+    created_at: datetime
+    # Rank in the waitlist of the book, 1 for the next in line
+    position: int
+
+    model_config = ConfigDict(from_attributes=True)
+
+
+class LendingDumpRow(TypedDict, total=False):
+    """``LendingDumpSchema`` as a plain dict, see ``src.schemas.books``."""
+
+    id: UUID
+    book_id: int
+    book: BookDumpRow
+    user_id: UUID
+    start_time: datetime
+    end_time: datetime
+    is_active: bool
+    return_time: datetime | None
+
+
+LENDING_LIST_ADAPTER = TypeAdapter(list[LendingDumpRow])
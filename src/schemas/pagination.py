@@ -0,0 +1,20 @@
+from typing import Generic, TypeVar
+
+from pydantic import BaseModel
+from typing_extensions import TypedDict
+
+ItemT = TypeVar("ItemT")
+
+
+class PageSchema(BaseModel, Generic[ItemT]):
+    items: list[ItemT]
+    # Opaque cursor to send back as ``?cursor=`` to get the following page, ``None``
+    # when the current page is the last one.
+    next: str | None = None
+
+
+class PageRow(TypedDict, Generic[ItemT]):
+    """``PageSchema`` as a plain dict, see ``src.schemas.books``."""
+
+    items: list[ItemT]
+    next: str | None
@@ -3,10 +3,14 @@ from typing import Generator
 import pytest
 from fastapi import FastAPI
 from fastapi.testclient import TestClient
+from sqlalchemy import event
 from sqlalchemy.orm import Session, scoped_session
 
+from src.api.cache import catalog_cache
 from src.api.main import database_connection, init_api
+from src.authentication.cache import logged_users
 from src.database.common import BaseModel
+from src.database.intervals import lending_intervals
 
 
 @pytest.fixture(autouse=True)
@@ -32,6 +36,15 @@ def create_db() -> None:
     BaseModel.metadata.create_all(bind=engine)
 
 
+@pytest.fixture(scope="function", autouse=True)
+def clear_caches() -> None:
+    # Tests reuse the same usernames on a fresh database
+    logged_users.clear()
+    lending_intervals.clear()
+    catalog_cache.clear()
+    catalog_cache.reset_statistics()
+
+
 @pytest.fixture(scope="function", autouse=True)
 def session(app: FastAPI) -> Generator[Session, None, None]:
     app.dependency_overrides[database_connection] = get_testing_db
@@ -49,3 +62,22 @@ def test_client(app: FastAPI) -> Generator[TestClient, None, None]:
     client = TestClient(app)
 
     yield client
+
+
+@pytest.fixture
+def executed_queries() -> Generator[list[str], None, None]:
+    """Records every SQL statement sent to the database during the test."""
+    from src.api.main import engine
+
+    statements: list[str] = []
+
+    def record_statement(*args: object) -> None:
+        # ``before_cursor_execute`` arguments: conn, cursor, statement, ...
+        statements.append(str(args[2]))
+
+    event.listen(engine, "before_cursor_execute", record_statement)
+
+    try:
+        yield statements
+    finally:
+        event.remove(engine, "before_cursor_execute", record_statement)
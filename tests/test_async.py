@@ -0,0 +1,334 @@
+import asyncio
+import inspect
+import time
+from datetime import datetime, timedelta
+from http import HTTPStatus
+from typing import AsyncGenerator, Generator
+
+import httpx
+import pytest
+from fastapi import APIRouter, Depends, FastAPI
+from fastapi.testclient import TestClient
+from pytest import MonkeyPatch
+from sqlalchemy import func, select
+from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker
+from sqlalchemy.orm import Session
+
+from src.api import books, config, main, user
+from src.authentication import hashing
+from src.database.models import Author, Book, Lending, User
+
+# The test database is SQLite, its async driver is needed by these tests
+pytest.importorskip("aiosqlite")
+
+
+@pytest.fixture
+def async_session_factory() -> Generator[async_sessionmaker[AsyncSession], None, None]:
+    async_engine = main.create_async_db_connection(
+        main.async_database_uri(config.SQLALCHEMY_DATABASE_URI)
+    )
+
+    yield async_sessionmaker(
+        bind=async_engine,
+        autoflush=False,
+        expire_on_commit=False,
+    )
+
+    asyncio.run(async_engine.dispose())
+
+
+def create_async_app(
+    router: APIRouter, async_session_factory: async_sessionmaker[AsyncSession]
+) -> FastAPI:
+    """App serving ``router`` with the sessions of ``async_session_factory``."""
+
+    async def async_testing_db() -> AsyncGenerator[AsyncSession, None]:
+        async with async_session_factory() as async_session:
+            yield async_session
+
+    app = FastAPI()
+    app.include_router(router)
+    app.dependency_overrides[main.database_connection] = async_testing_db
+
+    return app
+
+
+class TestAwaitableModelMethods:
+    def test_get_book_and_lend_it(
+        self,
+        session: Session,
+        async_session_factory: async_sessionmaker[AsyncSession],
+    ) -> None:
+        user: User = User(
+            username="bruce",
+            email="bruce@bruce.tld",
+            password="h4xx0r",
+        )
+        author: Author = Author(
+            first_name="James S.A.",
+            last_name="Corey",
+        )
+        book: Book = Book(
+            title="Leviathan Wakes",
+            author=author,
+        )
+
+        session.add_all([user, author, book])
+        session.commit()
+
+        async def lend_book() -> tuple[Book, bool, list[Lending]]:
+            async with async_session_factory() as async_session:
+                fetched_book = await Book.aget(
+                    book.id, async_session, now=datetime.now()
+                )
+                assert fetched_book is not None
+
+                available_before_lending = fetched_book.available
+
+                await Lending.alend_book(
+                    fetched_book,
+                    user_id=user.id,
+                    start_time=datetime.now() - timedelta(days=1),
+                    end_time=datetime.now() + timedelta(days=10),
+                    session=async_session,
+                )
+                await async_session.commit()
+
+                lendings = await Lending.aget_all(
+                    [Lending.user_id == user.id], async_session, now=datetime.now()
+                )
+
+                return fetched_book, available_before_lending, list(lendings)
+
+        fetched_book, available_before_lending, lendings = asyncio.run(lend_book())
+
+        assert fetched_book.author.last_name == "Corey"
+        assert available_before_lending
+
+        assert len(lendings) == 1
+        assert lendings[0].book.title == "Leviathan Wakes"
+        assert not lendings[0].book.available
+
+
+class TestAsyncRoutes:
+    def test_sync_endpoint_runs_in_async_session(
+        self,
+        session: Session,
+        monkeypatch: MonkeyPatch,
+        async_session_factory: async_sessionmaker[AsyncSession],
+    ) -> None:
+        monkeypatch.setattr(config, "SQLALCHEMY_ASYNC", True)
+
+        router = APIRouter(route_class=main.DatabaseRoute)
+        router.add_api_route("/books/{book_id}", books.get_book, methods=["GET"])
+
+        # Sync endpoints are turned into coroutines by the route class
+        assert inspect.iscoroutinefunction(router.routes[0].endpoint)  # type: ignore[attr-defined]
+
+        app = create_async_app(router, async_session_factory)
+
+        author: Author = Author(
+            first_name="James S.A.",
+            last_name="Corey",
+        )
+        book: Book = Book(
+            title="Leviathan Wakes",
+            author=author,
+        )
+
+        session.add_all([author, book])
+        session.commit()
+
+        response = TestClient(app).get(f"/books/{book.id}")
+
+        assert response.status_code == HTTPStatus.OK
+        assert response.json() == {
+            "id": book.id,
+            "author_id": author.id,
+            "author": {
+                "id": author.id,
+                "first_name": "James S.A.",
+                "last_name": "Corey",
+            },
+            "title": "Leviathan Wakes",
+            "isbn": None,
+            "available": True,
+        }
+
+    def test_run_with_session(
+        self,
+        session: Session,
+        async_session_factory: async_sessionmaker[AsyncSession],
+    ) -> None:
+        session.add(Author(first_name="James S.A.", last_name="Corey"))
+        session.commit()
+
+        def count_authors(session: Session) -> int:
+            return session.execute(select(func.count(Author.id))).scalar_one()
+
+        async def count_in_both_modes() -> tuple[int, int]:
+            async with async_session_factory() as async_session:
+                return (
+                    await main.run_with_session(async_session, count_authors),
+                    await main.run_with_session(session, count_authors),
+                )
+
+        assert asyncio.run(count_in_both_modes()) == (1, 1)
+
+    def test_import_in_async_mode(
+        self,
+        session: Session,
+        monkeypatch: MonkeyPatch,
+        async_session_factory: async_sessionmaker[AsyncSession],
+    ) -> None:
+        monkeypatch.setattr(config, "SQLALCHEMY_ASYNC", True)
+        monkeypatch.setattr(config, "CATALOG_IMPORT_BATCH_SIZE", 1)
+
+        router = APIRouter(route_class=main.DatabaseRoute)
+        router.add_api_route("/books/import", books.import_books, methods=["POST"])
+
+        app = create_async_app(router, async_session_factory)
+
+        catalog = (
+            "author_first_name,author_last_name,title,isbn\n"
+            "James S.A.,Corey,Leviathan Wakes,9780316129084\n"
+            "James S.A.,Corey,Caliban's War,9780316129060\n"
+        )
+
+        response = TestClient(app).post(
+            "/books/import", files={"file": ("catalog.csv", catalog.encode())}
+        )
+
+        assert response.status_code == HTTPStatus.OK
+        assert response.json()["books_created"] == 2
+        assert session.execute(select(func.count(Book.id))).scalar_one() == 2
+
+    def test_read_not_delayed_by_logins(
+        self,
+        session: Session,
+        monkeypatch: MonkeyPatch,
+        async_session_factory: async_sessionmaker[AsyncSession],
+    ) -> None:
+        monkeypatch.setattr(config, "SQLALCHEMY_ASYNC", True)
+        monkeypatch.setattr(config, "PASSWORD_HASHING_WORKERS", 0)
+
+        login_delay = 0.5
+
+        def slow_verify_and_update(
+            password: str, hashed_password: str
+        ) -> tuple[bool, str | None]:
+            time.sleep(login_delay)
+            return True, None
+
+        monkeypatch.setattr(hashing, "_verify_and_update", slow_verify_and_update)
+
+        router = APIRouter(route_class=main.DatabaseRoute)
+        router.add_api_route(
+            "/user/token", user.create_jwt_token, methods=["POST"], status_code=202
+        )
+        router.add_api_route("/books/{book_id}", books.get_book, methods=["GET"])
+
+        app = create_async_app(router, async_session_factory)
+
+        book: Book = Book(
+            title="Leviathan Wakes",
+            author=Author(first_name="James S.A.", last_name="Corey"),
+        )
+        session.add_all(
+            [User(username="bruce", email="bruce@bruce.tld", password="h4xx0r"), book]
+        )
+        session.commit()
+
+        async def read_during_logins() -> tuple[float, float, list[int]]:
+            transport = httpx.ASGITransport(app=app)  # type: ignore[arg-type]
+
+            async with httpx.AsyncClient(
+                transport=transport, base_url="http://test"
+            ) as client:
+                started_at = time.perf_counter()
+                logins = [
+                    asyncio.create_task(
+                        client.post(
+                            "/user/token",
+                            data={"username": "bruce", "password": "h4xx0r"},
+                        )
+                    )
+                    for _ in range(4)
+                ]
+
+                # Every login is verifying its password
+                await asyncio.sleep(login_delay / 5)
+
+                read_started_at = time.perf_counter()
+                response = await client.get(f"/books/{book.id}")
+                read_time = time.perf_counter() - read_started_at
+                assert response.status_code == HTTPStatus.OK
+
+                statuses = [
+                    response.status_code for response in await asyncio.gather(*logins)
+                ]
+
+                return read_time, time.perf_counter() - started_at, statuses
+
+        read_time, logins_time, statuses = asyncio.run(read_during_logins())
+
+        assert statuses == [HTTPStatus.ACCEPTED] * 4
+        # The read isn't queued behind the verifications, which run side by side
+        assert read_time < login_delay / 2
+        assert logins_time < login_delay * 2
+
+    def test_read_not_delayed_by_sync_bodies(
+        self,
+        session: Session,
+        monkeypatch: MonkeyPatch,
+        async_session_factory: async_sessionmaker[AsyncSession],
+    ) -> None:
+        monkeypatch.setattr(config, "SQLALCHEMY_ASYNC", True)
+
+        body_delay = 0.5
+
+        def slow_count(session: Session = Depends(main.database_connection)) -> int:
+            count = session.execute(select(func.count(Book.id))).scalar_one()
+            # Stands for the serialization of a large page
+            time.sleep(body_delay)
+            return count
+
+        router = APIRouter(route_class=main.DatabaseRoute)
+        router.add_api_route("/books/count", slow_count, methods=["GET"])
+        router.add_api_route("/books/{book_id}", books.get_book, methods=["GET"])
+
+        app = create_async_app(router, async_session_factory)
+
+        book: Book = Book(
+            title="Leviathan Wakes",
+            author=Author(first_name="James S.A.", last_name="Corey"),
+        )
+        session.add(book)
+        session.commit()
+
+        async def read_during_counts() -> tuple[float, list[int]]:
+            transport = httpx.ASGITransport(app=app)  # type: ignore[arg-type]
+
+            async with httpx.AsyncClient(
+                transport=transport, base_url="http://test"
+            ) as client:
+                counts = [
+                    asyncio.create_task(client.get("/books/count")) for _ in range(4)
+                ]
+
+                # Every count is in its body
+                await asyncio.sleep(body_delay / 5)
+
+                read_started_at = time.perf_counter()
+                response = await client.get(f"/books/{book.id}")
+                read_time = time.perf_counter() - read_started_at
+                assert response.status_code == HTTPStatus.OK
+
+                return read_time, [
+                    response.json() for response in await asyncio.gather(*counts)
+                ]
+
+        read_time, counts = asyncio.run(read_during_counts())
+
+        assert counts == [1] * 4
+        assert read_time < body_delay / 2
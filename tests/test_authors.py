@@ -1,13 +1,20 @@
+import json
 from copy import deepcopy
+from datetime import datetime, timedelta
 from http import HTTPStatus
-from typing import Generator
+from typing import Any, Generator
 
 import pytest
+from fastapi import FastAPI
 from fastapi.testclient import TestClient
 from sqlalchemy import select
+from sqlalchemy.exc import IntegrityError
 from sqlalchemy.orm import Session
 
-from src.database.models import Author
+from src.api import config, main
+from src.database.models import Author, Book, Lending, User
+from src.schemas.books import AuthorDumpSchema
+from src.schemas.pagination import PageSchema
 
 
 class TestCreateAuthor:
@@ -143,7 +150,7 @@ class TestReadAuthor:
 
         assert response.status_code == HTTPStatus.OK
 
-        received_payload = response.json()
+        received_payload = response.json()["items"]
 
         assert len(received_payload) == 2
 
@@ -159,6 +166,68 @@ class TestReadAuthor:
             "last_name": "Chambers",
         }
 
+    def test_get_authors_same_body_as_schema(
+        self,
+        test_client: TestClient,
+        session: Session,
+    ) -> None:
+        session.add_all(
+            [
+                Author(first_name="Jérôme", last_name="Ferrari"),
+                Author(first_name="Becky", last_name="Chambers"),
+            ]
+        )
+        session.commit()
+
+        response = test_client.get("/author/", params={"limit": 1})
+
+        expected = PageSchema[AuthorDumpSchema](
+            items=[
+                AuthorDumpSchema.model_validate(author)
+                for author in Author.get_authors_list(session, limit=1)
+            ],
+            next=response.json()["next"],
+        )
+
+        assert response.content == expected.model_dump_json().encode()
+
+    def test_get_authors_paginated(
+        self,
+        test_client: TestClient,
+        session: Session,
+    ) -> None:
+        james_corey = Author(
+            first_name="James S.A.",
+            last_name="Corey",
+        )
+        becky_chambers = Author(
+            first_name="Becky",
+            last_name="Chambers",
+        )
+
+        session.add_all([james_corey, becky_chambers])
+        session.commit()
+
+        response = test_client.get("/author/", params={"limit": 1})
+
+        assert response.status_code == HTTPStatus.OK
+
+        first_page = response.json()
+
+        assert [author["id"] for author in first_page["items"]] == [james_corey.id]
+        assert first_page["next"] is not None
+
+        response = test_client.get(
+            "/author/", params={"limit": 1, "cursor": first_page["next"]}
+        )
+
+        assert response.status_code == HTTPStatus.OK
+
+        second_page = response.json()
+
+        assert [author["id"] for author in second_page["items"]] == [becky_chambers.id]
+        assert second_page["next"] is None
+
     def test_get_author_not_exists(
         self,
         test_client: TestClient,
@@ -171,6 +240,334 @@ class TestReadAuthor:
         assert response.status_code == HTTPStatus.NOT_FOUND
 
 
+class TestAuthorCounts:
+    @pytest.fixture
+    def authors(self, session: Session) -> list[Author]:
+        authors = [
+            Author(first_name="James S.A.", last_name="Corey"),
+            Author(first_name="Becky", last_name="Chambers"),
+            Author(first_name="Ursula", last_name="Le Guin"),
+        ]
+        books = [
+            Book(title="Leviathan Wakes", author=authors[0]),
+            Book(title="Caliban's War", author=authors[0]),
+            Book(title="Record of a Spaceborn Few", author=authors[1]),
+        ]
+        user = User(username="bruce", email="bruce@bruce.tld", password="h4xx0r")
+        now = datetime.now()
+
+        session.add_all([*authors, *books, user])
+        session.flush()
+        session.add_all(
+            [
+                # Current
+                Lending(
+                    book=books[0],
+                    user=user,
+                    start_time=now - timedelta(days=1),
+                    end_time=now + timedelta(days=1),
+                ),
+                # Returned, past & future ones aren't counted
+                Lending(
+                    book=books[1],
+                    user=user,
+                    start_time=now - timedelta(days=1),
+                    end_time=now + timedelta(days=1),
+                    is_active=False,
+                ),
+                Lending(
+                    book=books[1],
+                    user=user,
+                    start_time=now - timedelta(days=10),
+                    end_time=now - timedelta(days=5),
+                ),
+                Lending(
+                    book=books[2],
+                    user=user,
+                    start_time=now + timedelta(days=5),
+                    end_time=now + timedelta(days=10),
+                ),
+            ]
+        )
+        session.commit()
+
+        return authors
+
+    def test_get_authors_with_counts(
+        self,
+        test_client: TestClient,
+        authors: list[Author],
+        executed_queries: list[str],
+    ) -> None:
+        response = test_client.get("/author/", params={"with_counts": True})
+
+        assert response.status_code == HTTPStatus.OK
+        assert response.json()["items"] == [
+            {
+                "first_name": "James S.A.",
+                "last_name": "Corey",
+                "id": authors[0].id,
+                "books_count": 2,
+                "lent_books_count": 1,
+            },
+            {
+                "first_name": "Becky",
+                "last_name": "Chambers",
+                "id": authors[1].id,
+                "books_count": 1,
+                "lent_books_count": 0,
+            },
+            {
+                "first_name": "Ursula",
+                "last_name": "Le Guin",
+                "id": authors[2].id,
+                "books_count": 0,
+                "lent_books_count": 0,
+            },
+        ]
+
+        (query,) = executed_queries
+        assert "GROUP BY" in query
+
+        # Without counts, the authors only
+        response = test_client.get("/author/")
+        assert "books_count" not in response.json()["items"][0]
+
+    def test_get_authors_counts_at_request_time(
+        self,
+        app: FastAPI,
+        test_client: TestClient,
+        authors: list[Author],
+    ) -> None:
+        # When the future lending of the third book has started
+        later = datetime.now() + timedelta(days=6)
+        app.dependency_overrides[main.current_time] = lambda: later
+
+        response = test_client.get("/author/", params={"with_counts": True})
+
+        assert [author["lent_books_count"] for author in response.json()["items"]] == [
+            0,
+            1,
+            0,
+        ]
+
+    def test_get_authors_with_counts_paginated(
+        self,
+        test_client: TestClient,
+        authors: list[Author],
+    ) -> None:
+        params: dict[str, str | int | bool] = {"with_counts": True, "limit": 2}
+        first_page = test_client.get("/author/", params=params).json()
+
+        assert [author["books_count"] for author in first_page["items"]] == [2, 1]
+        assert first_page["next"] is not None
+
+        params["cursor"] = first_page["next"]
+        second_page = test_client.get("/author/", params=params).json()
+
+        assert [author["id"] for author in second_page["items"]] == [authors[2].id]
+        assert second_page["next"] is None
+
+
+class TestAuthorBooks:
+    @pytest.fixture
+    def author(self, session: Session) -> Author:
+        author = Author(first_name="James S.A.", last_name="Corey")
+        other_author = Author(first_name="Becky", last_name="Chambers")
+        session.add_all(
+            [
+                Book(title="Leviathan Wakes", author=author),
+                Book(title="Record of a Spaceborn Few", author=other_author),
+                Book(title="Caliban's War", author=author),
+                Book(title="Abaddon's Gate", author=author),
+            ]
+        )
+        session.commit()
+
+        return author
+
+    def test_get_author_books_paginated(
+        self,
+        test_client: TestClient,
+        session: Session,
+        author: Author,
+        executed_queries: list[str],
+    ) -> None:
+        user = User(username="bruce", email="bruce@bruce.tld", password="h4xx0r")
+        session.add(user)
+        session.flush()
+        session.add(
+            Lending(
+                book_id=author.books[0].id,
+                user_id=user.id,
+                start_time=datetime.now() - timedelta(days=1),
+                end_time=datetime.now() + timedelta(days=1),
+            )
+        )
+        session.commit()
+        executed_queries.clear()
+
+        response = test_client.get(f"/author/{author.id}/books", params={"limit": 2})
+
+        assert response.status_code == HTTPStatus.OK
+        first_page = response.json()
+        assert [(book["title"], book["available"]) for book in first_page["items"]] == [
+            ("Leviathan Wakes", False),
+            ("Caliban's War", True),
+        ]
+
+        # The existence of the author, then the page with its availability
+        _, query = executed_queries
+        assert "lending" in query
+        assert "LIMIT" in query
+
+        response = test_client.get(
+            f"/author/{author.id}/books",
+            params={"limit": 2, "cursor": first_page["next"]},
+        )
+        second_page = response.json()
+
+        assert [book["title"] for book in second_page["items"]] == ["Abaddon's Gate"]
+        assert second_page["next"] is None
+
+    def test_get_author_books_selected_fields(
+        self,
+        test_client: TestClient,
+        author: Author,
+    ) -> None:
+        response = test_client.get(
+            f"/author/{author.id}/books", params={"fields": "title"}
+        )
+
+        assert response.json()["items"][0] == {"title": "Leviathan Wakes"}
+
+    def test_get_author_books_unknown_author(
+        self,
+        test_client: TestClient,
+    ) -> None:
+        response = test_client.get("/author/42/books")
+
+        assert response.status_code == HTTPStatus.NOT_FOUND
+
+
+class TestConditionalAuthors:
+    def test_get_author_not_modified(
+        self,
+        test_client: TestClient,
+        session: Session,
+        monkeypatch: pytest.MonkeyPatch,
+    ) -> None:
+        monkeypatch.setattr(config, "CATALOG_CACHE_MAX_AGE", 60)
+
+        author = Author(first_name="James S.A.", last_name="Corey")
+        session.add(author)
+        session.commit()
+
+        response = test_client.get(f"/author/{author.id}")
+
+        assert response.status_code == HTTPStatus.OK
+        assert (
+            response.headers["cache-control"] == "public, max-age=60, must-revalidate"
+        )
+
+        etag = response.headers["etag"]
+
+        response = test_client.get(
+            f"/author/{author.id}", headers={"If-None-Match": etag}
+        )
+        assert response.status_code == HTTPStatus.NOT_MODIFIED
+
+        response = test_client.get("/author/", headers={"If-None-Match": etag})
+        assert response.status_code == HTTPStatus.OK
+
+    def test_update_author_bumps_version(
+        self,
+        test_client: TestClient,
+        session: Session,
+    ) -> None:
+        author = Author(first_name="James S.A.", last_name="Corey")
+        session.add(author)
+        session.commit()
+
+        assert author.version == 1
+
+        etag = test_client.get(f"/author/{author.id}").headers["etag"]
+
+        response = test_client.put(
+            f"/author/{author.id}",
+            json={"first_name": "James", "last_name": "Corey"},
+        )
+        assert response.status_code == HTTPStatus.OK
+
+        session.refresh(author)
+        assert author.version == 2
+
+        response = test_client.get(
+            f"/author/{author.id}", headers={"If-None-Match": etag}
+        )
+        assert response.status_code == HTTPStatus.OK
+        assert response.headers["etag"] != etag
+
+
+class TestExportAuthors:
+    def test_export_authors(
+        self,
+        test_client: TestClient,
+        session: Session,
+        monkeypatch: pytest.MonkeyPatch,
+    ) -> None:
+        # Several partitions
+        monkeypatch.setattr(config, "EXPORT_BATCH_SIZE", 2)
+
+        session.add_all(
+            [
+                Author(first_name=f"First {index}", last_name="Last")
+                for index in range(5)
+            ]
+        )
+        session.commit()
+
+        response = test_client.get("/author/export")
+
+        assert response.status_code == HTTPStatus.OK
+        assert response.headers["content-type"] == "application/x-ndjson"
+
+        lines = response.text.splitlines()
+        assert [json.loads(line)["first_name"] for line in lines] == [
+            f"First {index}" for index in range(5)
+        ]
+
+    def test_export_authors_as_json_array(
+        self,
+        test_client: TestClient,
+        session: Session,
+        monkeypatch: pytest.MonkeyPatch,
+    ) -> None:
+        monkeypatch.setattr(config, "EXPORT_BATCH_SIZE", 2)
+
+        session.add_all(
+            [
+                Author(first_name=f"First {index}", last_name="Last")
+                for index in range(3)
+            ]
+        )
+        session.commit()
+
+        response = test_client.get("/author/export", params={"format": "json"})
+
+        assert response.status_code == HTTPStatus.OK
+        assert [author["id"] for author in response.json()] == [1, 2, 3]
+
+    def test_export_no_authors(
+        self,
+        test_client: TestClient,
+    ) -> None:
+        response = test_client.get("/author/export", params={"format": "json"})
+
+        assert response.status_code == HTTPStatus.OK
+        assert response.json() == []
+
+
 class TestUpdateAuthor:
     @pytest.fixture
     def author_payload(self) -> Generator[dict[str, int | str], None, None]:
@@ -270,6 +667,34 @@ class TestUpdateAuthor:
         )
         assert response.status_code == HTTPStatus.NOT_FOUND
 
+    def test_patch_author(
+        self,
+        test_client: TestClient,
+        session: Session,
+        executed_queries: list[str],
+    ) -> None:
+        author = Author(first_name="James S.A.", last_name="Corey")
+        session.add(author)
+        session.commit()
+        executed_queries.clear()
+
+        response = test_client.patch(
+            f"/author/{author.id}", json={"first_name": "James"}
+        )
+
+        assert response.status_code == HTTPStatus.OK
+        assert response.json() == {
+            "first_name": "James",
+            "last_name": "Corey",
+            "id": author.id,
+        }
+        assert executed_queries[0].startswith(
+            "UPDATE author SET first_name=?, version="
+        )
+
+        response = test_client.patch("/author/42", json={"first_name": "James"})
+        assert response.status_code == HTTPStatus.NOT_FOUND
+
 
 class TestDeleteAuthor:
     def test_delete_author_wrong_id(
@@ -302,3 +727,41 @@ class TestDeleteAuthor:
         assert response.status_code == HTTPStatus.NO_CONTENT
 
         assert session.query(Author).count() == 0
+
+    def test_delete_author_with_books(
+        self,
+        test_client: TestClient,
+        monkeypatch: pytest.MonkeyPatch,
+    ) -> None:
+        def referenced_authors(*args: Any, **kwargs: Any) -> list[int]:
+            # Foreign keys aren't enforced by the test database (SQLite)
+            raise IntegrityError("DELETE FROM author", None, Exception("FOREIGN KEY"))
+
+        monkeypatch.setattr(Author, "bulk_delete", referenced_authors)
+
+        response = test_client.delete("/author/42")
+
+        assert response.status_code == HTTPStatus.CONFLICT
+
+    def test_bulk_delete_authors(
+        self,
+        test_client: TestClient,
+        session: Session,
+    ) -> None:
+        authors = [
+            Author(first_name="James S.A.", last_name="Corey"),
+            Author(first_name="Becky", last_name="Chambers"),
+        ]
+        session.add_all(authors)
+        session.commit()
+
+        response = test_client.post(
+            "/author/bulk-delete", json=[authors[1].id, 42, authors[0].id]
+        )
+
+        assert response.status_code == HTTPStatus.OK
+        assert response.json() == {
+            "deleted": sorted(author.id for author in authors),
+            "not_found": [42],
+        }
+        assert session.query(Author).count() == 0
@@ -1,12 +1,18 @@
+import json
 from copy import deepcopy
+from datetime import datetime, timedelta
 from http import HTTPStatus
 from typing import Any, Generator
 
 import pytest
 from fastapi.testclient import TestClient
+from sqlalchemy.exc import IntegrityError
 from sqlalchemy.orm import Session
 
-from src.database.models import Author, Book
+from src.api import config
+from src.database.models import Author, Book, Lending, User
+from src.schemas.books import BookDumpSchema
+from src.schemas.pagination import PageSchema
 
 
 class TestCreateBooks:
@@ -92,6 +98,126 @@ class TestCreateBooks:
         assert error_detail["msg"] == "Field required"
 
 
+class TestBulkCreateBooks:
+    def test_create_books(
+        self,
+        test_client: TestClient,
+        session: Session,
+        executed_queries: list[str],
+        monkeypatch: pytest.MonkeyPatch,
+    ) -> None:
+        monkeypatch.setattr(config, "BOOKS_BULK_BATCH_SIZE", 10)
+
+        author = Author(first_name="James S.A.", last_name="Corey")
+        session.add(author)
+        session.commit()
+
+        payload = [
+            {"title": f"Expanse {index}", "author_id": author.id} for index in range(25)
+        ]
+
+        executed_queries.clear()
+
+        response = test_client.post("/books/bulk", json=payload)
+
+        assert response.status_code == HTTPStatus.CREATED
+
+        ids = response.json()["ids"]
+        assert len(ids) == 25
+
+        # Authors are checked by a single query, created books aren't reloaded
+        selects = [query for query in executed_queries if query.startswith("SELECT")]
+        assert len(selects) == 1
+
+        books = {book.id: book for book in Book.get_all(session)}
+        assert [books[book_id].title for book_id in ids] == [
+            book["title"] for book in payload
+        ]
+
+    def test_create_books_unknown_authors(
+        self,
+        test_client: TestClient,
+        session: Session,
+    ) -> None:
+        author = Author(first_name="James S.A.", last_name="Corey")
+        session.add(author)
+        session.commit()
+
+        payload = [
+            {"title": "Leviathan Wakes", "author_id": author.id},
+            {"title": "Caliban's War", "author_id": 42},
+            {"title": "Abaddon's Gate", "author_id": author.id},
+            {"title": "Cibola Burn", "author_id": 43},
+        ]
+
+        response = test_client.post("/books/bulk", json=payload)
+
+        assert response.status_code == HTTPStatus.UNPROCESSABLE_ENTITY
+        assert response.json()["detail"]["errors"] == [
+            {"index": 1, "detail": "Unknown author 42"},
+            {"index": 3, "detail": "Unknown author 43"},
+        ]
+
+        # Nothing is created
+        assert Book.get_all(session) == []
+
+    def test_create_books_duplicate_isbns(
+        self,
+        test_client: TestClient,
+        session: Session,
+    ) -> None:
+        author = Author(first_name="James S.A.", last_name="Corey")
+        session.add(
+            Book(title="Leviathan Wakes", isbn="9780316129084", author=author),
+        )
+        session.commit()
+
+        payload = [
+            {"title": "Caliban's War", "isbn": "9780316129060", "author_id": author.id},
+            {"title": "Leviathan Wakes", "isbn": "9780316129084", "author_id": 42},
+            {"title": "Caliban's War", "isbn": "9780316129060", "author_id": author.id},
+            {"title": "Abaddon's Gate", "author_id": author.id},
+        ]
+
+        response = test_client.post("/books/bulk", json=payload)
+
+        assert response.status_code == HTTPStatus.UNPROCESSABLE_ENTITY
+        assert response.json()["detail"]["errors"] == [
+            {"index": 1, "detail": "Unknown author 42"},
+            {"index": 1, "detail": "ISBN 9780316129084 already exists"},
+            {"index": 2, "detail": "ISBN 9780316129060 already used by book 0"},
+        ]
+
+        # Nothing is created
+        assert [book.title for book in Book.get_all(session)] == ["Leviathan Wakes"]
+
+    def test_create_books_malformed_item(
+        self,
+        test_client: TestClient,
+    ) -> None:
+        response = test_client.post(
+            "/books/bulk",
+            json=[{"title": "Leviathan Wakes", "author_id": 1}, {"author_id": 1}],
+        )
+
+        assert response.status_code == HTTPStatus.UNPROCESSABLE_ENTITY
+        assert response.json()["detail"][0]["loc"] == ["body", 1, "title"]
+
+    def test_create_too_many_books(
+        self,
+        test_client: TestClient,
+        monkeypatch: pytest.MonkeyPatch,
+    ) -> None:
+        monkeypatch.setattr(config, "BOOKS_BULK_MAX_SIZE", 2)
+
+        response = test_client.post(
+            "/books/bulk",
+            json=[{"title": "Leviathan Wakes", "author_id": 1}] * 3,
+        )
+
+        assert response.status_code == HTTPStatus.REQUEST_ENTITY_TOO_LARGE
+
+
 class TestReadBooks:
     def test_get_book(
         self,
@@ -150,7 +276,7 @@ class TestReadBooks:
 
         assert response.status_code == HTTPStatus.OK
 
-        assert len(response.json()) == 0
+        assert response.json() == {"items": [], "next": None}
 
     def test_get_books(
         self,
@@ -191,7 +317,665 @@ class TestReadBooks:
 
         assert response.status_code == HTTPStatus.OK
 
-        assert len(response.json()) == 3
+        assert len(response.json()["items"]) == 3
+        assert response.json()["next"] is None
+
+    def test_get_books_paginated(
+        self,
+        test_client: TestClient,
+        session: Session,
+    ) -> None:
+        author = Author(
+            first_name="James S.A.",
+            last_name="Corey",
+        )
+        books = [
+            Book(title=title, author=author)
+            for title in [
+                "Leviathan Wakes",
+                "Caliban's War",
+                "Abaddon's Gate",
+                "Cibola Burn",
+                "Nemesis Games",
+            ]
+        ]
+
+        session.add_all([author, *books])
+        session.commit()
+
+        received_titles: list[str] = []
+        params: dict[str, str | int] = {"limit": 2}
+        pages_count = 0
+
+        while True:
+            response = test_client.get("/books", params=params)
+
+            assert response.status_code == HTTPStatus.OK
+
+            received_payload = response.json()
+            received_titles.extend(book["title"] for book in received_payload["items"])
+            pages_count += 1
+
+            if received_payload["next"] is None:
+                break
+
+            params["cursor"] = received_payload["next"]
+
+        # 2 + 2 + 1 books, pages are ordered by id
+        assert pages_count == 3
+        assert received_titles == [book.title for book in books]
+
+    def test_get_books_query_count_does_not_grow(
+        self,
+        test_client: TestClient,
+        session: Session,
+        executed_queries: list[str],
+    ) -> None:
+        user = User(
+            username="bruce",
+            email="bruce@bruce.tld",
+            password="h4xx0r",
+        )
+        session.add(user)
+
+        def add_books(count: int) -> None:
+            for index in range(count):
+                author = Author(first_name="Author", last_name=str(index))
+                book = Book(title=f"Book {index}", author=author)
+                # Every other book is currently lent
+                lendings = (
+                    [
+                        Lending(
+                            book=book,
+                            user=user,
+                            start_time=datetime.now() - timedelta(days=1),
+                            end_time=datetime.now() + timedelta(days=1),
+                        )
+                    ]
+                    if index % 2
+                    else []
+                )
+                session.add_all([author, book, *lendings])
+
+            session.commit()
+
+        add_books(2)
+        executed_queries.clear()
+
+        response = test_client.get("/books")
+
+        assert response.status_code == HTTPStatus.OK
+        assert [book["available"] for book in response.json()["items"]] == [
+            True,
+            False,
+        ]
+
+        queries_for_two_books = len(executed_queries)
+
+        add_books(20)
+        executed_queries.clear()
+
+        response = test_client.get("/books")
+
+        assert response.status_code == HTTPStatus.OK
+        assert len(response.json()["items"]) == 22
+        assert len(executed_queries) == queries_for_two_books
+
+    def test_get_book_single_query(
+        self,
+        test_client: TestClient,
+        session: Session,
+        executed_queries: list[str],
+    ) -> None:
+        author = Author(
+            first_name="James S.A.",
+            last_name="Corey",
+        )
+        book = Book(
+            title="Leviathan Wakes",
+            author=author,
+        )
+
+        session.add_all([author, book])
+        session.commit()
+
+        executed_queries.clear()
+
+        response = test_client.get(f"/books/{book.id}")
+
+        assert response.status_code == HTTPStatus.OK
+        assert response.json()["author"]["last_name"] == "Corey"
+        # Book, author and availability come from the same query
+        assert len(executed_queries) == 1
+
+    def test_get_books_invalid_cursor(
+        self,
+        test_client: TestClient,
+    ) -> None:
+        response = test_client.get("/books", params={"cursor": "not-a-cursor"})
+
+        assert response.status_code == HTTPStatus.BAD_REQUEST
+
+    def test_get_books_page_size_above_max(
+        self,
+        test_client: TestClient,
+    ) -> None:
+        response = test_client.get("/books", params={"limit": 100_000})
+
+        assert response.status_code == HTTPStatus.UNPROCESSABLE_ENTITY
+
+
+class TestConditionalBooks:
+    def test_get_book_not_modified(
+        self,
+        test_client: TestClient,
+        session: Session,
+    ) -> None:
+        book = Book(
+            title="Leviathan Wakes",
+            author=Author(first_name="James S.A.", last_name="Corey"),
+        )
+        session.add(book)
+        session.commit()
+
+        response = test_client.get(f"/books/{book.id}")
+
+        assert response.status_code == HTTPStatus.OK
+        assert response.headers["cache-control"] == "public, no-cache"
+
+        etag = response.headers["etag"]
+
+        response = test_client.get(f"/books/{book.id}", headers={"If-None-Match": etag})
+
+        assert response.status_code == HTTPStatus.NOT_MODIFIED
+        assert response.content == b""
+        assert response.headers["etag"] == etag
+
+    def test_book_etag_changes(
+        self,
+        test_client: TestClient,
+        session: Session,
+    ) -> None:
+        user = User(username="bruce", email="bruce@bruce.tld", password="h4xx0r")
+        author = Author(first_name="James S.A.", last_name="Corey")
+        book = Book(title="Leviathan Wakes", author=author)
+        session.add_all([user, author, book])
+        session.commit()
+
+        etags = {test_client.get(f"/books/{book.id}").headers["etag"]}
+
+        # Update of the book
+        response = test_client.put(
+            f"/books/{book.id}",
+            json={"title": "Caliban's War", "author_id": author.id},
+        )
+        assert response.status_code == HTTPStatus.OK
+        etags.add(test_client.get(f"/books/{book.id}").headers["etag"])
+
+        # Update of its author
+        response = test_client.put(
+            f"/author/{author.id}",
+            json={"first_name": "James", "last_name": "Corey"},
+        )
+        assert response.status_code == HTTPStatus.OK
+        etags.add(test_client.get(f"/books/{book.id}").headers["etag"])
+
+        # Lent, not available anymore
+        session.add(
+            Lending(
+                book_id=book.id,
+                user_id=user.id,
+                start_time=datetime.now() - timedelta(days=1),
+                end_time=datetime.now() + timedelta(days=1),
+            )
+        )
+        session.commit()
+
+        response = test_client.get(
+            f"/books/{book.id}", headers={"If-None-Match": etags.copy().pop()}
+        )
+        assert response.status_code == HTTPStatus.OK
+        etags.add(response.headers["etag"])
+
+        assert len(etags) == 4
+
+    def test_get_books_not_modified(
+        self,
+        test_client: TestClient,
+        session: Session,
+    ) -> None:
+        author = Author(first_name="James S.A.", last_name="Corey")
+        session.add_all(
+            [
+                author,
+                *(Book(title=f"Expanse {index}", author=author) for index in range(3)),
+            ]
+        )
+        session.commit()
+
+        etag = test_client.get("/books/").headers["etag"]
+
+        response = test_client.get("/books/", headers={"If-None-Match": f"W/{etag}"})
+        assert response.status_code == HTTPStatus.NOT_MODIFIED
+
+        # Another page
+        response = test_client.get(
+            "/books/", params={"limit": 2}, headers={"If-None-Match": etag}
+        )
+        assert response.status_code == HTTPStatus.OK
+
+        session.add(Book(title="Expanse 3", author=author))
+        session.commit()
+
+        response = test_client.get("/books/", headers={"If-None-Match": etag})
+        assert response.status_code == HTTPStatus.OK
+        assert len(response.json()["items"]) == 4
+
+
+class TestExportBooks:
+    def test_export_books(
+        self,
+        test_client: TestClient,
+        session: Session,
+        monkeypatch: pytest.MonkeyPatch,
+    ) -> None:
+        # Several partitions
+        monkeypatch.setattr(config, "EXPORT_BATCH_SIZE", 2)
+
+        user = User(username="bruce", email="bruce@bruce.tld", password="h4xx0r")
+        author = Author(first_name="James S.A.", last_name="Corey")
+        books = [Book(title=f"Expanse {index}", author=author) for index in range(5)]
+        session.add_all([user, author, *books])
+        session.commit()
+
+        session.add(
+            Lending(
+                book_id=books[0].id,
+                user_id=user.id,
+                start_time=datetime.now() - timedelta(days=1),
+                end_time=datetime.now() + timedelta(days=1),
+            )
+        )
+        session.commit()
+
+        response = test_client.get("/books/export")
+
+        assert response.status_code == HTTPStatus.OK
+        assert response.headers["content-type"] == "application/x-ndjson"
+
+        exported_books = [json.loads(line) for line in response.text.splitlines()]
+        assert [book["title"] for book in exported_books] == [
+            f"Expanse {index}" for index in range(5)
+        ]
+        assert [book["available"] for book in exported_books] == [
+            False,
+            True,
+            True,
+            True,
+            True,
+        ]
+        assert exported_books[0]["author"]["last_name"] == "Corey"
+
+    def test_export_books_as_json_array(
+        self,
+        test_client: TestClient,
+        session: Session,
+    ) -> None:
+        author = Author(first_name="James S.A.", last_name="Corey")
+        session.add_all(
+            [
+                author,
+                *(Book(title=f"Expanse {index}", author=author) for index in range(3)),
+            ]
+        )
+        session.commit()
+
+        response = test_client.get("/books/export", params={"format": "json"})
+
+        assert response.status_code == HTTPStatus.OK
+        assert [book["id"] for book in response.json()] == [1, 2, 3]
+
+
+class TestBookRowReads:
+    @pytest.fixture
+    def books(self, session: Session) -> list[Book]:
+        user = User(username="bruce", email="bruce@bruce.tld", password="h4xx0r")
+        author = Author(first_name="Jérôme", last_name="Ferrari")
+        books = [
+            Book(title="Le Sermon sur la chute de Rome", author=author),
+            Book(title="À son image", isbn="9782330108645", author=author),
+        ]
+        session.add_all([user, author, *books])
+        session.commit()
+
+        session.add(
+            Lending(
+                book_id=books[1].id,
+                user_id=user.id,
+                start_time=datetime.now() - timedelta(days=1),
+                end_time=datetime.now() + timedelta(days=1),
+            )
+        )
+        session.commit()
+
+        return books
+
+    def test_get_books_same_body_as_schema(
+        self,
+        test_client: TestClient,
+        session: Session,
+        books: list[Book],
+    ) -> None:
+        response = test_client.get("/books/", params={"limit": 1})
+
+        expected = PageSchema[BookDumpSchema](
+            items=[
+                BookDumpSchema.model_validate(book)
+                for book in Book.get_all(session, limit=1, now=datetime.now())
+            ],
+            next=response.json()["next"],
+        )
+
+        assert response.headers["content-type"] == "application/json"
+        assert response.content == expected.model_dump_json().encode()
+
+        response = test_client.get(
+            "/books/", params={"cursor": response.json()["next"]}
+        )
+        assert not response.json()["items"][0]["available"]
+
+    def test_export_same_lines_as_schema(
+        self,
+        test_client: TestClient,
+        session: Session,
+        books: list[Book],
+    ) -> None:
+        response = test_client.get("/books/export")
+
+        assert response.content.splitlines() == [
+            BookDumpSchema.model_validate(book).model_dump_json().encode()
+            for book in Book.get_all(session, now=datetime.now())
+        ]
+
+    def test_rows_not_loaded_in_session(
+        self,
+        session: Session,
+        books: list[Book],
+    ) -> None:
+        session.expunge_all()
+
+        rows = Book.get_all_rows(session, now=datetime.now())
+
+        assert [row.id for row in rows] == [book.id for book in books]
+        assert len(session.identity_map) == 0
+
+
+class TestSparseBookFields:
+    @pytest.fixture
+    def book(self, session: Session) -> Book:
+        book = Book(
+            title="Leviathan Wakes",
+            author=Author(first_name="James S.A.", last_name="Corey"),
+        )
+        session.add(book)
+        session.commit()
+
+        return book
+
+    def test_get_books_selected_fields(
+        self,
+        test_client: TestClient,
+        book: Book,
+        executed_queries: list[str],
+    ) -> None:
+        response = test_client.get("/books/", params={"fields": "id,title"})
+
+        assert response.status_code == HTTPStatus.OK
+        assert response.json()["items"] == [{"id": book.id, "title": "Leviathan Wakes"}]
+
+        # Neither the author nor the lendings are queried
+        (query,) = executed_queries
+        assert "JOIN" not in query
+        assert "lending" not in query
+
+    def test_get_books_expand_author(
+        self,
+        test_client: TestClient,
+        book: Book,
+        executed_queries: list[str],
+    ) -> None:
+        response = test_client.get(
+            "/books/", params={"fields": "title", "expand": "author"}
+        )
+
+        assert response.json()["items"] == [
+            {
+                "title": "Leviathan Wakes",
+                "author": {
+                    "first_name": "James S.A.",
+                    "last_name": "Corey",
+                    "id": book.author_id,
+                },
+            }
+        ]
+        (query,) = executed_queries
+        assert "JOIN author" in query
+        assert "lending" not in query
+
+        # Listing the relation in ``fields`` expands it too
+        response = test_client.get("/books/", params={"fields": "title,author"})
+        assert "author" in response.json()["items"][0]
+
+    def test_get_book_selected_fields(
+        self,
+        test_client: TestClient,
+        book: Book,
+        executed_queries: list[str],
+    ) -> None:
+        full_response = test_client.get(f"/books/{book.id}")
+        executed_queries.clear()
+
+        response = test_client.get(
+            f"/books/{book.id}", params={"fields": "id,available"}
+        )
+
+        assert response.json() == {"id": book.id, "available": True}
+        assert response.headers["etag"] != full_response.headers["etag"]
+        (query,) = executed_queries
+        assert "JOIN" not in query
+
+    def test_unknown_fields(
+        self,
+        test_client: TestClient,
+        book: Book,
+    ) -> None:
+        for params in ({"fields": "id,publisher"}, {"expand": "lendings"}):
+            response = test_client.get("/books/", params=params)
+
+            assert response.status_code == HTTPStatus.BAD_REQUEST
+
+
+class TestBookLookups:
+    @pytest.fixture
+    def authors(self, session: Session) -> list[Author]:
+        authors = [
+            Author(first_name="James S.A.", last_name="Corey"),
+            Author(first_name="Ursula", last_name="Le Guin"),
+        ]
+        session.add_all(
+            [
+                Book(title="Leviathan Wakes", isbn="9780316129084", author=authors[0]),
+                Book(title="A Wizard of Earthsea", author=authors[1]),
+                Book(title="Caliban's War", author=authors[0]),
+                Book(title="The Left Hand of Darkness", author=authors[1]),
+                Book(title="Abaddon's Gate", author=authors[0]),
+            ]
+        )
+        session.commit()
+
+        return authors
+
+    def test_get_books_by_isbn(
+        self,
+        test_client: TestClient,
+        authors: list[Author],
+    ) -> None:
+        response = test_client.get("/books/", params={"isbn": "9780316129084"})
+
+        assert response.status_code == HTTPStatus.OK
+        assert [book["title"] for book in response.json()["items"]] == [
+            "Leviathan Wakes"
+        ]
+
+        response = test_client.get("/books/", params={"isbn": "9780000000000"})
+        assert response.json() == {"items": [], "next": None}
+
+    def test_get_books_by_author_paginated(
+        self,
+        test_client: TestClient,
+        authors: list[Author],
+    ) -> None:
+        received_titles: list[str] = []
+        params: dict[str, str | int] = {"author_id": authors[0].id, "limit": 2}
+
+        while True:
+            received_payload = test_client.get("/books/", params=params).json()
+            received_titles.extend(book["title"] for book in received_payload["items"])
+
+            if received_payload["next"] is None:
+                break
+
+            params["cursor"] = received_payload["next"]
+
+        assert received_titles == ["Leviathan Wakes", "Caliban's War", "Abaddon's Gate"]
+
+    def test_duplicate_isbn(
+        self,
+        test_client: TestClient,
+        authors: list[Author],
+    ) -> None:
+        response = test_client.post(
+            "/books/",
+            json={
+                "title": "Leviathan Wakes",
+                "isbn": "9780316129084",
+                "author_id": authors[0].id,
+            },
+        )
+
+        assert response.status_code == HTTPStatus.CONFLICT
+
+
+class TestBookAvailability:
+    def test_get_book_availability(
+        self,
+        test_client: TestClient,
+        session: Session,
+        executed_queries: list[str],
+    ) -> None:
+        user = User(username="bruce", email="bruce@bruce.tld", password="h4xx0r")
+        book = Book(
+            title="Leviathan Wakes",
+            author=Author(first_name="James S.A.", last_name="Corey"),
+        )
+        session.add_all([user, book])
+        session.commit()
+
+        for start_day, end_day in [(1, 5), (3, 10), (15, 20), (25, 28)]:
+            session.add(
+                Lending(
+                    book_id=book.id,
+                    user_id=user.id,
+                    start_time=datetime(2023, 1, start_day),
+                    end_time=datetime(2023, 1, end_day),
+                )
+            )
+        # Returned, doesn't take the book
+        session.add(
+            Lending(
+                book_id=book.id,
+                user_id=user.id,
+                start_time=datetime(2023, 1, 11),
+                end_time=datetime(2023, 1, 14),
+                is_active=False,
+            )
+        )
+        session.commit()
+
+        executed_queries.clear()
+
+        response = test_client.get(
+            f"/books/{book.id}/availability",
+            params={
+                "from": datetime(2023, 1, 2).isoformat(),
+                "to": datetime(2023, 2, 1).isoformat(),
+            },
+        )
+
+        assert response.status_code == HTTPStatus.OK
+        assert response.json() == {
+            "book_id": book.id,
+            "free_periods": [
+                {
+                    "start_time": "2023-01-10T00:00:00",
+                    "end_time": "2023-01-15T00:00:00",
+                },
+                {
+                    "start_time": "2023-01-20T00:00:00",
+                    "end_time": "2023-01-25T00:00:00",
+                },
+                {
+                    "start_time": "2023-01-28T00:00:00",
+                    "end_time": "2023-02-01T00:00:00",
+                },
+            ],
+        }
+        # Book existence & free periods
+        assert len(executed_queries) == 2
+
+    def test_get_book_availability_without_lendings(
+        self,
+        test_client: TestClient,
+        session: Session,
+    ) -> None:
+        book = Book(
+            title="Leviathan Wakes",
+            author=Author(first_name="James S.A.", last_name="Corey"),
+        )
+        session.add(book)
+        session.commit()
+
+        response = test_client.get(
+            f"/books/{book.id}/availability",
+            params={"from": "2023-01-01T00:00:00", "to": "2023-02-01T00:00:00"},
+        )
+
+        assert response.status_code == HTTPStatus.OK
+        assert response.json()["free_periods"] == [
+            {"start_time": "2023-01-01T00:00:00", "end_time": "2023-02-01T00:00:00"},
+        ]
+
+    def test_get_book_availability_invalid_window(
+        self,
+        test_client: TestClient,
+    ) -> None:
+        response = test_client.get(
+            "/books/1/availability",
+            params={"from": "2023-02-01T00:00:00", "to": "2023-01-01T00:00:00"},
+        )
+
+        assert response.status_code == HTTPStatus.BAD_REQUEST
+
+    def test_get_book_availability_wrong_id(
+        self,
+        test_client: TestClient,
+    ) -> None:
+        response = test_client.get(
+            "/books/1/availability",
+            params={"from": "2023-01-01T00:00:00", "to": "2023-02-01T00:00:00"},
+        )
+
+        assert response.status_code == HTTPStatus.NOT_FOUND
 
 
 class TestUpdateBooks:
@@ -302,6 +1086,89 @@ class TestUpdateBooks:
         assert error_detail["msg"] == "Field required"
 
 
+class TestPatchBooks:
+    @pytest.fixture
+    def book(self, session: Session) -> Book:
+        book = Book(
+            title="Leviathan Wakes",
+            isbn="9780316129084",
+            author=Author(first_name="James S.A.", last_name="Corey"),
+        )
+        session.add(book)
+        session.commit()
+
+        return book
+
+    def test_patch_book(
+        self,
+        test_client: TestClient,
+        session: Session,
+        book: Book,
+        executed_queries: list[str],
+    ) -> None:
+        executed_queries.clear()
+
+        response = test_client.patch(f"/books/{book.id}", json={"isbn": None})
+
+        assert response.status_code == HTTPStatus.OK
+        assert response.json() == {
+            "title": "Leviathan Wakes",
+            "author_id": book.author_id,
+            "isbn": None,
+            "id": book.id,
+            "author": {
+                "first_name": "James S.A.",
+                "last_name": "Corey",
+                "id": book.author_id,
+            },
+            "available": True,
+        }
+
+        # Only the column sent is written, the response is read by the same statement
+        (query,) = executed_queries
+        assert query.startswith("UPDATE book SET isbn=?, version=")
+        assert "RETURNING" in query
+
+        session.refresh(book)
+        assert book.isbn is None
+        assert book.version == 2
+
+    def test_patch_book_author(
+        self,
+        test_client: TestClient,
+        session: Session,
+        book: Book,
+    ) -> None:
+        author = Author(first_name="Becky", last_name="Chambers")
+        session.add(author)
+        session.commit()
+
+        response = test_client.patch(f"/books/{book.id}", json={"author_id": author.id})
+
+        assert response.json()["author"]["last_name"] == "Chambers"
+
+        response = test_client.patch(f"/books/{book.id}", json={"author_id": 42})
+
+        assert response.status_code == HTTPStatus.UNPROCESSABLE_ENTITY
+
+    def test_patch_book_null_field(
+        self,
+        test_client: TestClient,
+        book: Book,
+    ) -> None:
+        response = test_client.patch(f"/books/{book.id}", json={"title": None})
+
+        assert response.status_code == HTTPStatus.UNPROCESSABLE_ENTITY
+
+    def test_patch_book_wrong_id(
+        self,
+        test_client: TestClient,
+    ) -> None:
+        response = test_client.patch("/books/42", json={"title": "Caliban's War"})
+
+        assert response.status_code == HTTPStatus.NOT_FOUND
+
+
 class TestDeleteBook:
     def test_delete_book(
         self,
@@ -339,3 +1206,86 @@ class TestDeleteBook:
         response = test_client.delete("/books/42")
 
         assert response.status_code == HTTPStatus.NOT_FOUND
+
+    def test_delete_book_with_lendings(
+        self,
+        test_client: TestClient,
+        monkeypatch: pytest.MonkeyPatch,
+    ) -> None:
+        def referenced_books(*args: Any, **kwargs: Any) -> list[int]:
+            # Foreign keys aren't enforced by the test database (SQLite)
+            raise IntegrityError("DELETE FROM book", None, Exception("FOREIGN KEY"))
+
+        monkeypatch.setattr(Book, "bulk_delete", referenced_books)
+
+        response = test_client.delete("/books/42")
+
+        assert response.status_code == HTTPStatus.CONFLICT
+
+    def test_delete_book_single_statement(
+        self,
+        test_client: TestClient,
+        session: Session,
+        executed_queries: list[str],
+    ) -> None:
+        book = Book(
+            title="Leviathan Wakes",
+            author=Author(first_name="James S.A.", last_name="Corey"),
+        )
+        session.add(book)
+        session.commit()
+        book_id = book.id
+        executed_queries.clear()
+
+        response = test_client.delete(f"/books/{book_id}")
+
+        assert response.status_code == HTTPStatus.NO_CONTENT
+        # No existence check before the DELETE, the search index is updated along
+        (delete_query, _) = executed_queries
+        assert delete_query.startswith("DELETE FROM book ")
+        assert "RETURNING" in delete_query
+
+
+class TestBulkDeleteBooks:
+    def test_delete_books(
+        self,
+        test_client: TestClient,
+        session: Session,
+        monkeypatch: pytest.MonkeyPatch,
+        executed_queries: list[str],
+    ) -> None:
+        monkeypatch.setattr(config, "BULK_DELETE_BATCH_SIZE", 2)
+
+        author = Author(first_name="James S.A.", last_name="Corey")
+        books = [Book(title=f"Book {index}", author=author) for index in range(4)]
+        session.add_all(books)
+        session.commit()
+        book_ids = [book.id for book in books]
+        executed_queries.clear()
+
+        response = test_client.post(
+            "/books/bulk-delete", json=[book_ids[2], 42, *book_ids[:2], book_ids[2]]
+        )
+
+        assert response.status_code == HTTPStatus.OK
+        assert response.json() == {"deleted": book_ids[:3], "not_found": [42]}
+
+        # 4 distinct ids, 2 per statement
+        delete_queries = [
+            query for query in executed_queries if query.startswith("DELETE FROM book ")
+        ]
+        assert len(delete_queries) == 2
+
+        session.expire_all()
+        assert [book.id for book in session.query(Book)] == [book_ids[3]]
+
+    def test_delete_too_many_books(
+        self,
+        test_client: TestClient,
+        monkeypatch: pytest.MonkeyPatch,
+    ) -> None:
+        monkeypatch.setattr(config, "BULK_DELETE_MAX_SIZE", 2)
+
+        response = test_client.post("/books/bulk-delete", json=[1, 2, 3])
+
+        assert response.status_code == HTTPStatus.REQUEST_ENTITY_TOO_LARGE
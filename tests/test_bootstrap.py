@@ -0,0 +1,91 @@
+import uuid
+
+import pytest
+from sqlalchemy import inspect, text
+
+from src.api.main import engine
+from src.bootstrap_database_schema import add_missing_columns, create_missing_indexes
+from src.database.models import Book, Lending, User
+
+
+class TestMigration:
+    def test_create_missing_indexes(self) -> None:
+        (index,) = [
+            index
+            for index in Lending.__table__.indexes
+            if index.name == "ix_lending_book_id_is_active_period"
+        ]
+
+        # Database created before the index was declared
+        index.drop(bind=engine)
+
+        assert index.name not in {
+            existing_index["name"]
+            for existing_index in inspect(engine).get_indexes("lending")
+        }
+
+        create_missing_indexes(engine)
+
+        assert index.name in {
+            existing_index["name"]
+            for existing_index in inspect(engine).get_indexes("lending")
+        }
+
+    def test_add_missing_columns(self) -> None:
+        # Database created before the books were versioned
+        with engine.begin() as connection:
+            connection.execute(text("ALTER TABLE book DROP COLUMN version"))
+            connection.execute(
+                text("INSERT INTO book (title) VALUES ('Leviathan Wakes')")
+            )
+
+        add_missing_columns(engine)
+
+        assert "version" in {
+            column["name"] for column in inspect(engine).get_columns("book")
+        }
+
+        with engine.connect() as connection:
+            versions = connection.execute(text("SELECT version FROM book")).scalars()
+
+            assert list(versions) == [1]
+
+        # Nothing left to add
+        add_missing_columns(engine)
+        assert Book.__table__.c.version.name == "version"
+
+    def test_create_missing_unique_indexes(self) -> None:
+        (index,) = [
+            index for index in User.__table__.indexes if index.name == "ix_user_email"
+        ]
+
+        # Database created before the emails were unique
+        index.drop(bind=engine)
+
+        with engine.begin() as connection:
+            for username in ("joe", "julie"):
+                connection.execute(
+                    User.__table__.insert().values(
+                        id=uuid.uuid4(),
+                        username=username,
+                        email="miller@example.com",
+                        hashed_password="",
+                    )
+                )
+
+        with pytest.raises(SystemExit, match="ix_user_email: miller@example.com"):
+            create_missing_indexes(engine)
+
+        with engine.begin() as connection:
+            connection.execute(
+                User.__table__.update()
+                .where(User.__table__.c.username == "julie")
+                .values(email="julie@example.com")
+            )
+
+        create_missing_indexes(engine)
+
+        assert index.name in {
+            existing_index["name"]
+            for existing_index in inspect(engine).get_indexes("user")
+        }
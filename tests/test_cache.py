@@ -0,0 +1,261 @@
+from datetime import datetime, timedelta
+from http import HTTPStatus
+from typing import Generator
+
+import pytest
+from fastapi.testclient import TestClient
+from pytest import MonkeyPatch
+from sqlalchemy.orm import Session
+
+from src.api.cache import CacheBackend, MemoryCacheBackend, catalog_cache
+from src.database.models import Author, Book, Lending, User
+
+
+@pytest.fixture(autouse=True)
+def enable_cache(monkeypatch: MonkeyPatch) -> Generator[None, None, None]:
+    monkeypatch.setattr(catalog_cache, "backend", MemoryCacheBackend(2**20))
+
+    yield
+
+
+@pytest.fixture
+def book(session: Session) -> Book:
+    book = Book(
+        title="Leviathan Wakes",
+        author=Author(first_name="James S.A.", last_name="Corey"),
+    )
+    session.add(book)
+    session.commit()
+
+    return book
+
+
+class TestMemoryCacheBackend:
+    def test_evicts_least_recently_used(self) -> None:
+        backend = MemoryCacheBackend(max_size=10)
+
+        backend.set("first", b"1234", ["tag"], ttl=60)
+        backend.set("second", b"1234", [], ttl=60)
+        assert backend.get("first") == b"1234"
+
+        backend.set("third", b"1234", [], ttl=60)
+
+        assert backend.get("second") is None
+        assert backend.get("first") is not None
+        assert backend.statistics()["evictions"] == 1
+        assert backend.statistics()["size"] == 8
+
+        # Evicted entries are detached from their tags
+        backend.invalidate(["tag"])
+        assert backend.statistics()["entries"] == 1
+
+    def test_expired_entries(self) -> None:
+        backend = MemoryCacheBackend(max_size=10)
+
+        backend.set("key", b"1234", [], ttl=-1)
+
+        assert backend.get("key") is None
+        assert backend.statistics()["size"] == 0
+
+    def test_incomplete_backend(self) -> None:
+        class GetOnlyBackend(CacheBackend):
+            def get(self, key: str) -> bytes | None:
+                return None
+
+        with pytest.raises(TypeError):
+            GetOnlyBackend()  # type: ignore[abstract]
+
+
+class TestCatalogCache:
+    def test_reads_are_cached(
+        self,
+        test_client: TestClient,
+        book: Book,
+        executed_queries: list[str],
+    ) -> None:
+        first_response = test_client.get(f"/books/{book.id}")
+        executed_queries.clear()
+
+        response = test_client.get(f"/books/{book.id}")
+
+        assert response.json() == first_response.json()
+        assert response.headers["etag"] == first_response.headers["etag"]
+        assert executed_queries == []
+
+        response = test_client.get(
+            f"/books/{book.id}",
+            headers={"If-None-Match": first_response.headers["etag"]},
+        )
+        assert response.status_code == HTTPStatus.NOT_MODIFIED
+
+        statistics = catalog_cache.statistics()
+        assert statistics["hits"] == 2
+        assert statistics["misses"] == 1
+
+    def test_not_found_isnt_cached(
+        self,
+        test_client: TestClient,
+        session: Session,
+    ) -> None:
+        assert test_client.get("/author/1").status_code == HTTPStatus.NOT_FOUND
+
+        session.add(Author(first_name="James S.A.", last_name="Corey"))
+        session.commit()
+
+        assert test_client.get("/author/1").status_code == HTTPStatus.OK
+
+    def test_book_writes_invalidate(
+        self,
+        test_client: TestClient,
+        session: Session,
+        book: Book,
+    ) -> None:
+        test_client.get(f"/books/{book.id}")
+        test_client.get("/books/")
+
+        response = test_client.put(
+            f"/books/{book.id}",
+            json={"title": "Caliban's War", "author_id": book.author_id},
+        )
+        assert response.status_code == HTTPStatus.OK
+
+        assert test_client.get(f"/books/{book.id}").json()["title"] == "Caliban's War"
+        assert test_client.get("/books/").json()["items"][0]["title"] == (
+            "Caliban's War"
+        )
+
+        response = test_client.post(
+            "/books/", json={"title": "Abaddon's Gate", "author_id": book.author_id}
+        )
+        assert response.status_code == HTTPStatus.CREATED
+        assert len(test_client.get("/books/").json()["items"]) == 2
+
+        response = test_client.delete(f"/books/{book.id}")
+        assert response.status_code == HTTPStatus.NO_CONTENT
+
+        assert test_client.get(f"/books/{book.id}").status_code == (
+            HTTPStatus.NOT_FOUND
+        )
+        assert len(test_client.get("/books/").json()["items"]) == 1
+
+    def test_book_writes_invalidate_filtered_lists(
+        self,
+        test_client: TestClient,
+        book: Book,
+    ) -> None:
+        params = {"isbn": "9780316129084"}
+        assert test_client.get("/books/", params=params).json()["items"] == []
+
+        response = test_client.put(
+            f"/books/{book.id}",
+            json={
+                "title": book.title,
+                "isbn": "9780316129084",
+                "author_id": book.author_id,
+            },
+        )
+        assert response.status_code == HTTPStatus.OK
+
+        assert len(test_client.get("/books/", params=params).json()["items"]) == 1
+
+    def test_patches_invalidate(
+        self,
+        test_client: TestClient,
+        book: Book,
+    ) -> None:
+        test_client.get(f"/books/{book.id}")
+        test_client.get("/books/")
+
+        test_client.patch(f"/books/{book.id}", json={"title": "Caliban's War"})
+        test_client.patch(f"/author/{book.author_id}", json={"first_name": "James"})
+
+        response = test_client.get(f"/books/{book.id}")
+        assert response.json()["title"] == "Caliban's War"
+        assert response.json()["author"]["first_name"] == "James"
+
+        (item,) = test_client.get("/books/").json()["items"]
+        assert item["title"] == "Caliban's War"
+
+    def test_author_writes_invalidate_their_books(
+        self,
+        test_client: TestClient,
+        book: Book,
+    ) -> None:
+        test_client.get(f"/books/{book.id}")
+        test_client.get("/books/")
+        test_client.get("/author/")
+
+        response = test_client.put(
+            f"/author/{book.author_id}",
+            json={"first_name": "James", "last_name": "Corey"},
+        )
+        assert response.status_code == HTTPStatus.OK
+
+        response = test_client.get(f"/books/{book.id}")
+        assert response.json()["author"]["first_name"] == "James"
+
+        response = test_client.get("/books/")
+        assert response.json()["items"][0]["author"]["first_name"] == "James"
+
+        response = test_client.get("/author/")
+        assert response.json()["items"][0]["first_name"] == "James"
+
+    def test_lendings_invalidate_availability(
+        self,
+        test_client: TestClient,
+        session: Session,
+        book: Book,
+    ) -> None:
+        user = User(username="bruce", email="bruce@bruce.tld", password="h4xx0r")
+        session.add(user)
+        session.commit()
+
+        assert test_client.get(f"/books/{book.id}").json()["available"]
+
+        Lending.lend_book(
+            book,
+            user_id=user.id,
+            start_time=datetime.now() - timedelta(days=1),
+            end_time=datetime.now() + timedelta(days=1),
+            session=session,
+        )
+        session.commit()
+
+        assert not test_client.get(f"/books/{book.id}").json()["available"]
+
+    def test_book_writes_invalidate_author_counts(
+        self,
+        test_client: TestClient,
+        book: Book,
+    ) -> None:
+        params = {"with_counts": True}
+        (author,) = test_client.get("/author/", params=params).json()["items"]
+        assert author["books_count"] == 1
+
+        response = test_client.post(
+            "/books/", json={"title": "Caliban's War", "author_id": book.author_id}
+        )
+        assert response.status_code == HTTPStatus.CREATED
+
+        (author,) = test_client.get("/author/", params=params).json()["items"]
+        assert author["books_count"] == 2
+
+    def test_import_keeps_statistics(
+        self,
+        test_client: TestClient,
+        book: Book,
+    ) -> None:
+        for _ in range(2):
+            test_client.get(f"/books/{book.id}")
+
+        response = test_client.post(
+            "/books/import",
+            files={"file": ("catalog.csv", b"author_first_name,author_last_name\n")},
+        )
+        assert response.status_code == HTTPStatus.OK
+
+        # Entries are dropped, not the counters
+        statistics = catalog_cache.statistics()
+        assert statistics["entries"] == 0
+        assert statistics["hits"] == 1
+        assert statistics["misses"] == 1
@@ -0,0 +1,160 @@
+import io
+import json
+from http import HTTPStatus
+
+from fastapi.testclient import TestClient
+from pytest import MonkeyPatch
+from sqlalchemy import func, select
+from sqlalchemy.orm import Session
+
+from src.api import config
+from src.database.models import Author, Book
+
+CSV_CATALOG = """author_first_name,author_last_name,title,isbn
+James S.A.,Corey,Leviathan Wakes,9780316129084
+James S.A.,Corey,Caliban's War,9780316129060
+James S.A.,Corey,"Abaddon's
+Gate",
+Ursula K.,Le Guin,,
+,Nobody,Orphan book,
+"""
+
+
+def count(session: Session, model: type[Author] | type[Book]) -> int:
+    total: int = session.execute(select(func.count()).select_from(model)).scalar_one()
+
+    return total
+
+
+class TestCatalogImport:
+    def test_import_csv(
+        self,
+        test_client: TestClient,
+        session: Session,
+        monkeypatch: MonkeyPatch,
+    ) -> None:
+        # Several transactions
+        monkeypatch.setattr(config, "CATALOG_IMPORT_BATCH_SIZE", 2)
+
+        response = test_client.post(
+            "/books/import",
+            files={"file": ("catalog.csv", CSV_CATALOG.encode())},
+        )
+
+        assert response.status_code == HTTPStatus.OK
+
+        report = response.json()
+        assert report["records"] == 5
+        assert report["authors_created"] == 2
+        assert report["books_created"] == 3
+        assert report["books_updated"] == 0
+        assert report["errors_count"] == 1
+        assert report["errors"][0]["line"] == 7
+        assert "author_first_name" in report["errors"][0]["detail"]
+
+        titles = {book.title for book in Book.get_all(session)}
+        assert titles == {"Leviathan Wakes", "Caliban's War", "Abaddon's\nGate"}
+
+    def test_import_again_is_idempotent(
+        self,
+        test_client: TestClient,
+        session: Session,
+    ) -> None:
+        for _ in range(2):
+            response = test_client.post(
+                "/books/import",
+                files={"file": ("catalog.csv", CSV_CATALOG.encode())},
+            )
+            assert response.status_code == HTTPStatus.OK
+
+        assert response.json()["authors_created"] == 0
+        assert response.json()["books_created"] == 0
+        assert count(session, Author) == 2
+        assert count(session, Book) == 3
+
+    def test_import_ndjson_updates_books_by_isbn(
+        self,
+        test_client: TestClient,
+        session: Session,
+    ) -> None:
+        author = Author(first_name="James S.A.", last_name="Corey")
+        book = Book(title="Leviathan", isbn="9780316129084", author=author)
+        session.add_all([author, book])
+        session.commit()
+
+        lines = [
+            {
+                "author_first_name": "James S.A.",
+                "author_last_name": "Corey",
+                "title": "Leviathan Wakes",
+                "isbn": "9780316129084",
+            },
+            "not json",
+        ]
+        catalog = "\n".join(
+            line if isinstance(line, str) else json.dumps(line) for line in lines
+        )
+
+        response = test_client.post(
+            "/books/import",
+            params={"format": "ndjson"},
+            files={"file": ("export", io.BytesIO(catalog.encode()))},
+        )
+
+        assert response.status_code == HTTPStatus.OK
+
+        report = response.json()
+        assert report["authors_created"] == 0
+        assert report["books_updated"] == 1
+        assert report["errors"][0]["line"] == 2
+
+        session.refresh(book)
+        assert book.title == "Leviathan Wakes"
+        assert count(session, Book) == 1
+
+    def test_import_csv_extra_columns(
+        self,
+        test_client: TestClient,
+        session: Session,
+    ) -> None:
+        catalog = (
+            "author_first_name,author_last_name,title,isbn\n"
+            "James S.A.,Corey,Leviathan Wakes,9780316129084\n"
+            "James S.A.,Corey,Caliban's War,9780316129060,Orbit\n"
+        )
+
+        response = test_client.post(
+            "/books/import",
+            files={"file": ("catalog.csv", catalog.encode())},
+        )
+
+        assert response.status_code == HTTPStatus.OK
+
+        report = response.json()
+        assert report["books_created"] == 1
+        assert report["errors_count"] == 1
+        assert report["errors"][0]["line"] == 3
+        assert "extra_columns" in report["errors"][0]["detail"]
+
+        # Unknown columns of the header reject every record
+        catalog = "author_first_name,author_last_name,year\nUrsula K.,Le Guin,1969\n"
+
+        response = test_client.post(
+            "/books/import",
+            files={"file": ("catalog.csv", catalog.encode())},
+        )
+
+        assert response.json()["errors_count"] == 1
+        assert "year" in response.json()["errors"][0]["detail"]
+        assert count(session, Author) == 1
+
+    def test_import_unknown_format(
+        self,
+        test_client: TestClient,
+    ) -> None:
+        response = test_client.post(
+            "/books/import",
+            files={"file": ("catalog.xlsx", b"")},
+        )
+
+        assert response.status_code == HTTPStatus.UNSUPPORTED_MEDIA_TYPE
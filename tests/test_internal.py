@@ -0,0 +1,87 @@
+from http import HTTPStatus
+from typing import Generator
+
+import pytest
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+from pytest import MonkeyPatch
+from sqlalchemy.pool import QueuePool
+
+from src.api import config, main
+
+
+@pytest.fixture(autouse=True)
+def app(monkeypatch: MonkeyPatch) -> Generator[FastAPI, None, None]:
+    monkeypatch.setattr(config, "INTERNAL_ENDPOINTS", True)
+
+    yield main.init_api()
+
+
+class TestPoolStatistics:
+    def test_get_pool_statistics(
+        self,
+        test_client: TestClient,
+    ) -> None:
+        response = test_client.get("/books/")
+        assert response.status_code == HTTPStatus.OK
+
+        response = test_client.get("/internal/pool")
+
+        assert response.status_code == HTTPStatus.OK
+
+        statistics = response.json()
+
+        assert statistics["asynchronous"] is None
+        assert statistics["sync"]["pool_class"] == "QueuePool"
+        assert statistics["sync"]["size"] == config.SQLALCHEMY_POOL_SIZE
+        assert statistics["sync"]["checkouts"] >= 1
+        assert (
+            statistics["sync"]["max_held_ms"] >= statistics["sync"]["average_held_ms"]
+        )
+
+    def test_internal_endpoints_disabled(
+        self,
+        monkeypatch: MonkeyPatch,
+    ) -> None:
+        monkeypatch.setattr(config, "INTERNAL_ENDPOINTS", False)
+
+        response = TestClient(main.init_api()).get("/internal/pool")
+
+        assert response.status_code == HTTPStatus.NOT_FOUND
+
+
+class TestPoolPrewarm:
+    def test_prewarm_on_startup(
+        self,
+        app: FastAPI,
+        monkeypatch: MonkeyPatch,
+    ) -> None:
+        monkeypatch.setattr(config, "SQLALCHEMY_POOL_PREWARM", 3)
+
+        # Start from an empty pool
+        main.engine.dispose()
+
+        # Entering the client runs the lifespan of the app
+        with TestClient(app):
+            pool = main.engine.pool
+
+            assert isinstance(pool, QueuePool)
+            assert pool.checkedin() >= 3
+
+
+class TestUserCacheStatistics:
+    def test_get_user_cache_statistics(
+        self,
+        test_client: TestClient,
+    ) -> None:
+        response = test_client.get("/internal/user-cache")
+
+        assert response.status_code == HTTPStatus.OK
+        assert response.json() == {
+            "size": 0,
+            "max_size": config.USER_CACHE_SIZE,
+            "ttl": config.USER_CACHE_TTL,
+            "hits": 0,
+            "misses": 0,
+            "hit_ratio": 0.0,
+        }
@@ -0,0 +1,286 @@
+import random
+from datetime import datetime, timedelta
+from http import HTTPStatus
+from typing import Generator
+
+import pytest
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+from pytest import MonkeyPatch
+from sqlalchemy import create_engine, update
+from sqlalchemy.orm import Session
+
+from src.api import config
+from src.database.intervals import (
+    BookPeriods,
+    IntervalIndexInconsistency,
+    lending_intervals,
+)
+from src.database.models import Author, Book, Lending, User
+from tests.test_lending import create_test_token
+
+
+@pytest.fixture(autouse=True)
+def enable_index(monkeypatch: MonkeyPatch) -> Generator[None, None, None]:
+    monkeypatch.setattr(lending_intervals, "enabled", True)
+    monkeypatch.setattr(lending_intervals, "check_consistency", True)
+
+    yield
+
+
+@pytest.fixture
+def book(session: Session) -> Book:
+    book = Book(
+        title="Leviathan Wakes",
+        author=Author(first_name="James S.A.", last_name="Corey"),
+    )
+
+    session.add(book)
+    session.commit()
+
+    return book
+
+
+@pytest.fixture
+def user(session: Session) -> User:
+    user = User(username="bruce", email="bruce@bruce.tld", password="h4xx0r")
+
+    session.add(user)
+    session.commit()
+
+    return user
+
+
+def reserve(
+    test_client: TestClient,
+    book: Book,
+    token: str,
+    start_time: datetime,
+    end_time: datetime,
+) -> int:
+    response = test_client.post(
+        f"/lending/{book.id}",
+        json={"start_time": start_time.isoformat(), "end_time": end_time.isoformat()},
+        headers={"Authorization": f"Bearer {token}"},
+    )
+
+    return response.status_code
+
+
+class TestBookPeriods:
+    def test_overlaps_matches_lending_predicate(self) -> None:
+        randomizer = random.Random(1347)
+        origin = datetime(2023, 1, 1)
+
+        def random_period() -> tuple[datetime, datetime]:
+            start_time = origin + timedelta(days=randomizer.randint(0, 100))
+
+            return start_time, start_time + timedelta(days=randomizer.randint(0, 10))
+
+        for _ in range(50):
+            periods = [
+                (*random_period(), lending_id)
+                for lending_id in range(randomizer.randint(0, 10))
+            ]
+            book_periods = BookPeriods(periods)  # type: ignore[arg-type]
+
+            for _ in range(20):
+                start_time, end_time = random_period()
+
+                # ``Lending.overlaps``
+                expected = any(
+                    period_start < end_time and period_end > start_time
+                    for period_start, period_end, _ in periods
+                )
+
+                assert book_periods.overlaps(start_time, end_time) == expected
+
+    def test_overlaps_excluding_a_lending(self) -> None:
+        book_periods = BookPeriods(
+            [(datetime(2023, 1, 1), datetime(2023, 1, 10), 1)]  # type: ignore[list-item]
+        )
+
+        assert book_periods.overlaps(datetime(2023, 1, 5), datetime(2023, 1, 6))
+        assert not book_periods.overlaps(
+            datetime(2023, 1, 5),
+            datetime(2023, 1, 6),
+            exclude_id=1,  # type: ignore[arg-type]
+        )
+
+
+class TestLendingIntervalIndex:
+    def test_conflicts_are_rejected_without_querying_the_database(
+        self,
+        test_client: TestClient,
+        book: Book,
+        user: User,
+        monkeypatch: MonkeyPatch,
+        executed_queries: list[str],
+    ) -> None:
+        monkeypatch.setattr(lending_intervals, "check_consistency", False)
+        token = create_test_token(user, monkeypatch)
+
+        status = reserve(
+            test_client, book, token, datetime(2023, 1, 1), datetime(2023, 1, 10)
+        )
+        assert status == HTTPStatus.OK
+
+        executed_queries.clear()
+
+        status = reserve(
+            test_client, book, token, datetime(2023, 1, 5), datetime(2023, 1, 20)
+        )
+
+        assert status == HTTPStatus.UNPROCESSABLE_ENTITY
+        assert not [query for query in executed_queries if "lending" in query]
+
+        # Free periods are still confirmed by the database
+        status = reserve(
+            test_client, book, token, datetime(2023, 2, 1), datetime(2023, 2, 10)
+        )
+
+        assert status == HTTPStatus.OK
+        assert lending_intervals.statistics()["periods"] == 2
+
+    def test_index_follows_committed_changes(
+        self,
+        test_client: TestClient,
+        session: Session,
+        book: Book,
+        user: User,
+        monkeypatch: MonkeyPatch,
+    ) -> None:
+        token = create_test_token(user, monkeypatch)
+
+        status = reserve(
+            test_client, book, token, datetime(2023, 1, 1), datetime(2023, 1, 10)
+        )
+        assert status == HTTPStatus.OK
+
+        (lending,) = Lending.get_all([Lending.book_id == book.id], session)
+
+        # Extended, then returned
+        response = test_client.put(
+            f"/lending/me/{lending.id}",
+            json={"end_time": datetime(2023, 1, 20).isoformat()},
+            headers={"Authorization": f"Bearer {token}"},
+        )
+        assert response.status_code == HTTPStatus.OK
+
+        status = reserve(
+            test_client, book, token, datetime(2023, 1, 15), datetime(2023, 1, 16)
+        )
+        assert status == HTTPStatus.UNPROCESSABLE_ENTITY
+
+        lending.is_active = False
+        session.commit()
+
+        status = reserve(
+            test_client, book, token, datetime(2023, 1, 15), datetime(2023, 1, 16)
+        )
+        assert status == HTTPStatus.OK
+
+    def test_rolled_back_lendings_arent_indexed(
+        self,
+        session: Session,
+        book: Book,
+        user: User,
+    ) -> None:
+        Lending.lend_book(
+            book, user.id, datetime(2023, 1, 1), datetime(2023, 1, 10), session
+        )
+        session.flush()
+        session.rollback()
+
+        assert not Lending.is_booked(
+            book.id, datetime(2023, 1, 1), datetime(2023, 1, 10), session
+        )
+        assert lending_intervals.statistics()["periods"] == 0
+
+    def test_consistency_check(
+        self,
+        session: Session,
+        book: Book,
+        user: User,
+    ) -> None:
+        Lending.lend_book(
+            book, user.id, datetime(2023, 1, 1), datetime(2023, 1, 10), session
+        )
+        session.commit()
+
+        assert Lending.is_booked(
+            book.id, datetime(2023, 1, 5), datetime(2023, 1, 6), session
+        )
+
+        # Bulk statements aren't seen by the index
+        session.execute(update(Lending).values(is_active=False))
+        session.commit()
+
+        with pytest.raises(IntervalIndexInconsistency):
+            Lending.is_booked(
+                book.id, datetime(2023, 1, 5), datetime(2023, 1, 6), session
+            )
+
+        # Reloaded from the database
+        lending_intervals.invalidate(book.id)
+
+        assert not Lending.is_booked(
+            book.id, datetime(2023, 1, 5), datetime(2023, 1, 6), session
+        )
+
+    def test_lending_closed_by_another_process(
+        self,
+        session: Session,
+        book: Book,
+        user: User,
+        monkeypatch: MonkeyPatch,
+    ) -> None:
+        monkeypatch.setattr(lending_intervals, "check_consistency", False)
+
+        Lending.lend_book(
+            book, user.id, datetime(2023, 1, 1), datetime(2023, 1, 10), session
+        )
+        session.commit()
+
+        assert Lending.is_booked(
+            book.id, datetime(2023, 1, 5), datetime(2023, 1, 6), session
+        )
+        session.rollback()
+
+        # Closed by another worker or a maintenance job: the session listeners of this
+        # process never see it
+        other_engine = create_engine(config.SQLALCHEMY_DATABASE_URI)
+
+        with other_engine.begin() as connection:
+            connection.execute(update(Lending.__table__).values(is_active=False))
+
+        other_engine.dispose()
+
+        assert Lending.is_booked(
+            book.id, datetime(2023, 1, 5), datetime(2023, 1, 6), session
+        )
+
+        # Reloaded from the database once the TTL is over
+        monkeypatch.setattr(lending_intervals, "ttl", 0)
+
+        assert not Lending.is_booked(
+            book.id, datetime(2023, 1, 5), datetime(2023, 1, 6), session
+        )
+
+    def test_rebuild_on_startup(
+        self,
+        app: FastAPI,
+        session: Session,
+        book: Book,
+        user: User,
+    ) -> None:
+        Lending.lend_book(
+            book, user.id, datetime(2023, 1, 1), datetime(2023, 1, 10), session
+        )
+        session.commit()
+        lending_intervals.clear()
+
+        # Entering the client runs the lifespan of the app
+        with TestClient(app):
+            assert lending_intervals.statistics()["books"] == 1
+            assert lending_intervals.statistics()["periods"] == 1
@@ -10,7 +10,8 @@ from freezegun import freeze_time
 
 from src.api import config
 from src.authentication.utils import create_access_token
-from src.database.models import Author, Book, Lending, User
+from src.database.maintenance import archive_lendings
+from src.database.models import Author, Book, Lending, User, WaitlistEntry
 
 
 def create_test_token(
@@ -258,6 +259,259 @@ class TestLending:
         }
 
 
+class TestMyLendings:
+    def test_get_my_lendings(
+        self,
+        test_client: TestClient,
+        session: Session,
+        monkeypatch: MonkeyPatch,
+        executed_queries: list[str],
+    ) -> None:
+        user: User = User(
+            username="bruce",
+            email="bruce@bruce.tld",
+            password="h4xx0r",
+        )
+
+        other_user: User = User(
+            username="ZeroCool",
+            email="zero@cool.tld",
+            password="h4xxtehpl4n3t",
+        )
+
+        author: Author = Author(
+            first_name="James S.A.",
+            last_name="Corey",
+        )
+
+        books: list[Book] = [
+            Book(title=title, author=author)
+            for title in ["Leviathan Wakes", "Caliban's War", "Abaddon's Gate"]
+        ]
+
+        session.add_all([user, other_user, author, *books])
+        session.commit()
+
+        for book in books[:2]:
+            Lending.lend_book(
+                book=book,
+                user_id=user.id,
+                start_time=datetime.now() - timedelta(days=1),
+                end_time=datetime.now() + timedelta(days=30),
+                session=session,
+            )
+
+        Lending.lend_book(
+            book=books[2],
+            user_id=other_user.id,
+            start_time=datetime.now() - timedelta(days=1),
+            end_time=datetime.now() + timedelta(days=30),
+            session=session,
+        )
+        session.commit()
+
+        token = create_test_token(user, monkeypatch)
+        headers = {"Authorization": f"Bearer {token}"}
+
+        executed_queries.clear()
+
+        response = test_client.get("/lending/me", headers=headers)
+
+        assert response.status_code == HTTPStatus.OK
+
+        received_payload = response.json()
+
+        # Only the lendings of the logged user are listed
+        assert sorted(lending["book"]["title"] for lending in received_payload) == [
+            "Caliban's War",
+            "Leviathan Wakes",
+        ]
+        assert all(not lending["book"]["available"] for lending in received_payload)
+        # User lookup + lendings with their books, authors and availability
+        assert len(executed_queries) == 2
+
+
+class TestReturnLending:
+    def test_return_lending(
+        self,
+        test_client: TestClient,
+        session: Session,
+        monkeypatch: MonkeyPatch,
+    ) -> None:
+        user = User(username="bruce", email="bruce@bruce.tld", password="h4xx0r")
+        book = Book(
+            title="Leviathan Wakes",
+            author=Author(first_name="James S.A.", last_name="Corey"),
+        )
+        session.add_all([user, book])
+        session.commit()
+
+        lending = Lending.lend_book(
+            book,
+            user_id=user.id,
+            start_time=datetime.now() - timedelta(days=1),
+            end_time=datetime.now() + timedelta(days=10),
+            session=session,
+        )
+        session.commit()
+
+        headers = {"Authorization": f"Bearer {create_test_token(user, monkeypatch)}"}
+
+        response = test_client.post(f"/lending/me/{lending.id}/return", headers=headers)
+
+        assert response.status_code == HTTPStatus.OK
+        assert response.json()["is_active"] is False
+        assert response.json()["return_time"] is not None
+        assert response.json()["book"]["available"] is True
+
+        # The rest of the period can be lent
+        assert not Lending.is_booked(
+            book.id,
+            datetime.now() + timedelta(days=1),
+            datetime.now() + timedelta(days=5),
+            session,
+        )
+
+        response = test_client.post(f"/lending/me/{lending.id}/return", headers=headers)
+        assert response.status_code == HTTPStatus.CONFLICT
+
+    def test_return_lending_of_another_user(
+        self,
+        test_client: TestClient,
+        session: Session,
+        monkeypatch: MonkeyPatch,
+    ) -> None:
+        user = User(username="bruce", email="bruce@bruce.tld", password="h4xx0r")
+        session.add(user)
+        session.commit()
+
+        headers = {"Authorization": f"Bearer {create_test_token(user, monkeypatch)}"}
+        response = test_client.post(
+            "/lending/me/00000000-0000-0000-0000-000000000000/return", headers=headers
+        )
+
+        assert response.status_code == HTTPStatus.NOT_FOUND
+
+
+class TestLendingHistory:
+    def test_get_my_lendings_history(
+        self,
+        test_client: TestClient,
+        session: Session,
+        monkeypatch: MonkeyPatch,
+    ) -> None:
+        user = User(username="bruce", email="bruce@bruce.tld", password="h4xx0r")
+        books = [
+            Book(
+                title=title,
+                author=Author(first_name="James S.A.", last_name="Corey"),
+            )
+            for title in ["Leviathan Wakes", "Caliban's War", "Abaddon's Gate"]
+        ]
+        now = datetime.now()
+        lendings = [
+            # Archived, ended, current
+            Lending(
+                user=user,
+                book=books[0],
+                start_time=now - timedelta(days=90),
+                end_time=now - timedelta(days=60),
+            ),
+            Lending(
+                user=user,
+                book=books[1],
+                start_time=now - timedelta(days=20),
+                end_time=now - timedelta(days=10),
+            ),
+            Lending(
+                user=user,
+                book=books[2],
+                start_time=now - timedelta(days=1),
+                end_time=now + timedelta(days=10),
+            ),
+        ]
+        session.add_all([user, *books, *lendings])
+        session.commit()
+
+        archive_lendings(session, now - timedelta(days=30), batch_size=10)
+
+        token = create_test_token(user, monkeypatch)
+        response = test_client.get(
+            "/lending/me/history", headers={"Authorization": f"Bearer {token}"}
+        )
+
+        assert response.status_code == HTTPStatus.OK
+
+        history = response.json()
+        assert [lending["book_id"] for lending in history] == [
+            books[1].id,
+            books[0].id,
+        ]
+        assert history[0]["archived_at"] is None
+        assert history[1]["archived_at"] is not None
+
+        # Archived lendings aren't listed with the current ones anymore
+        response = test_client.get(
+            "/lending/me", headers={"Authorization": f"Bearer {token}"}
+        )
+        assert len(response.json()) == 2
+
+
+class TestSparseLendingFields:
+    def test_get_my_lendings_sparse(
+        self,
+        test_client: TestClient,
+        session: Session,
+        monkeypatch: MonkeyPatch,
+        executed_queries: list[str],
+    ) -> None:
+        user = User(username="bruce", email="bruce@bruce.tld", password="h4xx0r")
+        book = Book(
+            title="Leviathan Wakes",
+            author=Author(first_name="James S.A.", last_name="Corey"),
+        )
+        session.add_all([user, book])
+        session.commit()
+
+        lending = Lending.lend_book(
+            book=book,
+            user_id=user.id,
+            start_time=datetime.now() - timedelta(days=1),
+            end_time=datetime.now() + timedelta(days=30),
+            session=session,
+        )
+        session.commit()
+
+        headers = {"Authorization": f"Bearer {create_test_token(user, monkeypatch)}"}
+
+        executed_queries.clear()
+        response = test_client.get(
+            "/lending/me", params={"fields": "id,book_id"}, headers=headers
+        )
+
+        assert response.json() == [{"id": str(lending.id), "book_id": book.id}]
+        # User lookup + lendings, without their book
+        assert len(executed_queries) == 2
+        assert "JOIN" not in executed_queries[1]
+
+        response = test_client.get(
+            "/lending/me", params={"fields": "id", "expand": "book"}, headers=headers
+        )
+
+        (received_lending,) = response.json()
+        assert received_lending["book"]["title"] == "Leviathan Wakes"
+        assert not received_lending["book"]["available"]
+        assert "author" not in received_lending["book"]
+
+        response = test_client.get(
+            "/lending/me", params={"expand": "book.author"}, headers=headers
+        )
+
+        (received_lending,) = response.json()
+        assert received_lending["user_id"] == str(user.id)
+        assert received_lending["book"]["author"]["last_name"] == "Corey"
+
+
 class TestLendingEdition:
     def test_edit_lending(
         self,
@@ -460,3 +714,404 @@ class TestLendingEdition:
         )
 
         assert response.status_code == HTTPStatus.CONFLICT
+
+    def test_edit_lending_after_another_lending(
+        self,
+        test_client: TestClient,
+        session: Session,
+        monkeypatch: MonkeyPatch,
+    ) -> None:
+        first_user: User = User(
+            username="bruce",
+            email="bruce@bruce.tld",
+            password="h4xx0r",
+        )
+
+        second_user: User = User(
+            username="brucer",
+            email="brucer@email.tld",
+            password="h4xx",
+        )
+
+        author: Author = Author(
+            first_name="James S.A.",
+            last_name="Corey",
+        )
+
+        book: Book = Book(
+            title="Leviathan Wakes",
+            author=author,
+        )
+
+        session.add_all([first_user, second_user, author, book])
+        session.commit()
+
+        Lending.lend_book(
+            book=book,
+            user_id=first_user.id,
+            start_time=datetime(2023, 1, 1),
+            end_time=datetime(2023, 1, 10),
+            session=session,
+        )
+
+        second_lending: Lending = Lending.lend_book(
+            book=book,
+            user_id=second_user.id,
+            start_time=datetime(2023, 1, 20),
+            end_time=datetime(2023, 1, 30),
+            session=session,
+        )
+        session.commit()
+
+        second_lending_id: UUID = second_lending.id
+
+        token = create_test_token(second_user, monkeypatch)
+
+        session.expire_all()
+
+        # Shortening the second lending doesn't intersect the first one
+        response = test_client.put(
+            f"/lending/me/{second_lending_id}",
+            json={"end_time": datetime(2023, 1, 25).isoformat()},
+            headers={"Authorization": f"Bearer {token}"},
+        )
+
+        assert response.status_code == HTTPStatus.OK
+
+
+class TestLendingConflicts:
+    def test_conflict_check_is_a_single_exists_probe(
+        self,
+        session: Session,
+        executed_queries: list[str],
+    ) -> None:
+        user: User = User(
+            username="bruce",
+            email="bruce@bruce.tld",
+            password="h4xx0r",
+        )
+
+        author: Author = Author(
+            first_name="James S.A.",
+            last_name="Corey",
+        )
+
+        book: Book = Book(
+            title="Leviathan Wakes",
+            author=author,
+        )
+
+        session.add_all([user, author, book])
+        session.commit()
+
+        for day in range(1, 20, 2):
+            Lending.lend_book(
+                book=book,
+                user_id=user.id,
+                start_time=datetime(2023, 1, day),
+                end_time=datetime(2023, 1, day + 1),
+                session=session,
+            )
+            session.flush()
+
+        executed_queries.clear()
+
+        assert Lending.has_conflict(
+            book.id, datetime(2023, 1, 1), datetime(2023, 2, 1), session
+        )
+        assert not Lending.has_conflict(
+            book.id, datetime(2023, 2, 1), datetime(2023, 3, 1), session
+        )
+
+        assert len(executed_queries) == 2
+        assert all("EXISTS" in query for query in executed_queries)
+
+    def test_inactive_lendings_dont_conflict(
+        self,
+        session: Session,
+    ) -> None:
+        user: User = User(
+            username="bruce",
+            email="bruce@bruce.tld",
+            password="h4xx0r",
+        )
+
+        author: Author = Author(
+            first_name="James S.A.",
+            last_name="Corey",
+        )
+
+        book: Book = Book(
+            title="Leviathan Wakes",
+            author=author,
+        )
+
+        session.add_all([user, author, book])
+        session.commit()
+
+        lending: Lending = Lending.lend_book(
+            book=book,
+            user_id=user.id,
+            start_time=datetime(2023, 1, 1),
+            end_time=datetime(2023, 2, 1),
+            session=session,
+        )
+        lending.is_active = False
+        session.commit()
+
+        assert not Lending.has_conflict(
+            book.id, datetime(2023, 1, 10), datetime(2023, 1, 20), session
+        )
+
+    def test_reserve_free_periods(
+        self,
+        test_client: TestClient,
+        session: Session,
+        monkeypatch: MonkeyPatch,
+    ) -> None:
+        user: User = User(
+            username="bruce",
+            email="bruce@bruce.tld",
+            password="h4xx0r",
+        )
+
+        book: Book = Book(
+            title="Leviathan Wakes",
+            author=Author(first_name="James S.A.", last_name="Corey"),
+        )
+
+        session.add_all([user, book])
+        session.commit()
+
+        for start_day, end_day in [(1, 10), (20, 30)]:
+            Lending.lend_book(
+                book=book,
+                user_id=user.id,
+                start_time=datetime(2023, 1, start_day),
+                end_time=datetime(2023, 1, end_day),
+                session=session,
+            )
+        session.commit()
+
+        headers = {"Authorization": f"Bearer {create_test_token(user, monkeypatch)}"}
+
+        free_periods = test_client.get(
+            f"/books/{book.id}/availability",
+            params={"from": "2023-01-01T00:00:00", "to": "2023-02-01T00:00:00"},
+        ).json()["free_periods"]
+
+        assert free_periods == [
+            {"start_time": "2023-01-10T00:00:00", "end_time": "2023-01-20T00:00:00"},
+            {"start_time": "2023-01-30T00:00:00", "end_time": "2023-02-01T00:00:00"},
+        ]
+
+        # Periods are half-open, the free periods touching the lendings can be
+        # reserved as they are
+        for free_period in free_periods:
+            response = test_client.post(
+                f"/lending/{book.id}", json=free_period, headers=headers
+            )
+
+            assert response.status_code == HTTPStatus.OK
+
+        response = test_client.post(
+            f"/lending/{book.id}",
+            json={
+                "start_time": "2023-01-09T00:00:00",
+                "end_time": "2023-01-11T00:00:00",
+            },
+            headers=headers,
+        )
+
+        assert response.status_code == HTTPStatus.UNPROCESSABLE_ENTITY
+
+
+class TestWaitlist:
+    def test_wait_for_returned_book(
+        self,
+        test_client: TestClient,
+        session: Session,
+        monkeypatch: MonkeyPatch,
+    ) -> None:
+        lender = User(username="bruce", email="bruce@bruce.tld", password="h4xx0r")
+        first = User(username="alex", email="alex@alex.tld", password="h4xx0r")
+        second = User(username="naomi", email="naomi@naomi.tld", password="h4xx0r")
+        book = Book(
+            title="Leviathan Wakes",
+            author=Author(first_name="James S.A.", last_name="Corey"),
+        )
+        session.add_all([lender, first, second, book])
+        session.commit()
+
+        lending = Lending.lend_book(
+            book,
+            user_id=lender.id,
+            start_time=datetime.now() - timedelta(days=1),
+            end_time=datetime.now() + timedelta(days=10),
+            session=session,
+        )
+        session.commit()
+
+        payload = {
+            "start_time": (datetime.now() + timedelta(days=2)).isoformat(),
+            "end_time": (datetime.now() + timedelta(days=5)).isoformat(),
+        }
+        entry_ids = []
+
+        for position, user in enumerate((first, second), start=1):
+            headers = {
+                "Authorization": f"Bearer {create_test_token(user, monkeypatch)}"
+            }
+            response = test_client.post(
+                f"/lending/{book.id}?wait=true", json=payload, headers=headers
+            )
+
+            assert response.status_code == HTTPStatus.ACCEPTED
+            assert response.json()["book_id"] == book.id
+            assert response.json()["position"] == position
+
+            entry_ids.append(response.json()["id"])
+
+        response = test_client.get("/lending/me/waitlist", headers=headers)
+        assert [entry["id"] for entry in response.json()] == [entry_ids[1]]
+
+        headers = {"Authorization": f"Bearer {create_test_token(lender, monkeypatch)}"}
+        response = test_client.post(f"/lending/me/{lending.id}/return", headers=headers)
+        assert response.status_code == HTTPStatus.OK
+
+        # First in line gets the book, the second one keeps waiting
+        promoted = session.execute(
+            select(Lending).where(Lending.user_id == first.id)
+        ).scalar_one()
+        assert promoted.book_id == book.id
+        assert promoted.is_active
+        assert promoted.start_time == datetime.fromisoformat(payload["start_time"])
+
+        waiting = WaitlistEntry.get_user_rows(second.id, datetime.now(), session)
+        assert [str(entry.id) for entry in waiting] == [entry_ids[1]]
+        assert waiting[0].position == 1
+
+    def test_shortened_lending_promotes_waitlist(
+        self,
+        test_client: TestClient,
+        session: Session,
+        monkeypatch: MonkeyPatch,
+    ) -> None:
+        lender = User(username="bruce", email="bruce@bruce.tld", password="h4xx0r")
+        user = User(username="alex", email="alex@alex.tld", password="h4xx0r")
+        book = Book(
+            title="Leviathan Wakes",
+            author=Author(first_name="James S.A.", last_name="Corey"),
+        )
+        session.add_all([lender, user, book])
+        session.commit()
+
+        lending = Lending.lend_book(
+            book,
+            user_id=lender.id,
+            start_time=datetime.now() + timedelta(days=1),
+            end_time=datetime.now() + timedelta(days=20),
+            session=session,
+        )
+        session.commit()
+
+        headers = {"Authorization": f"Bearer {create_test_token(user, monkeypatch)}"}
+        late_payload = {
+            "start_time": (datetime.now() + timedelta(days=15)).isoformat(),
+            "end_time": (datetime.now() + timedelta(days=18)).isoformat(),
+        }
+        early_payload = {
+            "start_time": (datetime.now() + timedelta(days=2)).isoformat(),
+            "end_time": (datetime.now() + timedelta(days=4)).isoformat(),
+        }
+
+        for payload in (early_payload, late_payload):
+            response = test_client.post(
+                f"/lending/{book.id}?wait=true", json=payload, headers=headers
+            )
+            assert response.status_code == HTTPStatus.ACCEPTED
+
+        response = test_client.get("/lending/me/waitlist", headers=headers)
+        early_entry_id = response.json()[0]["id"]
+
+        lender_headers = {
+            "Authorization": f"Bearer {create_test_token(lender, monkeypatch)}"
+        }
+        response = test_client.put(
+            f"/lending/me/{lending.id}",
+            json={"end_time": (datetime.now() + timedelta(days=10)).isoformat()},
+            headers=lender_headers,
+        )
+        assert response.status_code == HTTPStatus.OK
+
+        # Only the end of the lending was freed
+        response = test_client.get("/lending/me", headers=headers)
+        assert [lending["start_time"] for lending in response.json()] == [
+            late_payload["start_time"]
+        ]
+
+        response = test_client.get("/lending/me/waitlist", headers=headers)
+        assert [entry["id"] for entry in response.json()] == [early_entry_id]
+
+    def test_reserve_available_book_with_wait(
+        self,
+        test_client: TestClient,
+        session: Session,
+        monkeypatch: MonkeyPatch,
+    ) -> None:
+        user = User(username="bruce", email="bruce@bruce.tld", password="h4xx0r")
+        book = Book(
+            title="Leviathan Wakes",
+            author=Author(first_name="James S.A.", last_name="Corey"),
+        )
+        session.add_all([user, book])
+        session.commit()
+
+        headers = {"Authorization": f"Bearer {create_test_token(user, monkeypatch)}"}
+        payload = {
+            "start_time": (datetime.now() + timedelta(days=2)).isoformat(),
+            "end_time": (datetime.now() + timedelta(days=5)).isoformat(),
+        }
+
+        response = test_client.post(
+            f"/lending/{book.id}?wait=true", json=payload, headers=headers
+        )
+
+        assert response.status_code == HTTPStatus.OK
+        assert response.json()["is_active"] is True
+        assert WaitlistEntry.get_user_rows(user.id, datetime.now(), session) == []
+
+    def test_leave_waitlist(
+        self,
+        test_client: TestClient,
+        session: Session,
+        monkeypatch: MonkeyPatch,
+    ) -> None:
+        user = User(username="bruce", email="bruce@bruce.tld", password="h4xx0r")
+        book = Book(
+            title="Leviathan Wakes",
+            author=Author(first_name="James S.A.", last_name="Corey"),
+        )
+        session.add_all([user, book])
+        session.commit()
+
+        entry = WaitlistEntry.join(
+            book.id,
+            user.id,
+            datetime.now() + timedelta(days=2),
+            datetime.now() + timedelta(days=5),
+            session,
+        )
+        session.commit()
+
+        headers = {"Authorization": f"Bearer {create_test_token(user, monkeypatch)}"}
+
+        response = test_client.delete(
+            f"/lending/me/waitlist/{entry.id}", headers=headers
+        )
+        assert response.status_code == HTTPStatus.NO_CONTENT
+
+        response = test_client.delete(
+            f"/lending/me/waitlist/{entry.id}", headers=headers
+        )
+        assert response.status_code == HTTPStatus.NOT_FOUND
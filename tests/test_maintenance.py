@@ -0,0 +1,167 @@
+from datetime import datetime, timedelta
+
+import pytest
+from sqlalchemy import func, select
+from sqlalchemy.orm import Session
+
+from src.database.maintenance import archive_lendings, close_overdue_lendings
+from src.database.models import Author, Book, Lending, LendingArchive, User
+
+
+@pytest.fixture
+def user(session: Session) -> User:
+    user = User(username="bruce", email="bruce@bruce.tld", password="h4xx0r")
+    session.add(user)
+    session.commit()
+
+    return user
+
+
+@pytest.fixture
+def book(session: Session) -> Book:
+    book = Book(
+        title="Leviathan Wakes",
+        author=Author(first_name="James S.A.", last_name="Corey"),
+    )
+    session.add(book)
+    session.commit()
+
+    return book
+
+
+class TestArchiveLendings:
+    def test_archive_finished_lendings(
+        self,
+        session: Session,
+        user: User,
+        book: Book,
+        executed_queries: list[str],
+    ) -> None:
+        now = datetime.now()
+        cutoff = now - timedelta(days=30)
+
+        def lending(
+            days_ago: int, return_days_ago: int | None = None, **kwargs: bool
+        ) -> Lending:
+            return Lending(
+                user=user,
+                book=book,
+                start_time=now - timedelta(days=days_ago + 10),
+                end_time=now - timedelta(days=days_ago),
+                return_time=(
+                    None
+                    if return_days_ago is None
+                    else now - timedelta(days=return_days_ago)
+                ),
+                **kwargs,
+            )
+
+        archived = [
+            lending(days_ago=60),
+            lending(days_ago=45, is_active=False),
+            lending(days_ago=40, return_days_ago=50),
+        ]
+        kept = [
+            # Current & recently finished ones
+            lending(days_ago=-5),
+            lending(days_ago=10),
+            lending(days_ago=-20, return_days_ago=1, is_active=False),
+        ]
+        session.add_all([*archived, *kept])
+        session.commit()
+        archived_ids = {lending.id for lending in archived}
+        kept_ids = {lending.id for lending in kept}
+        executed_queries.clear()
+
+        assert archive_lendings(session, cutoff, batch_size=2) == 3
+
+        assert set(session.execute(select(Lending.id)).scalars()) == kept_ids
+        assert set(session.execute(select(LendingArchive.id)).scalars()) == (
+            archived_ids
+        )
+
+        # 2 + 1 lendings, moved by set based statements
+        inserts = [query for query in executed_queries if query.startswith("INSERT")]
+        assert len(inserts) == 2
+
+        # Nothing left to archive
+        assert archive_lendings(session, cutoff, batch_size=2) == 0
+
+    def test_archived_columns(
+        self,
+        session: Session,
+        user: User,
+        book: Book,
+    ) -> None:
+        lending = Lending(
+            user=user,
+            book=book,
+            start_time=datetime(2023, 1, 1),
+            end_time=datetime(2023, 1, 15),
+            return_time=datetime(2023, 1, 10),
+            is_active=False,
+        )
+        session.add(lending)
+        session.commit()
+
+        archive_lendings(session, datetime(2024, 1, 1), batch_size=10)
+
+        archived = session.execute(select(LendingArchive)).scalar_one()
+
+        assert (
+            archived.id,
+            archived.user_id,
+            archived.book_id,
+            archived.start_time,
+            archived.end_time,
+            archived.is_active,
+            archived.return_time,
+        ) == (
+            lending.id,
+            user.id,
+            book.id,
+            datetime(2023, 1, 1),
+            datetime(2023, 1, 15),
+            False,
+            datetime(2023, 1, 10),
+        )
+        assert archived.archived_at is not None
+        assert session.execute(select(func.count(Lending.id))).scalar() == 0
+
+
+class TestCloseOverdueLendings:
+    def test_close_overdue_lendings(
+        self,
+        session: Session,
+        user: User,
+        book: Book,
+        executed_queries: list[str],
+    ) -> None:
+        now = datetime.now()
+
+        def lending(end_days_ago: int) -> Lending:
+            return Lending(
+                user=user,
+                book=book,
+                start_time=now - timedelta(days=end_days_ago + 10),
+                end_time=now - timedelta(days=end_days_ago),
+            )
+
+        overdue = [lending(end_days_ago) for end_days_ago in (1, 2, 3)]
+        current = lending(end_days_ago=-1)
+        session.add_all([*overdue, current])
+        session.commit()
+        executed_queries.clear()
+
+        assert close_overdue_lendings(session, now, batch_size=2) == 3
+
+        # 2 + 1 lendings, one UPDATE per batch
+        updates = [query for query in executed_queries if query.startswith("UPDATE")]
+        assert len(updates) == 2
+
+        session.expire_all()
+        assert not any(lending.is_active for lending in overdue)
+        assert all(lending.return_time is None for lending in overdue)
+        assert current.is_active
+
+        assert close_overdue_lendings(session, now, batch_size=2) == 0
@@ -0,0 +1,159 @@
+from http import HTTPStatus
+
+import pytest
+from fastapi.testclient import TestClient
+from sqlalchemy.orm import Session
+
+from src.database import search
+from src.database.models import Author, Book
+
+
+@pytest.fixture
+def books(session: Session) -> list[Book]:
+    corey = Author(first_name="James S.A.", last_name="Corey")
+    hobbes = Author(first_name="Thomas", last_name="Leviathan")
+    books = [
+        Book(title="Leviathan Wakes", author=corey),
+        Book(title="Caliban's War", author=corey),
+        Book(title="Behemoth", author=hobbes),
+    ]
+    session.add_all(books)
+    session.commit()
+
+    return books
+
+
+def search_titles(test_client: TestClient, query: str) -> list[str]:
+    response = test_client.get("/books/search", params={"q": query})
+
+    assert response.status_code == HTTPStatus.OK
+
+    return [book["title"] for book in response.json()["items"]]
+
+
+class TestBookSearch:
+    def test_search_ranked(
+        self,
+        test_client: TestClient,
+        books: list[Book],
+    ) -> None:
+        # Title matches first, then author matches
+        assert search_titles(test_client, "leviathan") == [
+            "Leviathan Wakes",
+            "Behemoth",
+        ]
+
+        # Every word, as a prefix, accents and case ignored
+        assert search_titles(test_client, "LÉVIA wak") == ["Leviathan Wakes"]
+        assert search_titles(test_client, "corey cal") == ["Caliban's War"]
+        assert search_titles(test_client, "dune") == []
+
+    def test_search_paginated(
+        self,
+        test_client: TestClient,
+        books: list[Book],
+    ) -> None:
+        response = test_client.get(
+            "/books/search", params={"q": "leviathan", "limit": 1}
+        )
+
+        assert [book["title"] for book in response.json()["items"]] == [
+            "Leviathan Wakes"
+        ]
+
+        response = test_client.get(
+            "/books/search",
+            params={"q": "leviathan", "limit": 1, "cursor": response.json()["next"]},
+        )
+
+        assert [book["title"] for book in response.json()["items"]] == ["Behemoth"]
+        assert response.json()["next"] is None
+
+    def test_search_selected_fields(
+        self,
+        test_client: TestClient,
+        books: list[Book],
+    ) -> None:
+        response = test_client.get(
+            "/books/search", params={"q": "behemoth", "fields": "id"}
+        )
+
+        assert response.json()["items"] == [{"id": books[2].id}]
+
+    def test_search_without_words(
+        self,
+        test_client: TestClient,
+    ) -> None:
+        response = test_client.get("/books/search", params={"q": '"*:&'})
+
+        assert response.status_code == HTTPStatus.BAD_REQUEST
+
+    def test_index_follows_writes(
+        self,
+        test_client: TestClient,
+        books: list[Book],
+    ) -> None:
+        author_id = books[0].author_id
+
+        response = test_client.post(
+            "/books/", json={"title": "Abaddon's Gate", "author_id": author_id}
+        )
+        book_id = response.json()["id"]
+        assert search_titles(test_client, "abaddon") == ["Abaddon's Gate"]
+
+        test_client.put(
+            f"/books/{book_id}", json={"title": "Cibola Burn", "author_id": author_id}
+        )
+        assert search_titles(test_client, "abaddon") == []
+        assert search_titles(test_client, "cibola") == ["Cibola Burn"]
+
+        test_client.put(
+            f"/author/{author_id}",
+            json={"first_name": "Daniel", "last_name": "Abraham"},
+        )
+        assert search_titles(test_client, "corey") == []
+        assert len(search_titles(test_client, "abraham")) == 3
+
+        test_client.delete(f"/books/{book_id}")
+        assert search_titles(test_client, "cibola") == []
+
+    def test_index_follows_bulk_writes(
+        self,
+        test_client: TestClient,
+        books: list[Book],
+    ) -> None:
+        test_client.post(
+            "/books/bulk",
+            json=[{"title": "Nemesis Games", "author_id": books[0].author_id}],
+        )
+
+        test_client.post(
+            "/books/import",
+            files={
+                "file": (
+                    "catalog.csv",
+                    b"author_first_name,author_last_name,title,isbn\n"
+                    b"Becky,Chambers,The Long Way to a Small Angry Planet,\n",
+                )
+            },
+        )
+
+        assert search_titles(test_client, "nemesis") == ["Nemesis Games"]
+        assert search_titles(test_client, "chambers angry") == [
+            "The Long Way to a Small Angry Planet"
+        ]
+
+    def test_refresh_every_book(
+        self,
+        session: Session,
+        books: list[Book],
+    ) -> None:
+        # Database populated before the index existed
+        search.remove(session.connection(), [book.id for book in books])
+        assert Book.search_rows(["behemoth"], session) == []
+
+        search.refresh(session.connection())
+
+        assert [row.title for row in Book.search_rows(["behemoth"], session)] == [
+            "Behemoth"
+        ]
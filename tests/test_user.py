@@ -1,3 +1,4 @@
+import asyncio
 from copy import deepcopy
 from http import HTTPStatus
 from typing import Generator
@@ -5,10 +6,16 @@ from uuid import UUID
 
 import pytest
 from fastapi.testclient import TestClient
+from passlib.context import CryptContext
+from pytest import MonkeyPatch
 from sqlalchemy import func, select
 from sqlalchemy.orm import Session
 
+from src.api import config
+from src.authentication import hashing
+from src.authentication.cache import logged_users
 from src.database.models import User
+from tests.test_lending import create_test_token
 
 
 class TestCreateUser:
@@ -52,6 +59,26 @@ class TestCreateUser:
         # Password MUST NOT be stored without encryption
         assert obj.password != "beltalowda42"
 
+    @pytest.mark.parametrize("field", ["username", "email"])
+    def test_create_duplicate(
+        self,
+        field: str,
+        test_client: TestClient,
+        book_payload: dict[str, str],
+        session: Session,
+    ) -> None:
+        assert test_client.post("/user", json=book_payload).status_code == (
+            HTTPStatus.CREATED
+        )
+
+        payload = book_payload | {"username": "amos", "email": "amos@example.com"}
+        payload[field] = book_payload[field]
+
+        response = test_client.post("/user", json=payload)
+
+        assert response.status_code == HTTPStatus.CONFLICT
+        assert session.execute(select(func.count(User.id))).scalar() == 1
+
     @pytest.mark.parametrize(
         "missing_field",
         [
@@ -89,3 +116,175 @@ class TestCreateUser:
 
         users_count = session.execute(query).scalar()
         assert users_count == 0
+
+
+class TestCreateToken:
+    @pytest.fixture
+    def user(self, session: Session) -> Generator[User, None, None]:
+        user: User = User(
+            username="bruce",
+            email="bruce@bruce.tld",
+            password="h4xx0r",
+        )
+
+        session.add(user)
+        session.commit()
+
+        yield user
+
+    def test_create_token(
+        self,
+        test_client: TestClient,
+        user: User,
+    ) -> None:
+        response = test_client.post(
+            "/user/token", data={"username": "bruce", "password": "h4xx0r"}
+        )
+
+        assert response.status_code == HTTPStatus.ACCEPTED
+        assert response.json()["token_type"] == "bearer"
+
+    def test_create_token_wrong_password(
+        self,
+        test_client: TestClient,
+        user: User,
+    ) -> None:
+        response = test_client.post(
+            "/user/token", data={"username": "bruce", "password": "h4xx"}
+        )
+
+        assert response.status_code == HTTPStatus.UNAUTHORIZED
+
+    def test_hash_upgraded_on_login(
+        self,
+        test_client: TestClient,
+        session: Session,
+        user: User,
+    ) -> None:
+        # Hash stored before the number of rounds was raised
+        cheaper_context = CryptContext(schemes=["bcrypt"], bcrypt__rounds=4)
+        user.hashed_password = cheaper_context.hash("h4xx0r")
+        session.add(user)
+        session.commit()
+
+        response = test_client.post(
+            "/user/token", data={"username": "bruce", "password": "h4xx0r"}
+        )
+
+        assert response.status_code == HTTPStatus.ACCEPTED
+
+        session.refresh(user)
+
+        assert user.hashed_password.startswith(f"$2b${config.BCRYPT_ROUNDS:02d}$")
+        assert hashing.verify_password("h4xx0r", user.hashed_password) == (True, None)
+
+    def test_hashing_queue_full(
+        self,
+        test_client: TestClient,
+        user: User,
+        monkeypatch: MonkeyPatch,
+    ) -> None:
+        monkeypatch.setattr(config, "PASSWORD_HASHING_WORKERS", 1)
+        monkeypatch.setattr(config, "PASSWORD_HASHING_QUEUE_TIMEOUT", 0)
+
+        # Every slot of the queue is taken
+        monkeypatch.setattr(
+            hashing, "get_async_pending_slots", lambda: asyncio.Semaphore(0)
+        )
+
+        response = test_client.post(
+            "/user/token", data={"username": "bruce", "password": "h4xx0r"}
+        )
+
+        assert response.status_code == HTTPStatus.SERVICE_UNAVAILABLE
+        assert response.headers["Retry-After"] == "1"
+
+
+class TestLoggedUserCache:
+    def test_logged_user_is_cached(
+        self,
+        test_client: TestClient,
+        session: Session,
+        monkeypatch: MonkeyPatch,
+        executed_queries: list[str],
+    ) -> None:
+        user: User = User(
+            username="bruce",
+            email="bruce@bruce.tld",
+            password="h4xx0r",
+        )
+
+        session.add(user)
+        session.commit()
+
+        headers = {"Authorization": f"Bearer {create_test_token(user, monkeypatch)}"}
+
+        response = test_client.get("/lending/me", headers=headers)
+        assert response.status_code == HTTPStatus.OK
+
+        executed_queries.clear()
+
+        response = test_client.get("/lending/me", headers=headers)
+        assert response.status_code == HTTPStatus.OK
+
+        # Only the lendings query, the user comes from the cache
+        assert len(executed_queries) == 1
+        assert logged_users.statistics()["hits"] == 1
+        assert logged_users.statistics()["misses"] == 1
+
+    def test_updated_user_is_invalidated(
+        self,
+        test_client: TestClient,
+        session: Session,
+        monkeypatch: MonkeyPatch,
+    ) -> None:
+        user: User = User(
+            username="bruce",
+            email="bruce@bruce.tld",
+            password="h4xx0r",
+        )
+
+        session.add(user)
+        session.commit()
+
+        headers = {"Authorization": f"Bearer {create_test_token(user, monkeypatch)}"}
+
+        response = test_client.get("/lending/me", headers=headers)
+        assert response.status_code == HTTPStatus.OK
+        assert logged_users.get("bruce") is not None
+
+        user.username = "batman"
+        session.add(user)
+        session.commit()
+
+        assert logged_users.get("bruce") is None
+
+        # The token subject doesn't match any user anymore
+        response = test_client.get("/lending/me", headers=headers)
+        assert response.status_code == HTTPStatus.UNAUTHORIZED
+
+    def test_deleted_user_is_invalidated(
+        self,
+        test_client: TestClient,
+        session: Session,
+        monkeypatch: MonkeyPatch,
+    ) -> None:
+        user: User = User(
+            username="bruce",
+            email="bruce@bruce.tld",
+            password="h4xx0r",
+        )
+
+        session.add(user)
+        session.commit()
+
+        headers = {"Authorization": f"Bearer {create_test_token(user, monkeypatch)}"}
+
+        response = test_client.get("/lending/me", headers=headers)
+        assert response.status_code == HTTPStatus.OK
+
+        session.delete(user)
+        session.commit()
+
+        response = test_client.get("/lending/me", headers=headers)
+        assert response.status_code == HTTPStatus.UNAUTHORIZED